@@ -1,15 +1,24 @@
+import json
 import os
-from flask import Flask, send_from_directory
+import tempfile
+import click
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from dotenv import load_dotenv
+from app.assets import build_assets, init_assets
+from app.compression import init_compression
+from app.database import configure_engine_options, normalize_database_url
+from app.profiling import init_profiling
+from app.ratelimit import init_rate_limit
+from app.routing import RoutingSession, configure_read_split
 
 load_dotenv()
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
-def create_app():
+def create_app(config=None):
     # Serve frontend: use 'static' folder in production (Azure), '../frontend' in development
     base_dir = os.path.dirname(os.path.dirname(__file__))
     static_folder = os.path.join(base_dir, 'static')
@@ -18,17 +27,154 @@ def create_app():
     app = Flask(__name__, static_folder=static_folder, static_url_path='')
     
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///taskboard.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_url(os.getenv('DATABASE_URL', 'sqlite:///taskboard.db'))
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    
+    # Create and upgrade the schema in create_app. Under gunicorn --preload this runs
+    # once in the master; with several instances, turn it off and run `flask init-db`.
+    app.config['DB_AUTO_SETUP'] = os.getenv('DB_AUTO_SETUP', 'true').lower() == 'true'
+    
+    # Connection pool (PostgreSQL)
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', '5'))
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    app.config['DB_STATEMENT_TIMEOUT'] = int(os.getenv('DB_STATEMENT_TIMEOUT', '30000'))  # ms
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-dev-secret')
     
+    # Background jobs
+    app.config['JOBS_ENABLED'] = os.getenv('JOBS_ENABLED', 'true').lower() == 'true'
+    app.config['JOBS_EAGER'] = os.getenv('JOBS_EAGER', 'false').lower() == 'true'
+    app.config['JOBS_WORKERS'] = int(os.getenv('JOBS_WORKERS', '2'))
+    app.config['JOBS_POLL_INTERVAL'] = float(os.getenv('JOBS_POLL_INTERVAL', '2'))
+    app.config['JOBS_STALE_AFTER'] = int(os.getenv('JOBS_STALE_AFTER', '300'))
+    app.config['JOBS_MAX_ATTEMPTS'] = int(os.getenv('JOBS_MAX_ATTEMPTS', '3'))
+    
+    # SQLite storage profile, applied to every new connection
+    app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))  # ms
+    app.config['SQLITE_FOREIGN_KEYS'] = os.getenv('SQLITE_FOREIGN_KEYS', 'true').lower() == 'true'
+    app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    app.config['SQLITE_CACHE_SIZE'] = int(os.getenv('SQLITE_CACHE_SIZE', '-16000'))  # negative = KiB
+    app.config['SQLITE_JOURNAL_SIZE_LIMIT'] = int(os.getenv('SQLITE_JOURNAL_SIZE_LIMIT', str(64 * 1024 * 1024)))
+    app.config['SQLITE_AUTO_VACUUM'] = os.getenv('SQLITE_AUTO_VACUUM', 'INCREMENTAL')
+    app.config['SQLITE_CHECKPOINT_MODE'] = os.getenv('SQLITE_CHECKPOINT_MODE', 'PASSIVE')
+    app.config['SQLITE_CHECKPOINT_INTERVAL'] = int(os.getenv('SQLITE_CHECKPOINT_INTERVAL', '60'))
+    app.config['SQLITE_VACUUM_INTERVAL'] = int(os.getenv('SQLITE_VACUUM_INTERVAL', '3600'))
+    app.config['SQLITE_VACUUM_PAGES'] = int(os.getenv('SQLITE_VACUUM_PAGES', '1000'))
+    app.config['MAINTENANCE_ENABLED'] = os.getenv('MAINTENANCE_ENABLED', 'true').lower() == 'true'
+    
+    # Archive tasks that have sat in their board's last stage this many days; off by default (0)
+    app.config['TASK_ARCHIVE_AFTER_DAYS'] = int(os.getenv('TASK_ARCHIVE_AFTER_DAYS', '0'))
+    app.config['TASK_ARCHIVE_INTERVAL'] = int(os.getenv('TASK_ARCHIVE_INTERVAL', '3600'))
+    
+    # Sweep up deleted projects and boards whose purge job did not finish
+    app.config['DELETE_PURGE_INTERVAL'] = int(os.getenv('DELETE_PURGE_INTERVAL', '3600'))
+    app.config['DELETE_PURGE_GRACE'] = int(os.getenv('DELETE_PURGE_GRACE', '3600'))
+    
+    # Replicate the live SQLite file (e.g. on local disk) to durable storage
+    app.config['SQLITE_REPLICA_DIR'] = os.getenv('SQLITE_REPLICA_DIR')
+    app.config['SQLITE_REPLICA_INTERVAL'] = int(os.getenv('SQLITE_REPLICA_INTERVAL', '30'))
+    
+    # Read/write split: GET requests read through a separate read-only pool
+    app.config['DB_READ_SPLIT'] = os.getenv('DB_READ_SPLIT', 'true').lower() == 'true'
+    app.config['SQLALCHEMY_READ_URI'] = normalize_database_url(os.getenv('DATABASE_READ_URL', ''))
+    app.config['DB_READ_POOL_SIZE'] = int(os.getenv('DB_READ_POOL_SIZE', '5'))
+    app.config['DB_READ_AFTER_WRITE'] = float(os.getenv('DB_READ_AFTER_WRITE', '5'))  # seconds
+    
+    # Group commit: batch small concurrent writes into one commit (threaded workers)
+    app.config['GROUP_COMMIT'] = os.getenv('GROUP_COMMIT', 'false').lower() == 'true'
+    app.config['GROUP_COMMIT_WINDOW'] = float(os.getenv('GROUP_COMMIT_WINDOW', '0.002'))  # seconds
+    app.config['GROUP_COMMIT_MAX_BATCH'] = int(os.getenv('GROUP_COMMIT_MAX_BATCH', '64'))
+    app.config['GROUP_COMMIT_TIMEOUT'] = float(os.getenv('GROUP_COMMIT_TIMEOUT', '30'))
+    
+    # Response compression; algorithms in order of preference, levels per algorithm
+    app.config['COMPRESS_ENABLED'] = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    app.config['COMPRESS_ALGORITHMS'] = os.getenv('COMPRESS_ALGORITHMS', 'zstd,br,gzip')
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', '6'))
+    app.config['COMPRESS_BROTLI_LEVEL'] = int(os.getenv('COMPRESS_BROTLI_LEVEL', '4'))
+    app.config['COMPRESS_ZSTD_LEVEL'] = int(os.getenv('COMPRESS_ZSTD_LEVEL', '3'))
+    
+    # Bulk import (Trello / CSV / NDJSON); uploads are kept here until their import job finishes.
+    # Uploads above IMPORT_INLINE_MAX_BYTES always run as a background job.
+    app.config['IMPORT_BATCH_SIZE'] = int(os.getenv('IMPORT_BATCH_SIZE', '1000'))
+    app.config['IMPORT_MAX_BYTES'] = int(os.getenv('IMPORT_MAX_BYTES', str(256 * 1024 * 1024)))
+    app.config['IMPORT_INLINE_MAX_BYTES'] = int(os.getenv('IMPORT_INLINE_MAX_BYTES', str(8 * 1024 * 1024)))
+    # Hard cap on any request body (the largest import plus form overhead); Werkzeug
+    # also enforces it on chunked uploads that send no Content-Length
+    app.config['MAX_CONTENT_LENGTH'] = app.config['IMPORT_MAX_BYTES'] + 1024 * 1024
+    app.config['IMPORT_UPLOAD_DIR'] = os.getenv('IMPORT_UPLOAD_DIR') or os.path.join(app.instance_path, 'imports')
+    
+    # Per-user token buckets (tokens per second, burst size), separate for reads and writes.
+    # The sqlite store shares buckets across worker processes; keep it on local disk.
+    app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATE_LIMIT_STORAGE'] = os.getenv('RATE_LIMIT_STORAGE', 'sqlite')
+    app.config['RATE_LIMIT_SQLITE_PATH'] = os.getenv(
+        'RATE_LIMIT_SQLITE_PATH', os.path.join(tempfile.gettempdir(), 'taskboard-ratelimit.db')
+    )
+    app.config['RATE_LIMIT_READ_RATE'] = float(os.getenv('RATE_LIMIT_READ_RATE', '20'))
+    app.config['RATE_LIMIT_READ_BURST'] = float(os.getenv('RATE_LIMIT_READ_BURST', '200'))
+    app.config['RATE_LIMIT_WRITE_RATE'] = float(os.getenv('RATE_LIMIT_WRITE_RATE', '5'))
+    app.config['RATE_LIMIT_WRITE_BURST'] = float(os.getenv('RATE_LIMIT_WRITE_BURST', '50'))
+    
+    # Cache of serialized project / board / list payloads, invalidated per project on commit.
+    # The sqlite store is shared by the workers on one host; use memory only with a single process.
+    app.config['RESPONSE_CACHE_ENABLED'] = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    app.config['RESPONSE_CACHE_STORAGE'] = os.getenv('RESPONSE_CACHE_STORAGE', 'sqlite')
+    app.config['RESPONSE_CACHE_SQLITE_PATH'] = os.getenv(
+        'RESPONSE_CACHE_SQLITE_PATH', os.path.join(tempfile.gettempdir(), 'taskboard-cache.db')
+    )
+    app.config['RESPONSE_CACHE_MAX_ENTRIES'] = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '10000'))
+    
+    # Request profiling: per-endpoint timings and SQL counts at /metrics (Prometheus).
+    # X-Query-Count / X-Query-Time headers are added in debug mode or with PROFILING_HEADERS.
+    app.config['PROFILING_ENABLED'] = os.getenv('PROFILING_ENABLED', 'true').lower() == 'true'
+    app.config['PROFILING_HEADERS'] = os.getenv('PROFILING_HEADERS', 'false').lower() == 'true'
+    app.config['PROFILING_N_PLUS_ONE_THRESHOLD'] = int(os.getenv('PROFILING_N_PLUS_ONE_THRESHOLD', '5'))
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+    
+    # Comma-separated emails allowed to use /api/v1/admin
+    app.config['ADMIN_EMAILS'] = os.getenv('ADMIN_EMAILS', '')
+    
+    if config:
+        app.config.update(config)
+    
     CORS(app, supports_credentials=True)
+    # Registered first so it runs after every other after_request hook
+    init_compression(app)
+    init_profiling(app)
+    configure_engine_options(app)
+    configure_read_split(app)
+    
+    from app.services.replication import restore
+    restore(app)
     db.init_app(app)
     
-    from app.api import auth, projects, boards, stages, tasks, lists, templates
+    from app.api import auth, projects, boards, stages, tasks, lists, templates, jobs, admin
+    from app.cache import clear_cache, init_response_cache
+    from app.services.jobs import init_jobs
+    from app.services.group_commit import init_group_commit
+    from app.services.maintenance import init_maintenance
+    from app.services.storage import init_storage
+    from app.services.replication import init_replication
+    from app.services.archive import init_archive
+    from app.services.projects import init_purge
+    
+    scheduler = init_maintenance(app)
+    init_storage(app, scheduler)
+    init_replication(app, scheduler)
+    init_archive(app, scheduler)
+    init_purge(app, scheduler)
+    init_rate_limit(app, scheduler)
+    init_response_cache(app, scheduler)
     
     # Initialize OAuth
     auth.init_oauth(app)
+    init_jobs(app)
+    init_group_commit(app)
     
     app.register_blueprint(auth.bp, url_prefix='/api/v1/auth')
     app.register_blueprint(projects.bp, url_prefix='/api/v1/projects')
@@ -37,13 +183,82 @@ def create_app():
     app.register_blueprint(tasks.bp, url_prefix='/api/v1/projects/<int:project_id>/boards')
     app.register_blueprint(lists.bp, url_prefix='/api/v1/projects/<int:project_id>/lists')
     app.register_blueprint(templates.bp, url_prefix='/api/v1/templates')
+    app.register_blueprint(jobs.bp, url_prefix='/api/v1/jobs')
+    app.register_blueprint(admin.bp, url_prefix='/api/v1/admin')
+    
+    # Serve frontend (fingerprinted and precompressed when built with `flask build-assets`)
+    init_assets(app)
+    
+    @app.route('/api/v1/health')
+    def health():
+        return {'data': {'status': 'ok'}}
+    
+    from app.utils.schema import setup_database
+    from app.services import importer
+    from app.services.export import export_ndjson
+    from app.models import Project
+    
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create and upgrade the database schema and seed system templates."""
+        setup_database()
+    
+    @app.cli.command('clear-cache')
+    def clear_cache_command():
+        """Drop every cached response, e.g. after changing the database by hand."""
+        clear_cache(app)
+    
+    @app.cli.command('build-assets')
+    @click.option('--source', default=os.path.join(base_dir, '..', 'frontend'), show_default=True)
+    @click.option('--output', default=os.path.join(base_dir, 'static'), show_default=True)
+    def build_assets_command(source, output):
+        """Build fingerprinted, precompressed frontend assets into the static folder."""
+        try:
+            assets = build_assets(source, output)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        for asset in assets:
+            click.echo(json.dumps(asset))
+    
+    @app.cli.command('import')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--project-id', type=int, required=True, help='Project to import into')
+    @click.option('--format', 'fmt', type=click.Choice(importer.FORMATS), help='Default: from the file extension')
+    @click.option('--board-title', help='Title of the board created from a Trello or CSV file')
+    @click.option('--batch-size', type=int, default=lambda: app.config['IMPORT_BATCH_SIZE'])
+    def import_command(path, project_id, fmt, board_title, batch_size):
+        """Stream a Trello board export, CSV or NDJSON export into a project."""
+        if db.session.get(Project, project_id) is None:
+            raise click.ClickException(f'Project {project_id} not found')
+        fmt = fmt or importer.detect_format(path)
+        if fmt is None:
+            raise click.ClickException('Cannot tell the format from the file name; pass --format')
+        
+        def progress(done, total, counts):
+            click.echo(f'{done * 100 // max(total, 1)}% {counts["tasks"]} tasks, {counts["list_items"]} items', err=True)
+        
+        try:
+            result = importer.import_file(path, fmt, project_id, board_title=board_title,
+                                          batch_size=batch_size, progress=progress)
+        except importer.ImportFormatError as e:
+            raise click.ClickException(str(e))
+        click.echo(json.dumps(result))
+    
+    @app.cli.command('export')
+    @click.argument('project_id', type=int)
+    @click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Default: stdout')
+    def export_command(project_id, output):
+        """Stream a project as NDJSON in the format read by `flask import`."""
+        if db.session.get(Project, project_id) is None:
+            raise click.ClickException(f'Project {project_id} not found')
+        for chunk in export_ndjson(project_id):
+            output.write(chunk)
     
-    # Serve frontend
-    @app.route('/')
-    def serve_frontend():
-        return send_from_directory(app.static_folder, 'index.html')
+    from app.bench import bench
+    app.cli.add_command(bench)
     
-    with app.app_context():
-        db.create_all()
+    if app.config['DB_AUTO_SETUP']:
+        with app.app_context():
+            setup_database()
     
     return app
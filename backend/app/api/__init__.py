@@ -5,9 +5,11 @@ from app.api.stages import bp as stages_bp
 from app.api.tasks import bp as tasks_bp
 from app.api.lists import bp as lists_bp
 from app.api.templates import bp as templates_bp
+from app.api.jobs import bp as jobs_bp
+from app.api.admin import bp as admin_bp
 
 __all__ = [
     'auth_bp', 'init_oauth',
     'projects_bp', 'boards_bp', 'stages_bp', 'tasks_bp',
-    'lists_bp', 'templates_bp'
+    'lists_bp', 'templates_bp', 'jobs_bp', 'admin_bp'
 ]
@@ -0,0 +1,36 @@
+from flask import Blueprint, current_app
+from app.services.replication import replicate, replication_status
+from app.services.storage import storage_status
+from app.utils.auth import login_required, admin_required
+
+bp = Blueprint('admin', __name__)
+
+
+@bp.route('/storage', methods=['GET'])
+@login_required
+@admin_required
+def get_storage():
+    """Get database pragmas, file sizes and maintenance task status"""
+    data = storage_status()
+    data['maintenance'] = current_app.extensions['maintenance'].status()
+    return {'data': data}
+
+
+@bp.route('/replication', methods=['GET'])
+@login_required
+@admin_required
+def get_replication():
+    """Get the age of the durable replica and whether changes are pending"""
+    return {'data': replication_status(current_app)}
+
+
+@bp.route('/replication', methods=['POST'])
+@login_required
+@admin_required
+def run_replication():
+    """Replicate the live database now, e.g. before a planned restart"""
+    if not current_app.config['SQLITE_REPLICA_DIR']:
+        return {'error': {'code': 'REPLICATION_DISABLED', 'message': 'SQLITE_REPLICA_DIR is not set'}}, 400
+    result = replicate(current_app, force=True)
+    result['status'] = replication_status(current_app)
+    return {'data': result}
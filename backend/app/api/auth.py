@@ -1,28 +1,79 @@
+import json
+import logging
 import os
+import threading
+import time
 from datetime import datetime, timedelta
 import jwt
 from flask import Blueprint, redirect, url_for, session, request, jsonify, current_app
-from authlib.integrations.flask_client import OAuth
 from app import db
 from app.models.user import User
 from app.utils.auth import login_required, get_current_user
-from app.services.default_templates import seed_default_templates
+from app.routing import use_writer
 
 bp = Blueprint('auth', __name__)
 
-# OAuth setup
-oauth = OAuth()
+logger = logging.getLogger(__name__)
+
+GOOGLE_METADATA_URL = 'https://accounts.google.com/.well-known/openid-configuration'
+
+_oauth_lock = threading.Lock()
 
 
 def init_oauth(app):
-    oauth.init_app(app)
-    oauth.register(
-        name='google',
-        client_id=os.getenv('GOOGLE_CLIENT_ID'),
-        client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
-        server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-        client_kwargs={'scope': 'openid email profile'}
-    )
+    """Configure Google sign-in; the client itself is built on first use"""
+    app.config.setdefault('GOOGLE_CLIENT_ID', os.getenv('GOOGLE_CLIENT_ID'))
+    app.config.setdefault('GOOGLE_CLIENT_SECRET', os.getenv('GOOGLE_CLIENT_SECRET'))
+    app.config.setdefault('OAUTH_METADATA_CACHE', os.path.join(app.instance_path, 'google-openid-configuration.json'))
+    app.config.setdefault('OAUTH_METADATA_TTL', int(os.getenv('OAUTH_METADATA_TTL', '86400')))
+
+
+def google_client():
+    """Google OAuth client for the current app.
+
+    authlib (and requests) are imported only here, so workers that never see a
+    login do not pay for them. The OpenID discovery document is cached on disk
+    for OAUTH_METADATA_TTL seconds and shared by every worker.
+    """
+    app = current_app._get_current_object()
+    client = app.extensions.get('google_oauth')
+    if client is None:
+        with _oauth_lock:
+            client = app.extensions.get('google_oauth')
+            if client is None:
+                from authlib.integrations.flask_client import OAuth
+                client = OAuth(app).register(
+                    name='google',
+                    client_id=app.config['GOOGLE_CLIENT_ID'],
+                    client_secret=app.config['GOOGLE_CLIENT_SECRET'],
+                    server_metadata_url=GOOGLE_METADATA_URL,
+                    client_kwargs={'scope': 'openid email profile'}
+                )
+                app.extensions['google_oauth'] = client
+
+    if '_loaded_at' not in client.server_metadata:
+        _load_metadata(client, app.config['OAUTH_METADATA_CACHE'], app.config['OAUTH_METADATA_TTL'])
+    return client
+
+
+def _load_metadata(client, cache_path, ttl):
+    try:
+        if time.time() - os.path.getmtime(cache_path) < ttl:
+            with open(cache_path) as f:
+                client.server_metadata.update(json.load(f))
+            return
+    except (OSError, ValueError):
+        pass
+
+    metadata = client.load_server_metadata()
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(metadata, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        logger.warning('Could not cache OAuth metadata at %s', cache_path, exc_info=True)
 
 
 @bp.route('/login')
@@ -36,10 +87,11 @@ def login():
     
     host = request.headers.get('X-Forwarded-Host', request.host)
     redirect_uri = f"{scheme}://{host}/api/v1/auth/callback"
-    return oauth.google.authorize_redirect(redirect_uri)
+    return google_client().authorize_redirect(redirect_uri)
 
 
 @bp.route('/dev-login')
+@use_writer
 def dev_login():
     """Development-only login bypass - creates a test user"""
     if not current_app.debug:
@@ -56,18 +108,16 @@ def dev_login():
         )
         db.session.add(user)
         db.session.commit()
-        
-        # Seed default project templates for new dev user
-        seed_default_templates(user.id)
     
     session['user_id'] = user.id
     return redirect('/#/boards')
 
 
 @bp.route('/callback')
+@use_writer
 def callback():
     """Handle OAuth callback"""
-    token = oauth.google.authorize_access_token()
+    token = google_client().authorize_access_token()
     user_info = token.get('userinfo')
     
     if not user_info:
@@ -83,10 +133,6 @@ def callback():
             avatar_url=user_info.get('picture')
         )
         db.session.add(user)
-        db.session.commit()
-        
-        # Seed default project templates for new users
-        seed_default_templates(user.id)
     else:
         user.last_login = datetime.utcnow()
         user.name = user_info.get('name', user.name)
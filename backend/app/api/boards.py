@@ -2,7 +2,12 @@ from flask import Blueprint, request, g
 from app import db
 from app.models.board import Board
 from app.models.stage import Stage
+from app.cache import cached_response
 from app.utils.auth import login_required, require_project_access, require_board_access
+from app.services.duplicate import duplicate_board
+from app.services import projects as project_service
+from app.services.jobs import job_accepted, wants_async
+from app.utils.responses import InvalidFields, requested_fields, sparse_options
 
 bp = Blueprint('boards', __name__)
 
@@ -11,9 +16,13 @@ bp = Blueprint('boards', __name__)
 @login_required
 @require_project_access()
 def list_boards(project_id):
-    """List boards in a project"""
-    boards = g.project.boards.all()
-    return {'data': [b.to_dict() for b in boards]}
+    """List boards in a project (optional: ?fields=)"""
+    try:
+        fields = requested_fields(Board)
+    except InvalidFields as e:
+        return {'error': {'code': 'VALIDATION_ERROR', 'message': str(e)}}, 400
+    boards = g.project.active_boards().options(*sparse_options(Board, fields)).all()
+    return {'data': [b.to_dict(fields=fields) for b in boards]}
 
 
 @bp.route('', methods=['POST'])
@@ -46,6 +55,7 @@ def create_board(project_id):
 @bp.route('/<int:board_id>', methods=['GET'])
 @login_required
 @require_board_access()
+@cached_response
 def get_board(project_id, board_id):
     """Get board details"""
     return {'data': g.board.to_dict(include_stages=True)}
@@ -110,6 +120,23 @@ def delete_board(project_id, board_id):
     if g.project_access != 'owner':
         return {'error': {'code': 'FORBIDDEN', 'message': 'Only project owner can delete board'}}, 403
     
-    db.session.delete(g.board)
+    # The board disappears now; its rows are purged by a background job
+    job = project_service.soft_delete_board(g.board, owner_id=g.current_user.id)
+    if wants_async():
+        return job_accepted(job)
+    return {'data': {'message': 'Board deleted', 'job_id': job.id}}
+
+
+@bp.route('/<int:board_id>/duplicate', methods=['POST'])
+@login_required
+@require_board_access()
+def duplicate_board_view(project_id, board_id):
+    """Copy a board with its stages and tasks within the project"""
+    data = request.get_json(silent=True) or {}
+    
+    board = duplicate_board(g.board, keep_assignees=bool(data.get('keep_assignees', True)))
+    if data.get('title'):
+        board.title = data['title']
     db.session.commit()
-    return {'data': {'message': 'Board deleted'}}
+    
+    return {'data': board.to_dict(include_stages=True)}, 201
@@ -0,0 +1,21 @@
+from flask import Blueprint, g
+from app.models.job import Job
+from app.utils.auth import login_required
+
+bp = Blueprint('jobs', __name__)
+
+
+@bp.route('', methods=['GET'])
+@login_required
+def list_jobs():
+    """List the current user's recent jobs"""
+    jobs = Job.query.filter_by(owner_id=g.current_user.id).order_by(Job.created_at.desc()).limit(50).all()
+    return {'data': [j.to_dict() for j in jobs]}
+
+
+@bp.route('/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """Get job status, progress and result"""
+    job = Job.query.filter_by(id=job_id, owner_id=g.current_user.id).first_or_404()
+    return {'data': job.to_dict()}
@@ -2,7 +2,10 @@ from flask import Blueprint, request, g
 from app import db
 from app.models.list import List
 from app.models.list_item import ListItem
+from app.cache import cached_response
 from app.utils.auth import login_required, require_project_access, require_list_access
+from app.services.group_commit import write
+from app.utils.responses import InvalidFields, requested_fields, side_loaded_users, sparse_options, with_users
 
 bp = Blueprint('lists', __name__)
 
@@ -11,9 +14,13 @@ bp = Blueprint('lists', __name__)
 @login_required
 @require_project_access()
 def list_lists(project_id):
-    """List lists in a project"""
-    lists = g.project.lists.all()
-    return {'data': [l.to_dict() for l in lists]}
+    """List lists in a project (optional: ?fields=)"""
+    try:
+        fields = requested_fields(List)
+    except InvalidFields as e:
+        return {'error': {'code': 'VALIDATION_ERROR', 'message': str(e)}}, 400
+    lists = g.project.lists.options(*sparse_options(List, fields)).all()
+    return {'data': [l.to_dict(fields=fields) for l in lists]}
 
 
 @bp.route('', methods=['POST'])
@@ -41,9 +48,11 @@ def create_list(project_id):
 @bp.route('/<int:list_id>', methods=['GET'])
 @login_required
 @require_list_access()
+@cached_response
 def get_list(project_id, list_id):
-    """Get list with items"""
-    return {'data': g.list.to_dict(include_items=True)}
+    """Get list with items (optional: ?normalize=1)"""
+    users = side_loaded_users()
+    return with_users({'data': g.list.to_dict(include_items=True, users=users)}, users)
 
 
 @bp.route('/<int:list_id>', methods=['PUT'])
@@ -81,9 +90,14 @@ def delete_list(project_id, list_id):
 @login_required
 @require_list_access()
 def list_items(project_id, list_id):
-    """List items in list"""
-    items = g.list.items.order_by(ListItem.position).all()
-    return {'data': [i.to_dict() for i in items]}
+    """List items in list (optional: ?normalize=1, ?fields=)"""
+    try:
+        fields = requested_fields(ListItem)
+    except InvalidFields as e:
+        return {'error': {'code': 'VALIDATION_ERROR', 'message': str(e)}}, 400
+    items = g.list.items.options(*sparse_options(ListItem, fields)).order_by(ListItem.position).all()
+    users = side_loaded_users()
+    return with_users({'data': [i.to_dict(users, fields) for i in items]}, users)
 
 
 @bp.route('/<int:list_id>/items', methods=['POST'])
@@ -108,7 +122,8 @@ def create_item(project_id, list_id):
     db.session.add(item)
     db.session.commit()
     
-    return {'data': item.to_dict()}, 201
+    users = side_loaded_users()
+    return with_users({'data': item.to_dict(users)}, users), 201
 
 
 @bp.route('/<int:list_id>/items/<int:item_id>', methods=['PUT'])
@@ -118,16 +133,20 @@ def update_item(project_id, list_id, item_id):
     """Update item"""
     item = ListItem.query.filter_by(id=item_id, list_id=list_id).first_or_404()
     data = request.get_json() or {}
-    
+    users = side_loaded_users()
+    return with_users({'data': write(_update_item, item.id, data, users)}, users)
+
+
+def _update_item(session, item_id, data, users=None):
+    item = session.get(ListItem, item_id)
     if 'content' in data:
         item.content = data['content']
     if 'is_checked' in data:
         item.is_checked = data['is_checked']
     if 'assigned_to' in data:
         item.assigned_to = data['assigned_to'] if data['assigned_to'] else None
-    
-    db.session.commit()
-    return {'data': item.to_dict()}
+    session.flush()
+    return item.to_dict(users)
 
 
 @bp.route('/<int:list_id>/items/<int:item_id>', methods=['DELETE'])
@@ -147,8 +166,12 @@ def delete_item(project_id, list_id, item_id):
 def toggle_item(project_id, list_id, item_id):
     """Toggle checkbox"""
     item = ListItem.query.filter_by(id=item_id, list_id=list_id).first_or_404()
-    
+    users = side_loaded_users()
+    return with_users({'data': write(_toggle_item, item.id, users)}, users)
+
+
+def _toggle_item(session, item_id, users=None):
+    item = session.get(ListItem, item_id)
     item.is_checked = not item.is_checked
-    db.session.commit()
-    
-    return {'data': item.to_dict()}
+    session.flush()
+    return item.to_dict(users)
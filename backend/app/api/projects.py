@@ -1,8 +1,17 @@
-from flask import Blueprint, request, g
+import os
+from flask import Blueprint, Response, request, g, current_app, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from app import db
 from app.models.project import Project, ProjectShare
-from app.models.user import User
+from app.models.user import SYSTEM_USER_GOOGLE_ID, User
+from app.cache import cached_response
 from app.utils.auth import login_required, require_project_access
+from app.utils.responses import InvalidFields, requested_fields, side_loaded_users, sparse_options, with_users
+from app.services.jobs import enqueue, job_accepted, wants_async
+from app.services import importer, projects as project_service
+from app.services.export import export_ndjson
+from app.services.duplicate import duplicate_project
+from app.services.archive import search_archive
 
 bp = Blueprint('projects', __name__)
 
@@ -10,22 +19,30 @@ bp = Blueprint('projects', __name__)
 @bp.route('', methods=['GET'])
 @login_required
 def list_projects():
-    """List user's projects (owned + shared)"""
+    """List user's projects (owned + shared; optional: ?normalize=1, ?fields=)"""
+    try:
+        fields = requested_fields(Project)
+    except InvalidFields as e:
+        return {'error': {'code': 'VALIDATION_ERROR', 'message': str(e)}}, 400
     user = g.current_user
+    users = side_loaded_users()
+    options = sparse_options(Project, fields)
     
     # Get owned projects
-    owned = Project.query.filter_by(owner_id=user.id).all()
+    owned = Project.query.filter_by(owner_id=user.id, deleted_at=None).options(*options).all()
     
     # Get shared projects
     shared_ids = [s.project_id for s in user.shared_projects]
-    shared = Project.query.filter(Project.id.in_(shared_ids)).all() if shared_ids else []
+    shared = Project.query.filter(
+        Project.id.in_(shared_ids), Project.deleted_at.is_(None)
+    ).options(*options).all() if shared_ids else []
     
-    return {
+    return with_users({
         'data': {
-            'owned': [p.to_dict() for p in owned],
-            'shared': [p.to_dict() for p in shared]
+            'owned': [p.to_dict(users=users, fields=fields) for p in owned],
+            'shared': [p.to_dict(users=users, fields=fields) for p in shared]
         }
-    }
+    }, users)
 
 
 @bp.route('', methods=['POST'])
@@ -53,9 +70,11 @@ def create_project():
 @bp.route('/<int:project_id>', methods=['GET'])
 @login_required
 @require_project_access()
+@cached_response
 def get_project(project_id):
-    """Get project with all boards and lists"""
-    return {'data': g.project.to_dict(include_contents=True)}
+    """Get project with all boards and lists (optional: ?normalize=1)"""
+    users = side_loaded_users()
+    return with_users({'data': g.project.to_dict(include_contents=True, users=users)}, users)
 
 
 @bp.route('/<int:project_id>', methods=['PUT'])
@@ -84,25 +103,114 @@ def delete_project(project_id):
     if g.project_access != 'owner':
         return {'error': {'code': 'FORBIDDEN', 'message': 'Only owner can delete project'}}, 403
     
-    db.session.delete(g.project)
+    # The project disappears now; its rows are purged by a background job
+    job = project_service.soft_delete_project(g.project, owner_id=g.current_user.id)
+    if wants_async():
+        return job_accepted(job)
+    return {'data': {'message': 'Project deleted', 'job_id': job.id}}
+
+
+@bp.route('/<int:project_id>/duplicate', methods=['POST'])
+@login_required
+@require_project_access()
+def duplicate_project_view(project_id):
+    """Copy a project with its boards and lists into a new project owned by the caller"""
+    data = request.get_json(silent=True) or {}
+    
+    project = duplicate_project(
+        g.project,
+        owner_id=g.current_user.id,
+        keep_assignees=bool(data.get('keep_assignees', True)),
+        keep_checked=bool(data.get('keep_checked', True))
+    )
+    if data.get('name'):
+        project.name = data['name']
     db.session.commit()
-    return {'data': {'message': 'Project deleted'}}
+    
+    return {'data': project.to_dict(include_contents=True)}, 201
+
+
+@bp.route('/<int:project_id>/export', methods=['GET'])
+@login_required
+@require_project_access()
+def export_project(project_id):
+    """Stream the project's boards, stages, tasks, lists and items as NDJSON"""
+    return Response(
+        stream_with_context(export_ndjson(project_id)),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename="project-{project_id}.ndjson"'}
+    )
+
+
+def _import_too_large():
+    return {'error': {'code': 'PAYLOAD_TOO_LARGE', 'message': 'Import file is too large'}}, 413
+
+
+@bp.route('/<int:project_id>/import', methods=['POST'])
+@login_required
+@require_project_access()
+def import_into_project(project_id):
+    """Import boards, tasks and lists from an uploaded Trello, CSV or NDJSON file (optional: ?async=1)"""
+    max_bytes = current_app.config['IMPORT_MAX_BYTES']
+    if (request.content_length or 0) > max_bytes:
+        return _import_too_large()
+    
+    try:
+        upload = request.files.get('file')
+    except RequestEntityTooLarge:
+        return _import_too_large()
+    if upload is None or not upload.filename:
+        return {'error': {'code': 'VALIDATION_ERROR', 'message': 'A file upload is required'}}, 400
+    fmt = request.form.get('format') or importer.detect_format(upload.filename)
+    if fmt not in importer.FORMATS:
+        return {'error': {'code': 'VALIDATION_ERROR', 'message': f'Format must be one of {", ".join(importer.FORMATS)}'}}, 400
+    
+    payload = {
+        'path': importer.save_upload(upload, current_app.config['IMPORT_UPLOAD_DIR']),
+        'format': fmt,
+        'project_id': project_id,
+        'board_title': request.form.get('board_title'),
+        'batch_size': current_app.config['IMPORT_BATCH_SIZE']
+    }
+    # Chunked uploads carry no Content-Length, so check what was actually received
+    size = os.path.getsize(payload['path'])
+    if size > max_bytes:
+        os.remove(payload['path'])
+        return _import_too_large()
+    if wants_async() or size > current_app.config['IMPORT_INLINE_MAX_BYTES']:
+        return job_accepted(enqueue('import', payload, owner_id=g.current_user.id))
+    
+    try:
+        result = importer.import_file(payload['path'], fmt, project_id, board_title=payload['board_title'],
+                                      batch_size=payload['batch_size'])
+    except importer.ImportFormatError as e:
+        db.session.rollback()
+        return {'error': {'code': 'VALIDATION_ERROR', 'message': str(e)}}, 400
+    finally:
+        os.remove(payload['path'])
+    return {'data': result}, 201
+
+
+@bp.route('/<int:project_id>/archive', methods=['GET'])
+@login_required
+@require_project_access()
+def search_project_archive(project_id):
+    """Search archived tasks across a project's boards (optional: ?q=, ?limit=, ?offset=, ?normalize=1)"""
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    offset = request.args.get('offset', 0, type=int)
+    board_ids = [b.id for b in g.project.active_boards()]
+    items, total = search_archive(board_ids, request.args.get('q'), limit=limit, offset=offset)
+    users = side_loaded_users()
+    return with_users({'data': [t.to_dict(users) for t in items], 'total': total}, users)
 
 
 @bp.route('/<int:project_id>/members', methods=['GET'])
 @login_required
 @require_project_access()
+@cached_response
 def list_members(project_id):
     """List all members of a project (owner + shared users)"""
-    owner = User.query.get(g.project.owner_id)
-    members = [owner.to_dict()] if owner else []
-    
-    shares = g.project.shares.all()
-    for share in shares:
-        if share.user:
-            members.append(share.user.to_dict())
-    
-    return {'data': members}
+    return {'data': [user.to_dict() for user, share in g.project.member_rows()]}
 
 
 # ============ Project Sharing ============
@@ -110,10 +218,13 @@ def list_members(project_id):
 @bp.route('/<int:project_id>/shares', methods=['GET'])
 @login_required
 @require_project_access()
+@cached_response
 def list_shares(project_id):
-    """List users project is shared with"""
-    shares = g.project.shares.all()
-    return {'data': [s.to_dict() for s in shares]}
+    """List users project is shared with (optional: ?normalize=1)"""
+    users = side_loaded_users()
+    # share.user resolves from the identity map filled by the same query
+    shares = [share.to_dict(users) for user, share in g.project.member_rows() if share is not None]
+    return with_users({'data': shares}, users)
 
 
 @bp.route('/<int:project_id>/shares', methods=['POST'])
@@ -131,7 +242,7 @@ def create_share(project_id):
         return {'error': {'code': 'VALIDATION_ERROR', 'message': 'Email is required'}}, 400
     
     # Find user by email
-    user = User.query.filter_by(email=email).first()
+    user = User.query.filter(User.email == email, User.google_id != SYSTEM_USER_GOOGLE_ID).first()
     if not user:
         return {'error': {'code': 'NOT_FOUND', 'message': 'User not found'}}, 404
     
@@ -4,7 +4,11 @@ from flask import Blueprint, request, g
 from app import db
 from app.models.task import Task
 from app.models.stage import Stage
+from app.models.archived_task import ArchivedTask
 from app.utils.auth import login_required, require_board_access
+from app.services import archive
+from app.services.group_commit import write
+from app.utils.responses import InvalidFields, requested_fields, side_loaded_users, sparse_options, with_users
 
 bp = Blueprint('tasks', __name__)
 
@@ -13,15 +17,32 @@ bp = Blueprint('tasks', __name__)
 @login_required
 @require_board_access()
 def list_tasks(project_id, board_id):
-    """List tasks (optional: ?stage_id=)"""
-    query = Task.query.filter_by(board_id=board_id)
+    """List tasks (optional: ?stage_id=, ?include_archived=1, ?normalize=1, ?fields=)"""
+    try:
+        fields = requested_fields(Task)
+    except InvalidFields as e:
+        return {'error': {'code': 'VALIDATION_ERROR', 'message': str(e)}}, 400
+    query = Task.query.filter_by(board_id=board_id).options(*sparse_options(Task, fields))
+    users = side_loaded_users()
     
     stage_id = request.args.get('stage_id', type=int)
     if stage_id:
         query = query.filter_by(stage_id=stage_id)
     
-    tasks = query.order_by(Task.position).all()
-    return {'data': [t.to_dict() for t in tasks]}
+    tasks = [t.to_dict(users, fields) for t in query.order_by(Task.position)]
+    
+    if include_archived():
+        archived = ArchivedTask.query.filter_by(board_id=board_id)
+        if stage_id:
+            archived = archived.filter_by(stage_id=stage_id)
+        for task in archived.order_by(ArchivedTask.archived_at.desc()):
+            data = task.to_dict(users)
+            tasks.append(data if fields is None else {k: v for k, v in data.items() if k in fields or k == 'archived'})
+    return with_users({'data': tasks}, users)
+
+
+def include_archived():
+    return request.args.get('include_archived', '').lower() in ('1', 'true', 'yes')
 
 
 @bp.route('/<int:board_id>/tasks', methods=['POST'])
@@ -66,16 +87,23 @@ def create_task(project_id, board_id):
     db.session.add(task)
     db.session.commit()
     
-    return {'data': task.to_dict()}, 201
+    users = side_loaded_users()
+    return with_users({'data': task.to_dict(users)}, users), 201
 
 
 @bp.route('/<int:board_id>/tasks/<int:task_id>', methods=['GET'])
 @login_required
 @require_board_access()
 def get_task(project_id, board_id, task_id):
-    """Get task details"""
-    task = Task.query.filter_by(id=task_id, board_id=board_id).first_or_404()
-    return {'data': task.to_dict()}
+    """Get task details (?include_archived=1 also finds archived tasks)"""
+    task = Task.query.filter_by(id=task_id, board_id=board_id).first()
+    if task is None and include_archived():
+        task = ArchivedTask.query.filter_by(task_id=task_id, board_id=board_id).order_by(
+            ArchivedTask.archived_at.desc()).first()
+    if task is None:
+        return {'error': {'code': 'NOT_FOUND', 'message': 'Task not found'}}, 404
+    users = side_loaded_users()
+    return with_users({'data': task.to_dict(users)}, users)
 
 
 @bp.route('/<int:board_id>/tasks/<int:task_id>', methods=['PUT'])
@@ -100,7 +128,8 @@ def update_task(project_id, board_id, task_id):
         task.assigned_to = data['assigned_to'] if data['assigned_to'] else None
     
     db.session.commit()
-    return {'data': task.to_dict()}
+    users = side_loaded_users()
+    return with_users({'data': task.to_dict(users)}, users)
 
 
 @bp.route('/<int:board_id>/tasks/<int:task_id>', methods=['DELETE'])
@@ -131,11 +160,78 @@ def move_task(project_id, board_id, task_id):
     if not new_stage:
         return {'error': {'code': 'VALIDATION_ERROR', 'message': 'Invalid stage'}}, 400
     
-    # Get max position in new stage
-    max_pos = db.session.query(db.func.max(Task.position)).filter_by(stage_id=new_stage_id).scalar() or -1
+    users = side_loaded_users()
+    return with_users({'data': write(_move_task, task.id, new_stage_id, data.get('position'), users)}, users)
+
+
+def _move_task(session, task_id, stage_id, position, users=None):
+    task = session.get(Task, task_id)
+    if position is None:
+        # Append after the last task in the new stage
+        max_pos = session.query(db.func.max(Task.position)).filter_by(stage_id=stage_id).scalar()
+        position = (max_pos if max_pos is not None else -1) + 1
+    
+    if task.stage_id != stage_id:
+        task.stage_entered_at = datetime.utcnow()
+    task.stage_id = stage_id
+    task.position = position
+    session.flush()
+    return task.to_dict(users)
+
+
+@bp.route('/<int:board_id>/tasks/<int:task_id>/archive', methods=['POST'])
+@login_required
+@require_board_access()
+def archive_task(project_id, board_id, task_id):
+    """Move a task to the archive"""
+    task = Task.query.filter_by(id=task_id, board_id=board_id).first_or_404()
+    archive.archive_tasks([task.id], archived_by=g.current_user.id)
+    db.session.commit()
+    
+    archived = ArchivedTask.query.filter_by(task_id=task_id, board_id=board_id).order_by(
+        ArchivedTask.id.desc()).first()
+    users = side_loaded_users()
+    return with_users({'data': archived.to_dict(users)}, users)
+
+
+@bp.route('/<int:board_id>/tasks/archive', methods=['POST'])
+@login_required
+@require_board_access()
+def archive_stage_tasks(project_id, board_id):
+    """Archive every task in a stage, e.g. clear out Done"""
+    data = request.get_json(silent=True) or {}
+    
+    stage = Stage.query.filter_by(id=data.get('stage_id'), board_id=board_id).first()
+    if not stage:
+        return {'error': {'code': 'VALIDATION_ERROR', 'message': 'Invalid stage'}}, 400
     
-    task.stage_id = new_stage_id
-    task.position = data.get('position', max_pos + 1)
+    count = archive.archive_stage(board_id, stage.id, archived_by=g.current_user.id)
+    db.session.commit()
+    return {'data': {'archived': count}}
+
+
+@bp.route('/<int:board_id>/archive', methods=['GET'])
+@login_required
+@require_board_access()
+def list_archived_tasks(project_id, board_id):
+    """Search archived tasks of a board (optional: ?q=, ?limit=, ?offset=, ?normalize=1)"""
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    offset = request.args.get('offset', 0, type=int)
+    items, total = archive.search_archive([board_id], request.args.get('q'), limit=limit, offset=offset)
+    users = side_loaded_users()
+    return with_users({'data': [t.to_dict(users) for t in items], 'total': total}, users)
+
+
+@bp.route('/<int:board_id>/archive/<int:archive_id>/restore', methods=['POST'])
+@login_required
+@require_board_access()
+def restore_archived_task(project_id, board_id, archive_id):
+    """Move an archived task back onto the board"""
+    archived = ArchivedTask.query.filter_by(id=archive_id, board_id=board_id).first_or_404()
     
+    task = archive.restore_task(archived)
+    if task is None:
+        return {'error': {'code': 'VALIDATION_ERROR', 'message': 'Board has no stages'}}, 400
     db.session.commit()
-    return {'data': task.to_dict()}
+    users = side_loaded_users()
+    return with_users({'data': task.to_dict(users)}, users)
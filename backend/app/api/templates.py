@@ -1,25 +1,98 @@
 from flask import Blueprint, request, g
 from app import db
 from app.models.template import ProjectTemplate, BoardTemplate, ListTemplate
-from app.models.project import Project
 from app.models.board import Board
-from app.models.stage import Stage
-from app.models.task import Task
 from app.models.list import List
-from app.models.list_item import ListItem
 from app.utils.auth import login_required, require_project_access, require_board_access, require_list_access
+from app.services.jobs import enqueue, job_accepted, wants_async
+from app.services.snapshot import STREAM_BATCH_SIZE, iter_board_snapshots, iter_list_snapshots
+from app.services import template_apply
 
 bp = Blueprint('templates', __name__)
 
 
+def _visible_templates(model):
+    """Query templates the current user owns plus the shared system templates.
+
+    System templates the user has already copied on write are replaced by the copy.
+    """
+    user_id = g.current_user.id
+    query = model.query.filter(db.or_(model.owner_id == user_id, model.is_system.is_(True)))
+    if hasattr(model, 'source_template_id'):
+        copied = db.select(model.source_template_id).where(
+            model.owner_id == user_id, model.source_template_id.isnot(None)
+        )
+        query = query.filter(db.or_(model.owner_id == user_id, model.id.notin_(copied)))
+    return query
+
+
+def _get_visible_template(model, template_id):
+    """Get a template owned by the current user or a system template, or 404"""
+    return model.query.filter(
+        model.id == template_id,
+        db.or_(model.owner_id == g.current_user.id, model.is_system.is_(True))
+    ).first_or_404()
+
+
+def _writable_template(model, template):
+    """Return a template the current user may edit, copying system templates on write"""
+    if not template.is_system:
+        return template
+    
+    copy = model.query.filter_by(
+        owner_id=g.current_user.id, source_template_id=template.id
+    ).first()
+    if not copy:
+        copy = model(
+            owner_id=g.current_user.id,
+            source_template_id=template.id,
+            name=template.name,
+            description=template.description,
+            color_theme=template.color_theme,
+            template_data=template.template_data
+        )
+        db.session.add(copy)
+    return copy
+
+
+def _save_templates(templates, batch_rows=STREAM_BATCH_SIZE):
+    """Write templates in batches of about batch_rows payload rows; returns their IDs in order.
+
+    Each batch is flushed in one go and expunged, so memory stays bounded by the batch.
+    """
+    ids, batch, rows = [], [], 0
+    
+    def flush():
+        db.session.add_all(batch)
+        db.session.flush()
+        ids.extend(t.id for t in batch)
+        for t in batch:
+            db.session.expunge(t)
+        batch.clear()
+    
+    for template in templates:
+        batch.append(template)
+        rows += 1 + sum((template.summary or {}).values())
+        if rows >= batch_rows:
+            flush()
+            rows = 0
+    if batch:
+        flush()
+    return ids
+
+
+def _system_template_error():
+    return {'error': {'code': 'FORBIDDEN', 'message': 'System templates cannot be deleted'}}, 403
+
+
 # ============ Project Templates ============
 
 @bp.route('/projects', methods=['GET'])
 @login_required
 def list_project_templates():
     """List user's project templates"""
-    templates = ProjectTemplate.query.filter_by(owner_id=g.current_user.id).all()
-    return {'data': [t.to_dict() for t in templates]}
+    templates = _visible_templates(ProjectTemplate).all()
+    return {'data': [t.to_dict(include_data=False) for t in templates]}
 
 
 @bp.route('/projects/from-project/<int:project_id>', methods=['POST'])
@@ -30,47 +103,26 @@ def create_template_from_project(project_id):
     data = request.get_json() or {}
     project = g.project
     
-    # Collect board template IDs to create
-    board_template_ids = []
-    for board in project.boards:
-        # Create board template
-        stages_data = [{'name': s.name, 'position': s.position, 'color': s.color} for s in board.stages]
-        tasks_data = []
-        for task in board.tasks:
-            stage = Stage.query.get(task.stage_id)
-            tasks_data.append({
-                'title': task.title,
-                'description': task.description,
-                'color_theme': task.color_theme,
-                'stage_position': stage.position if stage else 0,
-                'custom_fields': task.custom_fields
-            })
-        
-        board_template = BoardTemplate(
+    # Snapshots are streamed and written in bounded batches
+    board_template_ids = _save_templates(
+        BoardTemplate(
             owner_id=g.current_user.id,
             name=board.title,
             description=board.description,
             color_theme=board.color_theme,
-            template_data={'stages': stages_data, 'tasks': tasks_data}
+            template_data=board_data
         )
-        db.session.add(board_template)
-        db.session.flush()
-        board_template_ids.append(board_template.id)
-    
-    # Collect list template IDs to create
-    list_template_ids = []
-    for list_obj in project.lists:
-        items_data = [{'content': i.content, 'position': i.position} for i in list_obj.items]
-        
-        list_template = ListTemplate(
+        for board, board_data in iter_board_snapshots(project_id=project.id)
+    )
+    list_template_ids = _save_templates(
+        ListTemplate(
             owner_id=g.current_user.id,
             name=list_obj.title,
             color_theme=list_obj.color_theme,
-            template_data={'items': items_data}
+            template_data=list_data
         )
-        db.session.add(list_template)
-        db.session.flush()
-        list_template_ids.append(list_template.id)
+        for list_obj, list_data in iter_list_snapshots(project_id=project.id)
+    )
     
     # Create project template
     template = ProjectTemplate(
@@ -94,9 +146,7 @@ def create_template_from_project(project_id):
 @login_required
 def get_project_template(template_id):
     """Get project template details"""
-    template = ProjectTemplate.query.filter_by(
-        id=template_id, owner_id=g.current_user.id
-    ).first_or_404()
+    template = _get_visible_template(ProjectTemplate, template_id)
     return {'data': template.to_dict()}
 
 
@@ -104,9 +154,9 @@ def get_project_template(template_id):
 @login_required
 def delete_project_template(template_id):
     """Delete project template"""
-    template = ProjectTemplate.query.filter_by(
-        id=template_id, owner_id=g.current_user.id
-    ).first_or_404()
+    template = _get_visible_template(ProjectTemplate, template_id)
+    if template.is_system:
+        return _system_template_error()
     
     # Also delete associated board and list templates
     template_data = template.template_data or {}
@@ -128,95 +178,21 @@ def delete_project_template(template_id):
 @login_required
 def apply_project_template(template_id):
     """Create a new project from template with actual boards/lists from nested templates"""
-    template = ProjectTemplate.query.filter_by(
-        id=template_id, owner_id=g.current_user.id
-    ).first_or_404()
+    template = _get_visible_template(ProjectTemplate, template_id)
     data = request.get_json() or {}
     
-    # Create project
-    project = Project(
-        owner_id=g.current_user.id,
-        name=data.get('name', template.name),
-        description=data.get('description', template.description),
-        color_theme=template.color_theme
-    )
-    db.session.add(project)
-    db.session.flush()
+    name = data.get('name', template.name)
+    description = data.get('description', template.description)
     
-    template_data = template.template_data or {}
-    
-    # Create boards from board templates
-    for bt_id in template_data.get('board_template_ids', []):
-        bt = BoardTemplate.query.get(bt_id)
-        if bt:
-            board = Board(
-                project_id=project.id,
-                title=bt.name,
-                description=bt.description,
-                color_theme=bt.color_theme
-            )
-            db.session.add(board)
-            db.session.flush()
-            
-            # Create stages
-            bt_data = bt.template_data or {}
-            stage_map = {}
-            for stage_data in bt_data.get('stages', []):
-                stage = Stage(
-                    board_id=board.id,
-                    name=stage_data.get('name', 'New Stage'),
-                    position=stage_data.get('position', 0),
-                    color=stage_data.get('color', '#6B7280')
-                )
-                db.session.add(stage)
-                db.session.flush()
-                stage_map[stage.position] = stage.id
-            
-            # If no stages, create defaults
-            if not stage_map:
-                board.create_default_stages()
-                db.session.flush()
-                for s in board.stages:
-                    stage_map[s.position] = s.id
-            
-            # Create tasks
-            for task_data in bt_data.get('tasks', []):
-                stage_pos = task_data.get('stage_position', 0)
-                stage_id = stage_map.get(stage_pos, list(stage_map.values())[0] if stage_map else None)
-                if stage_id:
-                    task = Task(
-                        board_id=board.id,
-                        stage_id=stage_id,
-                        title=task_data.get('title', 'New Task'),
-                        description=task_data.get('description'),
-                        color_theme=task_data.get('color_theme', 'blue'),
-                        custom_fields=task_data.get('custom_fields')
-                    )
-                    db.session.add(task)
-    
-    # Create lists from list templates
-    for lt_id in template_data.get('list_template_ids', []):
-        lt = ListTemplate.query.get(lt_id)
-        if lt:
-            list_obj = List(
-                project_id=project.id,
-                title=lt.name,
-                color_theme=lt.color_theme
-            )
-            db.session.add(list_obj)
-            db.session.flush()
-            
-            # Create items
-            lt_data = lt.template_data or {}
-            for item_data in lt_data.get('items', []):
-                item = ListItem(
-                    list_id=list_obj.id,
-                    content=item_data.get('content', ''),
-                    position=item_data.get('position', 0),
-                    is_checked=False
-                )
-                db.session.add(item)
+    if wants_async():
+        job = enqueue('apply_project_template', {
+            'template_id': template.id,
+            'name': name,
+            'description': description
+        }, owner_id=g.current_user.id)
+        return job_accepted(job)
     
+    project = template_apply.apply_project_template(template, g.current_user.id, name, description)
     db.session.commit()
     return {'data': project.to_dict(include_contents=True)}, 201
 
@@ -227,8 +203,8 @@ def apply_project_template(template_id):
 @login_required
 def list_board_templates():
     """List user's board templates"""
-    templates = BoardTemplate.query.filter_by(owner_id=g.current_user.id).all()
-    return {'data': [t.to_dict() for t in templates]}
+    templates = _visible_templates(BoardTemplate).all()
+    return {'data': [t.to_dict(include_data=False) for t in templates]}
 
 
 @bp.route('/boards', methods=['POST'])
@@ -263,34 +239,14 @@ def create_template_from_board(board_id):
     board = g.board
     
     # Build template data from board
-    stages_data = []
-    for stage in board.stages:
-        stages_data.append({
-            'name': stage.name,
-            'position': stage.position,
-            'color': stage.color
-        })
-    
-    tasks_data = []
-    for task in board.tasks:
-        stage = Stage.query.get(task.stage_id)
-        tasks_data.append({
-            'title': task.title,
-            'description': task.description,
-            'color_theme': task.color_theme,
-            'stage_position': stage.position if stage else 0,
-            'custom_fields': task.custom_fields
-        })
+    _, template_data = next(iter_board_snapshots(board_id=board.id))
     
     template = BoardTemplate(
         owner_id=g.current_user.id,
         name=data.get('name', f"Template from {board.title}"),
         description=data.get('description', board.description),
         color_theme=board.color_theme,
-        template_data={
-            'stages': stages_data,
-            'tasks': tasks_data
-        }
+        template_data=template_data
     )
     
     db.session.add(template)
@@ -303,9 +259,7 @@ def create_template_from_board(board_id):
 @login_required
 def get_board_template(template_id):
     """Get board template details"""
-    template = BoardTemplate.query.filter_by(
-        id=template_id, owner_id=g.current_user.id
-    ).first_or_404()
+    template = _get_visible_template(BoardTemplate, template_id)
     return {'data': template.to_dict()}
 
 
@@ -313,9 +267,7 @@ def get_board_template(template_id):
 @login_required
 def update_board_template(template_id):
     """Update board template"""
-    template = BoardTemplate.query.filter_by(
-        id=template_id, owner_id=g.current_user.id
-    ).first_or_404()
+    template = _writable_template(BoardTemplate, _get_visible_template(BoardTemplate, template_id))
     data = request.get_json() or {}
     
     if 'name' in data:
@@ -335,9 +287,9 @@ def update_board_template(template_id):
 @login_required
 def delete_board_template(template_id):
     """Delete board template"""
-    template = BoardTemplate.query.filter_by(
-        id=template_id, owner_id=g.current_user.id
-    ).first_or_404()
+    template = _get_visible_template(BoardTemplate, template_id)
+    if template.is_system:
+        return _system_template_error()
     db.session.delete(template)
     db.session.commit()
     return {'data': {'message': 'Template deleted'}}
@@ -348,9 +300,7 @@ def delete_board_template(template_id):
 @require_project_access()
 def apply_board_template(template_id, project_id):
     """Create a new board from template in a project"""
-    template = BoardTemplate.query.filter_by(
-        id=template_id, owner_id=g.current_user.id
-    ).first_or_404()
+    template = _get_visible_template(BoardTemplate, template_id)
     data = request.get_json() or {}
     
     # Create board in the project
@@ -363,45 +313,8 @@ def apply_board_template(template_id, project_id):
     db.session.add(board)
     db.session.flush()
     
-    # Create stages from template
-    template_data = template.template_data or {}
-    stages = template_data.get('stages', [])
-    stage_map = {}  # position -> stage_id
-    
-    if stages:
-        for stage_data in stages:
-            stage = Stage(
-                board_id=board.id,
-                name=stage_data.get('name', 'New Stage'),
-                position=stage_data.get('position', 0),
-                color=stage_data.get('color', '#6B7280')
-            )
-            db.session.add(stage)
-            db.session.flush()
-            stage_map[stage.position] = stage.id
-    else:
-        # Create default stages if none in template
-        board.create_default_stages()
-        db.session.flush()
-        for stage in board.stages:
-            stage_map[stage.position] = stage.id
-    
-    # Create tasks from template
-    tasks = template_data.get('tasks', [])
-    for task_data in tasks:
-        stage_pos = task_data.get('stage_position', 0)
-        stage_id = stage_map.get(stage_pos, list(stage_map.values())[0] if stage_map else None)
-        
-        if stage_id:
-            task = Task(
-                board_id=board.id,
-                stage_id=stage_id,
-                title=task_data.get('title', 'New Task'),
-                description=task_data.get('description'),
-                color_theme=task_data.get('color_theme', 'blue'),
-                custom_fields=task_data.get('custom_fields')
-            )
-            db.session.add(task)
+    # Create stages and tasks from template
+    template_apply.create_board_contents(board, template.template_data or {})
     
     db.session.commit()
     return {'data': board.to_dict(include_stages=True)}, 201
@@ -413,8 +326,8 @@ def apply_board_template(template_id, project_id):
 @login_required
 def list_list_templates():
     """List user's list templates"""
-    templates = ListTemplate.query.filter_by(owner_id=g.current_user.id).all()
-    return {'data': [t.to_dict() for t in templates]}
+    templates = _visible_templates(ListTemplate).all()
+    return {'data': [t.to_dict(include_data=False) for t in templates]}
 
 
 @bp.route('/lists', methods=['POST'])
@@ -448,19 +361,14 @@ def create_template_from_list(list_id):
     list_obj = g.list
     data = request.get_json() or {}
     
-    items_data = []
-    for item in list_obj.items:
-        items_data.append({
-            'content': item.content,
-            'position': item.position
-        })
+    _, template_data = next(iter_list_snapshots(list_id=list_obj.id))
     
     template = ListTemplate(
         owner_id=g.current_user.id,
         name=data.get('name', f"Template from {list_obj.title}"),
         description=data.get('description'),
         color_theme=list_obj.color_theme,
-        template_data={'items': items_data}
+        template_data=template_data
     )
     
     db.session.add(template)
@@ -473,9 +381,7 @@ def create_template_from_list(list_id):
 @login_required
 def get_list_template(template_id):
     """Get list template details"""
-    template = ListTemplate.query.filter_by(
-        id=template_id, owner_id=g.current_user.id
-    ).first_or_404()
+    template = _get_visible_template(ListTemplate, template_id)
     return {'data': template.to_dict()}
 
 
@@ -483,9 +389,7 @@ def get_list_template(template_id):
 @login_required
 def update_list_template(template_id):
     """Update list template"""
-    template = ListTemplate.query.filter_by(
-        id=template_id, owner_id=g.current_user.id
-    ).first_or_404()
+    template = _writable_template(ListTemplate, _get_visible_template(ListTemplate, template_id))
     data = request.get_json() or {}
     
     if 'name' in data:
@@ -505,9 +409,9 @@ def update_list_template(template_id):
 @login_required
 def delete_list_template(template_id):
     """Delete list template"""
-    template = ListTemplate.query.filter_by(
-        id=template_id, owner_id=g.current_user.id
-    ).first_or_404()
+    template = _get_visible_template(ListTemplate, template_id)
+    if template.is_system:
+        return _system_template_error()
     db.session.delete(template)
     db.session.commit()
     return {'data': {'message': 'Template deleted'}}
@@ -518,9 +422,7 @@ def delete_list_template(template_id):
 @require_project_access()
 def apply_list_template(template_id, project_id):
     """Create a new list from template in a project"""
-    template = ListTemplate.query.filter_by(
-        id=template_id, owner_id=g.current_user.id
-    ).first_or_404()
+    template = _get_visible_template(ListTemplate, template_id)
     data = request.get_json() or {}
     
     # Create list in the project
@@ -533,17 +435,7 @@ def apply_list_template(template_id, project_id):
     db.session.flush()
     
     # Create items from template
-    template_data = template.template_data or {}
-    items = template_data.get('items', [])
-    
-    for item_data in items:
-        item = ListItem(
-            list_id=list_obj.id,
-            content=item_data.get('content', ''),
-            position=item_data.get('position', 0),
-            is_checked=False
-        )
-        db.session.add(item)
+    template_apply.create_list_contents(list_obj, template.template_data or {})
     
     db.session.commit()
     return {'data': list_obj.to_dict(include_items=True)}, 201
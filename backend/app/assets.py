@@ -0,0 +1,161 @@
+"""Fingerprinted, precompressed frontend assets.
+
+`flask build-assets` copies frontend/ into the static folder, writes every
+asset a second time under a content-hashed name (js/app.3f9c2a1b7e.js), stores
+.br/.gz variants next to it and records the mapping in manifest.json. In
+index.html the stylesheet and entry script are pointed at the hashed names, and
+an import map redirects the modules' relative imports to theirs. The modules
+import each other in a cycle (app.js -> router.js -> views -> app.js), so their
+specifiers cannot be rewritten in place without changing every hash.
+
+When the static folder has a manifest, hashed files are served as immutable
+for a year, in the best precompressed variant the client accepts. index.html
+and unhashed files are always revalidated (no-cache). Without a manifest
+(development against ../frontend) files are served as they are.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from flask import current_app, request, send_from_directory
+from app.compression import COMPRESSIBLE_MIMETYPES, negotiate
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+MANIFEST = 'manifest.json'
+INDEX = 'index.html'
+HASH_LENGTH = 10
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Content-Encoding token -> file suffix, most preferred first
+PRECOMPRESSED = {'br': '.br', 'gzip': '.gz'}
+
+REFERENCE = re.compile(r'(\b(?:href|src)=")(?:\./)?([^"#?:]+)(")')
+
+
+def _hashed_name(path, data):
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+
+
+def _write(output, path, data):
+    target = os.path.join(output, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(data)
+
+
+def _precompress(output, path, data):
+    """Write .br/.gz variants of a compressible file; returns their sizes"""
+    if mimetypes.guess_type(path)[0] not in COMPRESSIBLE_MIMETYPES:
+        return {}
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+
+    sizes = {}
+    for encoding, encoded in variants.items():
+        if len(encoded) < len(data):
+            _write(output, path + PRECOMPRESSED[encoding], encoded)
+            sizes[encoding] = len(encoded)
+    return sizes
+
+
+def _rewrite_index(html, manifest):
+    """Point index.html at hashed assets and map module imports to them"""
+    html = REFERENCE.sub(
+        lambda m: m.group(1) + manifest.get(m.group(2), m.group(2)) + m.group(3), html
+    )
+    modules = {f'/{path}': f'/{hashed}' for path, hashed in sorted(manifest.items()) if path.endswith('.js')}
+    if not modules:
+        return html
+    head = ['<script type="importmap">' + json.dumps({'imports': modules}) + '</script>']
+    head += [f'<link rel="modulepreload" href="{url}">' for url in modules.values()]
+    return html.replace('</head>', '    ' + '\n    '.join(head) + '\n</head>', 1)
+
+
+def build_assets(source, output):
+    """Build the static folder from a frontend source tree; returns per-file stats"""
+    if os.path.isdir(output) and os.listdir(output):
+        if not os.path.exists(os.path.join(output, MANIFEST)):
+            raise ValueError(f'{output} is not empty and was not created by build-assets')
+        shutil.rmtree(output)
+    os.makedirs(output)
+
+    manifest, stats = {}, []
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.relpath(os.path.join(root, name), source).replace(os.sep, '/')
+            if path == INDEX:
+                continue
+            with open(os.path.join(root, name), 'rb') as f:
+                data = f.read()
+            hashed = _hashed_name(path, data)
+            _write(output, path, data)
+            _write(output, hashed, data)
+            manifest[path] = hashed
+            stats.append({'path': hashed, 'bytes': len(data), **_precompress(output, hashed, data)})
+
+    with open(os.path.join(source, INDEX), encoding='utf-8') as f:
+        index = _rewrite_index(f.read(), manifest).encode()
+    _write(output, INDEX, index)
+    stats.append({'path': INDEX, 'bytes': len(index), **_precompress(output, INDEX, index)})
+
+    with open(os.path.join(output, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return stats
+
+
+def load_manifest(static_folder):
+    """Map of servable path -> {encoding: variant path} for a built static folder, or None"""
+    try:
+        with open(os.path.join(static_folder, MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    files = {}
+    for path in [INDEX, *manifest.values()]:
+        files[path] = {
+            encoding: path + suffix for encoding, suffix in PRECOMPRESSED.items()
+            if os.path.exists(os.path.join(static_folder, path + suffix))
+        }
+    return {'files': files, 'immutable': set(manifest.values())}
+
+
+def send_asset(filename):
+    """Send a static file, choosing a precompressed variant and cache policy"""
+    assets = current_app.extensions['assets']
+    variants = assets['files'].get(filename, {}) if assets else {}
+    encoding = negotiate(request.accept_encodings, list(variants))
+
+    response = send_from_directory(
+        current_app.static_folder,
+        variants[encoding] if encoding else filename,
+        mimetype=mimetypes.guess_type(filename)[0]
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if variants:
+        response.vary.add('Accept-Encoding')
+
+    if assets and filename in assets['immutable']:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def init_assets(app):
+    app.extensions['assets'] = load_manifest(app.static_folder)
+    app.view_functions['static'] = send_asset
+    app.add_url_rule('/', 'serve_frontend', lambda: send_asset(INDEX))
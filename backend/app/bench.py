@@ -0,0 +1,307 @@
+"""`flask bench`: synthetic datasets and in-process load runs for regression baselines.
+
+    flask bench generate --users 200 --projects 60 --tasks 50000 --list-items 20000
+    flask bench run --concurrency 1,4,16 --requests 400 > baseline.jsonl
+    flask bench clear
+
+`generate` bulk-inserts bench-owned users, projects shared among them, boards
+with many stages and custom fields, tasks and list items into the configured
+database. Tasks and items are spread over boards and lists with a Zipf-like
+skew so a few boards are much larger than the rest, as in real use. `run`
+drives the real endpoints through the test client from N threads against the
+largest bench project and prints one JSON line per endpoint and concurrency
+level with p50/p95/p99 latency, throughput and SQL statements per request.
+"""
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, func, insert, select
+from app import db
+from app.models import User, Project, ProjectShare, Board, Stage, Task, List, ListItem, CustomFieldDefinition
+
+BENCH_PREFIX = 'bench-'
+
+WORDS = (
+    'plan', 'review', 'ship', 'fix', 'design', 'deploy', 'test', 'call', 'write', 'update', 'migrate',
+    'draft', 'budget', 'invoice', 'hire', 'onboard', 'audit', 'refactor', 'document', 'measure'
+)
+PRIORITIES = ('low', 'medium', 'high', 'urgent')
+COMPONENTS = ('api', 'web', 'mobile', 'infra', 'data', 'docs')
+
+bench = AppGroup('bench', help='Generate benchmark datasets and measure endpoint latency.')
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _spread(total, buckets, skew, rng):
+    """Split total items over buckets with Zipf-like skew (0 spreads evenly)"""
+    counts = [0] * buckets
+    weights = [1 / (i + 1) ** skew for i in range(buckets)]
+    for i in rng.choices(range(buckets), weights=weights, k=total):
+        counts[i] += 1
+    rng.shuffle(counts)
+    return counts
+
+
+def _insert(model, rows, batch_size):
+    """Bulk insert rows, returning their ids in order"""
+    ids = []
+    for start in range(0, len(rows), batch_size):
+        stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+        ids += db.session.scalars(stmt, rows[start:start + batch_size]).all()
+    return ids
+
+
+def _bench_users():
+    return select(User.id).where(User.google_id.startswith(BENCH_PREFIX))
+
+
+def generate_dataset(users=50, projects=20, boards=3, stages=8, tasks=20000, lists=2, list_items=5000,
+                     shares=2.0, skew=1.1, assign_ratio=0.6, custom_field_ratio=0.7, batch_size=5000, seed=1):
+    """Insert a synthetic dataset owned by bench users; returns row counts"""
+    rng = random.Random(seed)
+    today = date.today()
+
+    user_ids = _insert(User, [{
+        'google_id': f'{BENCH_PREFIX}{i}',
+        'email': f'{BENCH_PREFIX}{i}@example.com',
+        'name': f'Bench User {i}'
+    } for i in range(users)], batch_size)
+
+    # A few users own most projects
+    owners = [user_ids[i] for i, n in enumerate(_spread(projects, users, skew, rng)) for _ in range(n)]
+    project_ids = _insert(Project, [{
+        'owner_id': owner,
+        'name': f'{_text(rng, 2).title()} {i}',
+        'description': _text(rng, 12)
+    } for i, owner in enumerate(owners)], batch_size)
+
+    members = {}
+    share_rows = []
+    for project_id, owner in zip(project_ids, owners):
+        others = [u for u in user_ids if u != owner]
+        shared = rng.sample(others, min(len(others), int(rng.expovariate(1 / shares)) if shares else 0))
+        share_rows += [{'project_id': project_id, 'user_id': user_id} for user_id in shared]
+        members[project_id] = [owner, *shared]
+    _insert(ProjectShare, share_rows, batch_size)
+
+    board_projects = [p for p in project_ids for _ in range(boards)]
+    board_ids = _insert(Board, [{
+        'project_id': project_id,
+        'title': f'{_text(rng, 2).title()} board',
+        'description': _text(rng, 10)
+    } for project_id in board_projects], batch_size)
+    stage_ids = _insert(Stage, [{
+        'board_id': board_id,
+        'name': f'Stage {position + 1}',
+        'position': position
+    } for board_id in board_ids for position in range(stages)], batch_size)
+    _insert(CustomFieldDefinition, [{
+        'board_id': board_id,
+        'field_name': name,
+        'field_type': field_type,
+        'options': options,
+        'position': position
+    } for board_id in board_ids for position, (name, field_type, options) in enumerate((
+        ('priority', 'select', json.dumps(PRIORITIES)),
+        ('estimate', 'number', None),
+        ('component', 'select', json.dumps(COMPONENTS))
+    ))], batch_size)
+
+    task_rows = []
+    for b, count in enumerate(_spread(tasks, len(board_ids), skew, rng)):
+        board_stages = stage_ids[b * stages:(b + 1) * stages]
+        board_members = members[board_projects[b]]
+        for position in range(count):
+            has_fields = rng.random() < custom_field_ratio
+            task_rows.append({
+                'board_id': board_ids[b],
+                'stage_id': rng.choice(board_stages),
+                'title': _text(rng, rng.randint(2, 6)).capitalize(),
+                'description': _text(rng, rng.randint(0, 60)) or None,
+                'due_date': today + timedelta(days=rng.randint(-30, 90)) if rng.random() < 0.5 else None,
+                'custom_fields': {
+                    'priority': rng.choice(PRIORITIES),
+                    'estimate': rng.randint(1, 13),
+                    'component': rng.choice(COMPONENTS)
+                } if has_fields else {},
+                'position': position,
+                'assigned_to': rng.choice(board_members) if rng.random() < assign_ratio else None
+            })
+    _insert(Task, task_rows, batch_size)
+
+    list_projects = [p for p in project_ids for _ in range(lists)]
+    list_ids = _insert(List, [{
+        'project_id': project_id,
+        'title': f'{_text(rng, 1).title()} list'
+    } for project_id in list_projects], batch_size)
+    item_rows = []
+    for l, count in enumerate(_spread(list_items, len(list_ids), skew, rng)):
+        list_members = members[list_projects[l]]
+        item_rows += [{
+            'list_id': list_ids[l],
+            'content': _text(rng, rng.randint(1, 8)),
+            'is_checked': rng.random() < 0.3,
+            'position': position,
+            'assigned_to': rng.choice(list_members) if rng.random() < 0.2 else None
+        } for position in range(count)]
+    _insert(ListItem, item_rows, batch_size)
+
+    db.session.commit()
+    return {
+        'users': len(user_ids), 'projects': len(project_ids), 'shares': len(share_rows), 'boards': len(board_ids),
+        'stages': len(stage_ids), 'tasks': len(task_rows), 'lists': len(list_ids), 'list_items': len(item_rows)
+    }
+
+
+def clear_dataset():
+    """Delete every bench user and what they own; the database cascades to the rest"""
+    bench_users = _bench_users()
+    projects = db.session.execute(delete(Project).where(Project.owner_id.in_(bench_users))).rowcount
+    db.session.execute(delete(ProjectShare).where(ProjectShare.user_id.in_(bench_users)))
+    users = db.session.execute(delete(User).where(User.id.in_(bench_users))).rowcount
+    db.session.commit()
+    return {'users': users, 'projects': projects}
+
+
+def bench_targets():
+    """The largest bench project with its largest board and list, and the URLs to drive"""
+    task_count = func.count(Task.id).label('tasks')
+    board = db.session.execute(
+        select(Board.id, Board.project_id, Project.owner_id)
+        .join(Project, Project.id == Board.project_id)
+        .outerjoin(Task, Task.board_id == Board.id)
+        .where(Project.owner_id.in_(_bench_users()))
+        .group_by(Board.id, Board.project_id, Project.owner_id)
+        .order_by(task_count.desc())
+        .limit(1)
+    ).first()
+    if board is None:
+        raise click.ClickException('No benchmark data; run `flask bench generate` first')
+    list_id = db.session.scalar(
+        select(List.id).outerjoin(ListItem).where(List.project_id == board.project_id)
+        .group_by(List.id).order_by(func.count(ListItem.id).desc()).limit(1)
+    )
+    task_id = db.session.scalar(select(func.min(Task.id)).where(Task.board_id == board.id))
+
+    project_url = f'/api/v1/projects/{board.project_id}'
+    board_url = f'{project_url}/boards/{board.id}'
+    endpoints = {
+        'projects.list': ('GET', '/api/v1/projects', None),
+        'projects.get': ('GET', project_url, None),
+        'projects.members': ('GET', f'{project_url}/members', None),
+        'boards.get': ('GET', board_url, None),
+        'tasks.list': ('GET', f'{board_url}/tasks', None),
+        'tasks.create': ('POST', f'{board_url}/tasks', {'title': 'Bench task', 'custom_fields': {'priority': 'low'}}),
+        'tasks.update': ('PUT', f'{board_url}/tasks/{task_id}', {'title': 'Bench task (edited)'})
+    }
+    if list_id is not None:
+        endpoints['lists.items'] = ('GET', f'{project_url}/lists/{list_id}/items', None)
+    return board.owner_id, endpoints
+
+
+def _client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
+
+
+def measure(app, user_id, method, url, body, concurrency, requests, warmup=0):
+    """Send requests from concurrency threads; returns latency percentiles and throughput"""
+    results = []
+    lock = threading.Lock()
+
+    def worker(count):
+        client = _client(app, user_id)
+        for _ in range(warmup):
+            client.open(url, method=method, json=body)
+        samples = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = client.open(url, method=method, json=body)
+            samples.append((time.perf_counter() - started, response.status_code,
+                            response.headers.get('X-Query-Count')))
+        with lock:
+            results.extend(samples)
+
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, shares))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency * 1000 for latency, _, _ in results)
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    queries = [int(q) for _, _, q in results if q is not None]
+    return {
+        'requests': len(results),
+        'errors': sum(status >= 400 for _, status, _ in results),
+        'p50_ms': round(cuts[49], 2),
+        'p95_ms': round(cuts[94], 2),
+        'p99_ms': round(cuts[98], 2),
+        'max_ms': round(latencies[-1], 2),
+        'throughput_rps': round(len(results) / elapsed, 1),
+        'queries_per_request': round(statistics.mean(queries), 1) if queries else None
+    }
+
+
+@bench.command('generate')
+@click.option('--users', default=50, show_default=True)
+@click.option('--projects', default=20, show_default=True)
+@click.option('--boards', default=3, show_default=True, help='Boards per project')
+@click.option('--stages', default=8, show_default=True, help='Stages per board')
+@click.option('--tasks', default=20000, show_default=True, help='Tasks in total')
+@click.option('--lists', default=2, show_default=True, help='Lists per project')
+@click.option('--list-items', default=5000, show_default=True, help='List items in total')
+@click.option('--shares', default=2.0, show_default=True, help='Mean users each project is shared with')
+@click.option('--skew', default=1.1, show_default=True, help='Zipf exponent for projects per owner and rows per board/list')
+@click.option('--assign-ratio', default=0.6, show_default=True, help='Share of tasks with an assignee')
+@click.option('--custom-field-ratio', default=0.7, show_default=True, help='Share of tasks with custom field values')
+@click.option('--seed', default=1, show_default=True)
+def generate_command(**options):
+    """Insert a synthetic dataset owned by bench-* users."""
+    if db.session.scalar(select(func.count()).select_from(_bench_users().subquery())):
+        raise click.ClickException('Benchmark data already exists; run `flask bench clear` first')
+    started = time.perf_counter()
+    counts = generate_dataset(**options)
+    click.echo(json.dumps({**counts, 'seconds': round(time.perf_counter() - started, 2)}))
+
+
+@bench.command('run')
+@click.option('--concurrency', default='1,4,16', show_default=True, help='Comma-separated thread counts')
+@click.option('--requests', default=200, show_default=True, help='Requests per endpoint and concurrency level')
+@click.option('--warmup', default=5, show_default=True, help='Unmeasured requests per thread')
+@click.option('--endpoint', 'selected', multiple=True, help='Only these endpoints (e.g. tasks.list); repeatable')
+def run_command(concurrency, requests, warmup, selected):
+    """Measure endpoint latency and throughput against the bench dataset."""
+    app = current_app._get_current_object()
+    user_id, endpoints = bench_targets()
+    unknown = set(selected) - set(endpoints)
+    if unknown:
+        raise click.ClickException(f'Unknown endpoints {sorted(unknown)}; choose from {sorted(endpoints)}')
+    db.session.remove()
+
+    # Measure the endpoints, not admission control; count queries through the profiling headers
+    app.config.update({'RATE_LIMIT_ENABLED': False, 'PROFILING_HEADERS': True})
+    for level in (int(c) for c in concurrency.split(',')):
+        for name, (method, url, body) in endpoints.items():
+            if selected and name not in selected:
+                continue
+            stats = measure(app, user_id, method, url, body, level, requests, warmup)
+            click.echo(json.dumps({'endpoint': name, 'method': method, 'concurrency': level, **stats}))
+
+
+@bench.command('clear')
+def clear_command():
+    """Delete the bench-* users and everything they own."""
+    click.echo(json.dumps(clear_dataset()))
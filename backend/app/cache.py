@@ -0,0 +1,384 @@
+"""Response cache for serialized project, board, list and member payloads.
+
+GET endpoints decorated with @cached_response store their JSON body under a
+key made of the endpoint, its URL arguments, the query string, today's date
+(task colours depend on it) and the revision of the project the resource
+belongs to. Every commit that changes a project's boards, stages, tasks, lists,
+items or shares bumps that project's revision, so its cached payloads are
+never served again; entries of other projects are untouched.
+
+Changed projects are collected from the session: objects in each flush, and
+bulk INSERT / UPDATE / DELETE statements by the project, board or list they
+name in their values or WHERE clause. A bulk statement whose scope cannot be
+read from it (INSERT ... SELECT, for one) bumps the global generation instead,
+invalidating every project. Revisions are bumped after the commit and read
+before the request touches the database, so a payload built from data older
+than a write is only ever stored under a revision that write has retired.
+Writes made outside the application are not seen; clear the cache after them.
+
+RESPONSE_CACHE_STORAGE=memory keeps an LRU per process and is only correct
+with a single process. The default sqlite store keeps entries and revisions in
+one file on local disk (RESPONSE_CACHE_SQLITE_PATH) shared by all workers on a
+host; with several hosts behind a balancer disable the cache. Hits and misses
+are exported per endpoint at /metrics.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from itertools import chain
+from flask import Response, current_app, g, has_app_context, request
+from prometheus_client import Counter
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+from app.models.board import Board
+from app.models.list import List
+from app.models.list_item import ListItem
+from app.models.project import Project, ProjectShare
+from app.models.stage import Stage
+from app.models.task import Task
+from app.models.user import User
+from app.routing import _pin_writer
+
+CACHE_REQUESTS = Counter(
+    'taskboard_response_cache_requests', 'Cached endpoint lookups by result (hit or miss)', ['endpoint', 'result']
+)
+CACHE_INVALIDATIONS = Counter(
+    'taskboard_response_cache_invalidations', 'Revision bumps by scope (project or all)', ['scope']
+)
+
+GLOBAL = '*'
+
+# Entry revisions are '<generation>.<project revision>'; the generation lives in the
+# namespace's '*' scope ('<namespace>:*')
+PRUNE_STALE_SQL = '''
+DELETE FROM entries WHERE revision !=
+    coalesce((SELECT revision FROM revisions
+              WHERE revisions.scope = substr(entries.scope, 1, instr(entries.scope, ':')) || '*'), 0)
+    || '.' || coalesce((SELECT revision FROM revisions WHERE revisions.scope = entries.scope), 0)
+'''
+
+# Per table: column -> what its value identifies. Bulk statements are scoped by these.
+_SCOPE_COLUMNS = {
+    'projects': {'id': 'project'},
+    'project_shares': {'project_id': 'project'},
+    'boards': {'project_id': 'project', 'id': 'board'},
+    'lists': {'project_id': 'project', 'id': 'list'},
+    'stages': {'board_id': 'board', 'id': 'stage'},
+    'tasks': {'board_id': 'board', 'id': 'task'},
+    'list_items': {'list_id': 'list', 'id': 'list_item'}
+}
+
+# Kind -> query mapping ids of that kind to project ids
+_PROJECT_OF = {
+    'board': lambda ids: select(Board.project_id).where(Board.id.in_(ids)),
+    'list': lambda ids: select(List.project_id).where(List.id.in_(ids)),
+    'stage': lambda ids: select(Board.project_id).join(Stage, Stage.board_id == Board.id).where(Stage.id.in_(ids)),
+    'task': lambda ids: select(Board.project_id).join(Task, Task.board_id == Board.id).where(Task.id.in_(ids)),
+    'list_item': lambda ids: select(List.project_id).join(ListItem, ListItem.list_id == List.id)
+    .where(ListItem.id.in_(ids))
+}
+
+# User columns that appear in cached payloads (assignees)
+_USER_FIELDS = ('email', 'name', 'avatar_url')
+
+
+class MemoryCache:
+    """LRU for a single process"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.revisions = {}
+        self.lock = threading.Lock()
+
+    def revision(self, scope, global_scope):
+        with self.lock:
+            return f'{self.revisions.get(global_scope, 0)}.{self.revisions.get(scope, 0)}'
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, scope, revision, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def bump(self, scopes):
+        with self.lock:
+            for scope in scopes:
+                self.revisions[scope] = self.revisions.get(scope, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class SQLiteCache:
+    """Entries and revisions shared by every process on the host through one SQLite file"""
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Entries can be rebuilt; revisions are bumped again by the next write
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('CREATE TABLE IF NOT EXISTS revisions (scope TEXT PRIMARY KEY, revision INTEGER NOT NULL)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries '
+                '(key TEXT PRIMARY KEY, scope TEXT NOT NULL, revision TEXT NOT NULL, value BLOB NOT NULL, '
+                'stored REAL NOT NULL)'
+            )
+            self.local.conn, self.local.pid = conn, os.getpid()
+        return conn
+
+    def revision(self, scope, global_scope):
+        rows = dict(self._connection().execute(
+            'SELECT scope, revision FROM revisions WHERE scope IN (?, ?)', (global_scope, scope)
+        ).fetchall())
+        return f'{rows.get(global_scope, 0)}.{rows.get(scope, 0)}'
+
+    def get(self, key):
+        row = self._connection().execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, scope, revision, value):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO entries (key, scope, revision, value, stored) VALUES (?, ?, ?, ?, ?)',
+            (key, scope, revision, value, time.time())
+        )
+
+    def bump(self, scopes):
+        self._connection().executemany(
+            'INSERT INTO revisions (scope, revision) VALUES (?, 1) '
+            'ON CONFLICT (scope) DO UPDATE SET revision = revision + 1',
+            [(scope,) for scope in scopes]
+        )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM entries')
+
+    def prune(self):
+        """Drop entries of retired revisions, then the oldest beyond max_entries"""
+        conn = self._connection()
+        stale = conn.execute(PRUNE_STALE_SQL).rowcount
+        trimmed = conn.execute(
+            'DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY stored DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        ).rowcount
+        return {'stale': stale, 'trimmed': trimmed}
+
+
+def _namespace(config):
+    """Entries and revisions of different databases never mix in a shared file"""
+    return hashlib.sha1(config['SQLALCHEMY_DATABASE_URI'].encode()).hexdigest()[:8]
+
+
+def _scope(project_id):
+    return f'{current_app.extensions["response_cache_namespace"]}:{project_id}'
+
+
+def _cache():
+    if not has_app_context() or not current_app.config['RESPONSE_CACHE_ENABLED']:
+        return None
+    return current_app.extensions.get('response_cache')
+
+
+def cached_response(f):
+    """Serve a project-scoped GET endpoint from the response cache.
+
+    Apply below the access decorators so every hit is still authorized.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        cache = _cache()
+        revision = g.pop('response_cache_revision', None)
+        if cache is None or revision is None:
+            return f(*args, **kwargs)
+
+        scope = _scope(kwargs['project_id'])
+        query = '&'.join(sorted(f'{k}={v}' for k, v in request.args.items(multi=True)))
+        key = f'{request.endpoint}|{scope}|{sorted(kwargs.items())}|{query}|{date.today()}@{revision}'
+        body = cache.get(key)
+        CACHE_REQUESTS.labels(request.endpoint, 'hit' if body is not None else 'miss').inc()
+        if body is not None:
+            response = Response(body, mimetype='application/json')
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        if current_app.config.get('SQLALCHEMY_READ_URI'):
+            # A lagging replica could fill the new revision with old data
+            _pin_writer()
+        response = current_app.make_response(f(*args, **kwargs))
+        if response.status_code == 200 and not response.is_streamed:
+            cache.set(key, scope, revision, response.get_data())
+        response.headers['X-Cache'] = 'MISS'
+        return response
+
+    decorated_function.response_cache = True
+    return decorated_function
+
+
+def _read_revision():
+    """Read the project revision before the request's first query"""
+    if request.method != 'GET' or _cache() is None:
+        return
+    view = current_app.view_functions.get(request.endpoint)
+    project_id = (request.view_args or {}).get('project_id')
+    if getattr(view, 'response_cache', False) and project_id is not None:
+        g.response_cache_revision = _cache().revision(_scope(project_id), _scope(GLOBAL))
+
+
+def _changes(session):
+    return session.info.setdefault('response_cache_changes', {'all': False, 'project': set()})
+
+
+def _resolve(session, refs):
+    """Add the projects of referenced boards, lists, stages, tasks and items to the changes"""
+    changes = _changes(session)
+    changes['project'].update(refs.pop('project', ()))
+    for kind in ('board', 'list'):
+        # Parents loaded by the access checks are usually in the identity map already
+        model = Board if kind == 'board' else List
+        for obj_id in list(refs.get(kind, ())):
+            obj = session.identity_map.get(session.identity_key(model, obj_id))
+            if obj is not None and 'project_id' in obj.__dict__:
+                changes['project'].add(obj.project_id)
+                refs[kind].discard(obj_id)
+    with session.no_autoflush:
+        for kind, ids in refs.items():
+            if ids:
+                changes['project'].update(session.execute(_PROJECT_OF[kind](list(ids))).scalars())
+
+
+def _collect_flush(session, flush_context):
+    if _cache() is None:
+        return
+    refs = {}
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Project):
+            refs.setdefault('project', set()).add(obj.id)
+        elif isinstance(obj, (Board, List, ProjectShare)):
+            refs.setdefault('project', set()).add(obj.project_id)
+        elif isinstance(obj, (Stage, Task)):
+            refs.setdefault('board', set()).add(obj.board_id)
+        elif isinstance(obj, ListItem):
+            refs.setdefault('list', set()).add(obj.list_id)
+        elif isinstance(obj, User) and obj not in session.new:
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in _USER_FIELDS):
+                _changes(session)['all'] = True
+    _resolve(session, refs)
+
+
+def _statement_refs(statement, parameters):
+    """{kind: ids} named by a bulk statement, or None when its scope cannot be read"""
+    columns = _SCOPE_COLUMNS[statement.table.name]
+    refs = {}
+
+    def add(column, value):
+        kind = columns.get(column)
+        if kind is None or value is None:
+            return
+        refs.setdefault(kind, set()).update(value if isinstance(value, (list, tuple, set)) else (value,))
+
+    if statement.is_insert:
+        if statement.select is not None:
+            return None
+        rows = parameters if isinstance(parameters, list) else [parameters or statement.compile().params]
+        for row in rows:
+            for column in columns:
+                if column != 'id':
+                    add(column, row.get(column))
+    elif statement.whereclause is not None:
+        for node in visitors.iterate(statement.whereclause):
+            if (isinstance(node, BinaryExpression) and node.operator in (operators.eq, operators.in_op)
+                    and isinstance(node.right, BindParameter)
+                    and getattr(getattr(node.left, 'table', None), 'name', None) == statement.table.name):
+                add(node.left.name, node.right.effective_value)
+    return refs or None
+
+
+def _collect_statement(state):
+    if not (state.is_insert or state.is_update or state.is_delete) or _cache() is None:
+        return
+    table = getattr(state.statement.table, 'name', None)
+    if table not in _SCOPE_COLUMNS:
+        return
+    refs = _statement_refs(state.statement, state.parameters)
+    if refs is None:
+        _changes(state.session)['all'] = True
+    else:
+        _resolve(state.session, refs)
+
+
+def _apply_changes(session):
+    # Releasing a SAVEPOINT also fires after_commit; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    changes = session.info.pop('response_cache_changes', None)
+    cache = _cache()
+    if not changes or cache is None:
+        return
+    if changes['all']:
+        cache.bump([_scope(GLOBAL)])
+        CACHE_INVALIDATIONS.labels('all').inc()
+    elif changes['project']:
+        cache.bump([_scope(project_id) for project_id in changes['project']])
+        CACHE_INVALIDATIONS.labels('project').inc(len(changes['project']))
+
+
+event.listen(Session, 'after_flush', _collect_flush)
+event.listen(Session, 'do_orm_execute', _collect_statement)
+# Changes collected before a rollback are kept: at worst the next commit bumps once too often
+event.listen(Session, 'after_commit', _apply_changes)
+
+
+def clear_cache(app):
+    """Retire every cached payload, e.g. after changing the database by hand"""
+    cache = app.extensions['response_cache']
+    with app.app_context():
+        cache.bump([_scope(GLOBAL)])
+    cache.clear()
+
+
+def prune_cache(app):
+    cache = app.extensions['response_cache']
+    if not isinstance(cache, SQLiteCache):
+        return {'stale': 0, 'trimmed': 0}
+    return cache.prune()
+
+
+def init_response_cache(app, scheduler):
+    storage = app.config['RESPONSE_CACHE_STORAGE']
+    max_entries = app.config['RESPONSE_CACHE_MAX_ENTRIES']
+    if storage == 'memory':
+        app.extensions['response_cache'] = MemoryCache(max_entries)
+    elif storage == 'sqlite':
+        app.extensions['response_cache'] = SQLiteCache(app.config['RESPONSE_CACHE_SQLITE_PATH'], max_entries)
+    else:
+        raise ValueError(f"RESPONSE_CACHE_STORAGE must be 'sqlite' or 'memory', got {storage!r}")
+    app.extensions['response_cache_namespace'] = _namespace(app.config)
+    app.before_request(_read_revision)
+
+    if app.config['RESPONSE_CACHE_ENABLED'] and storage == 'sqlite':
+        scheduler.add_task('prune_response_cache', 600, lambda: prune_cache(app))
@@ -0,0 +1,134 @@
+"""Content-negotiated response compression (zstd, brotli, gzip).
+
+Compressible responses (JSON, NDJSON, HTML, CSS, JS, text) are encoded with the
+best algorithm the client accepts, in COMPRESS_ALGORITHMS order of preference
+when qualities tie. Buffered bodies smaller than COMPRESS_MIN_SIZE are sent
+as is; streamed responses are compressed chunk by chunk as they are produced.
+Responses that already carry a Content-Encoding, file responses and
+Cache-Control: no-transform responses are left alone.
+
+brotli and zstandard are optional; without them only gzip is offered.
+"""
+import zlib
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript', 'text/javascript',
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'image/svg+xml'
+}
+
+
+def _gzip(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 writes a gzip header
+    return compressor.compress, compressor.flush
+
+
+def _brotli(level):
+    compressor = brotli.Compressor(quality=level)
+    return compressor.process, compressor.finish
+
+
+def _zstd(level):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return compressor.compress, compressor.flush
+
+
+# Content-Encoding token -> (compressor factory, config key of its level)
+ENCODERS = {'gzip': (_gzip, 'COMPRESS_LEVEL')}
+if brotli is not None:
+    ENCODERS['br'] = (_brotli, 'COMPRESS_BROTLI_LEVEL')
+if zstandard is not None:
+    ENCODERS['zstd'] = (_zstd, 'COMPRESS_ZSTD_LEVEL')
+
+
+def available_encodings(config):
+    """Configured encodings that are installed, most preferred first"""
+    names = [name.strip() for name in config['COMPRESS_ALGORITHMS'].split(',')]
+    return [name for name in names if name in ENCODERS]
+
+
+def negotiate(accept_encodings, encodings):
+    """Pick the encoding with the highest client quality; ties go to the server's order"""
+    best, best_quality = None, 0
+    for name in encodings:
+        quality = accept_encodings.quality(name)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compressor(encoding, config):
+    """(compress, flush) functions of a new compressor for encoding"""
+    factory, level_key = ENCODERS[encoding]
+    return factory(config[level_key])
+
+
+def compress(data, encoding, config):
+    """Compress a whole body in one go"""
+    feed, flush = compressor(encoding, config)
+    return feed(data) + flush()
+
+
+def _compress_stream(chunks, feed, flush):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = feed(chunk)
+            if data:
+                yield data
+        yield flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def compress_response(response):
+    config = current_app.config
+    if not config['COMPRESS_ENABLED'] or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+
+    if (
+        response.status_code < 200 or response.status_code in (204, 206, 304)
+        or request.method == 'HEAD'
+        or 'Content-Encoding' in response.headers
+        or response.direct_passthrough
+        or response.cache_control.no_transform
+    ):
+        return response
+
+    encoding = negotiate(request.accept_encodings, available_encodings(config))
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        feed, flush = compressor(encoding, config)
+        response.response = _compress_stream(response.response, feed, flush)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(compress(data, encoding, config))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The encoded body is no longer byte-identical to the identity representation
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
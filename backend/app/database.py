@@ -0,0 +1,47 @@
+"""Database URL and engine configuration shared by SQLite and PostgreSQL deployments."""
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import make_url
+from sqlalchemy.types import JSON
+
+# JSON column type stored as JSONB on PostgreSQL (indexable with GIN) and as text on SQLite
+JSONDocument = JSON().with_variant(JSONB(), 'postgresql')
+
+POSTGRES_DRIVER = 'postgresql+psycopg'
+
+
+def normalize_database_url(url):
+    """Pin PostgreSQL URLs (including Heroku/Azure style postgres://) to the psycopg driver"""
+    for prefix in ('postgres://', 'postgresql://'):
+        if url.startswith(prefix):
+            return POSTGRES_DRIVER + '://' + url[len(prefix):]
+    return url
+
+
+def is_postgres(url):
+    return make_url(url).get_backend_name() == 'postgresql'
+
+
+def postgres_connect_options(config, read_only=False):
+    """Server settings passed to every new PostgreSQL connection"""
+    options = [f"-c statement_timeout={int(config['DB_STATEMENT_TIMEOUT'])}"]
+    if read_only:
+        options.append('-c default_transaction_read_only=on')
+    return {'options': ' '.join(options)}
+
+
+def configure_engine_options(app):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS with the pool settings for the configured backend.
+
+    Options already present in the config take precedence.
+    """
+    config = app.config
+    config['SQLALCHEMY_DATABASE_URI'] = normalize_database_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if is_postgres(config['SQLALCHEMY_DATABASE_URI']):
+        options.setdefault('pool_size', config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+        options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+        options.setdefault('pool_pre_ping', config['DB_POOL_PRE_PING'])
+        options.setdefault('connect_args', postgres_connect_options(config))
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
@@ -3,10 +3,12 @@ from app.models.project import Project, ProjectShare
 from app.models.board import Board
 from app.models.stage import Stage
 from app.models.task import Task
+from app.models.archived_task import ArchivedTask
 from app.models.custom_field import CustomFieldDefinition
 from app.models.list import List
 from app.models.list_item import ListItem
-from app.models.template import ProjectTemplate, BoardTemplate, ListTemplate
+from app.models.template import ProjectTemplate, BoardTemplate, ListTemplate, TemplateBlob
+from app.models.job import Job
 
 __all__ = [
     'User',
@@ -15,10 +17,13 @@ __all__ = [
     'Board',
     'Stage',
     'Task',
+    'ArchivedTask',
     'CustomFieldDefinition',
     'List',
     'ListItem',
     'ProjectTemplate',
     'BoardTemplate',
-    'ListTemplate'
+    'ListTemplate',
+    'TemplateBlob',
+    'Job'
 ]
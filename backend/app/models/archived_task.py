@@ -0,0 +1,59 @@
+from datetime import datetime
+from app import db
+from app.database import JSONDocument
+from app.models.user import side_load
+
+
+class ArchivedTask(db.Model):
+    """Task moved out of the hot tasks table; see app.services.archive"""
+    __tablename__ = 'archived_tasks'
+    __table_args__ = (
+        db.Index('ix_archived_tasks_board_archived', 'board_id', 'archived_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)  # id the task had in tasks
+    board_id = db.Column(db.Integer, db.ForeignKey('boards.id', ondelete='CASCADE'), nullable=False)
+    # No foreign key: the stage may be deleted while the task sits in the archive
+    stage_id = db.Column(db.Integer)
+    stage_name = db.Column(db.String(100))
+    title = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text)
+    due_date = db.Column(db.Date)
+    color_theme = db.Column(db.String(50))
+    custom_fields = db.Column(JSONDocument, default=dict)
+    position = db.Column(db.Integer, default=0)
+    assigned_to = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    stage_entered_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    archived_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # None when archived automatically
+
+    assignee = db.relationship('User', foreign_keys=[assigned_to], lazy='joined')
+
+    def to_dict(self, users=None):
+        data = {
+            'id': self.task_id,
+            'archive_id': self.id,
+            'board_id': self.board_id,
+            'stage_id': self.stage_id,
+            'stage_name': self.stage_name,
+            'title': self.title,
+            'description': self.description,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'color_theme': self.color_theme,
+            'custom_fields': dict(self.custom_fields or {}),
+            'position': self.position,
+            'assigned_to': self.assigned_to,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'archived': True,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None,
+            'archived_by': self.archived_by
+        }
+        if users is None:
+            data['assignee'] = self.assignee.to_dict() if self.assignee else None
+        else:
+            side_load(users, self.assignee)
+        return data
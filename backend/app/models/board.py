@@ -1,35 +1,43 @@
 from datetime import datetime
 from app import db
+from app.models.fields import column, serialize, timestamp
 
 
 class Board(db.Model):
     __tablename__ = 'boards'
     
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     color_theme = db.Column(db.String(50), default='blue')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Set when the board is deleted; its rows are purged in the background
+    deleted_at = db.Column(db.DateTime)
     
     stages = db.relationship('Stage', backref='board', lazy='dynamic',
-                            cascade='all, delete-orphan', order_by='Stage.position')
+                            cascade='all, delete-orphan', passive_deletes=True,
+                            order_by='Stage.position')
     tasks = db.relationship('Task', backref='board', lazy='dynamic',
-                           cascade='all, delete-orphan')
+                           cascade='all, delete-orphan', passive_deletes=True)
+    archived_tasks = db.relationship('ArchivedTask', backref='board', lazy='dynamic',
+                                    cascade='all, delete-orphan', passive_deletes=True)
     custom_fields = db.relationship('CustomFieldDefinition', backref='board',
-                                   lazy='dynamic', cascade='all, delete-orphan')
+                                   lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
     
-    def to_dict(self, include_stages=False):
-        data = {
-            'id': self.id,
-            'project_id': self.project_id,
-            'title': self.title,
-            'description': self.description,
-            'color_theme': self.color_theme,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    FIELDS = {
+        'id': column('id'),
+        'project_id': column('project_id'),
+        'title': column('title'),
+        'description': column('description'),
+        'color_theme': column('color_theme'),
+        'created_at': timestamp('created_at'),
+        'updated_at': timestamp('updated_at')
+    }
+    
+    def to_dict(self, include_stages=False, fields=None):
+        data = serialize(self, self.FIELDS, fields)
         if include_stages:
             data['stages'] = [stage.to_dict() for stage in self.stages]
         return data
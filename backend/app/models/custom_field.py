@@ -7,7 +7,7 @@ class CustomFieldDefinition(db.Model):
     __tablename__ = 'custom_field_definitions'
     
     id = db.Column(db.Integer, primary_key=True)
-    board_id = db.Column(db.Integer, db.ForeignKey('boards.id'), nullable=False)
+    board_id = db.Column(db.Integer, db.ForeignKey('boards.id', ondelete='CASCADE'), nullable=False, index=True)
     field_name = db.Column(db.String(100), nullable=False)
     field_type = db.Column(db.String(50), nullable=False)  # text, number, date, select
     options = db.Column(db.Text)  # JSON for select options
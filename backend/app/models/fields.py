@@ -0,0 +1,38 @@
+"""Field maps for sparse serialization (?fields=).
+
+A model's FIELDS maps each output key of its to_dict() to the columns the
+value is built from and a getter. Serializing with a set of fields only calls
+the getters for those keys, so columns deferred with load_only() are never
+touched and never lazy loaded.
+"""
+
+
+def column(name):
+    return (name,), lambda obj: getattr(obj, name)
+
+
+def timestamp(name):
+    def get(obj):
+        value = getattr(obj, name)
+        return value.isoformat() if value else None
+    return (name,), get
+
+
+def computed(columns, get=None):
+    """A value built from several columns; without a getter, to_dict() fills it in itself"""
+    return tuple(columns), get
+
+
+def serialize(obj, field_map, fields=None):
+    return {
+        name: get(obj) for name, (_, get) in field_map.items()
+        if get is not None and (fields is None or name in fields)
+    }
+
+
+def wants(fields, name):
+    return fields is None or name in fields
+
+
+def columns_for(field_map, fields):
+    return {name for field in fields for name in field_map[field][0]}
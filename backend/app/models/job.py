@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime
+from app import db
+
+
+class Job(db.Model):
+    """Long-running operation executed in the background by the job runner"""
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, succeeded, failed
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    # Checkpoint written by the handler so an interrupted job resumes where it stopped
+    state = db.Column(db.JSON, nullable=False, default=dict)
+    progress_done = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker_id = db.Column(db.String(100))  # host:pid of the process running the job
+    heartbeat_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        percent = None
+        if self.progress_total:
+            percent = round(100 * self.progress_done / self.progress_total, 1)
+        elif self.status == 'succeeded':
+            percent = 100.0
+        return {
+            'id': self.id,
+            'type': self.job_type,
+            'status': self.status,
+            'progress': {
+                'done': self.progress_done,
+                'total': self.progress_total,
+                'percent': percent
+            },
+            'result': self.result,
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -1,29 +1,32 @@
 from datetime import datetime
 from app import db
+from app.models.fields import column, serialize, timestamp
 
 
 class List(db.Model):
     __tablename__ = 'lists'
     
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
     color_theme = db.Column(db.String(50), default='gray')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     items = db.relationship('ListItem', backref='list', lazy='dynamic',
-                           cascade='all, delete-orphan', order_by='ListItem.position')
+                           cascade='all, delete-orphan', passive_deletes=True, order_by='ListItem.position')
     
-    def to_dict(self, include_items=False):
-        data = {
-            'id': self.id,
-            'project_id': self.project_id,
-            'title': self.title,
-            'color_theme': self.color_theme,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    FIELDS = {
+        'id': column('id'),
+        'project_id': column('project_id'),
+        'title': column('title'),
+        'color_theme': column('color_theme'),
+        'created_at': timestamp('created_at'),
+        'updated_at': timestamp('updated_at')
+    }
+    
+    def to_dict(self, include_items=False, users=None, fields=None):
+        data = serialize(self, self.FIELDS, fields)
         if include_items:
-            data['items'] = [item.to_dict() for item in self.items]
+            data['items'] = [item.to_dict(users) for item in self.items]
         return data
@@ -1,12 +1,14 @@
 from datetime import datetime
 from app import db
+from app.models.fields import column, computed, serialize, timestamp, wants
+from app.models.user import side_load
 
 
 class ListItem(db.Model):
     __tablename__ = 'list_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    list_id = db.Column(db.Integer, db.ForeignKey('lists.id'), nullable=False)
+    list_id = db.Column(db.Integer, db.ForeignKey('lists.id', ondelete='CASCADE'), nullable=False, index=True)
     content = db.Column(db.String(500), nullable=False)
     is_checked = db.Column(db.Boolean, default=False)
     position = db.Column(db.Integer, default=0)
@@ -16,15 +18,23 @@ class ListItem(db.Model):
     
     assignee = db.relationship('User', foreign_keys=[assigned_to], lazy='joined')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'list_id': self.list_id,
-            'content': self.content,
-            'is_checked': self.is_checked,
-            'position': self.position,
-            'assigned_to': self.assigned_to,
-            'assignee': self.assignee.to_dict() if self.assignee else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    FIELDS = {
+        'id': column('id'),
+        'list_id': column('list_id'),
+        'content': column('content'),
+        'is_checked': column('is_checked'),
+        'position': column('position'),
+        'assigned_to': column('assigned_to'),
+        'assignee': computed(('assigned_to',)),
+        'created_at': timestamp('created_at'),
+        'updated_at': timestamp('updated_at')
+    }
+    
+    def to_dict(self, users=None, fields=None):
+        data = serialize(self, self.FIELDS, fields)
+        if wants(fields, 'assignee'):
+            if users is None:
+                data['assignee'] = self.assignee.to_dict() if self.assignee else None
+            else:
+                side_load(users, self.assignee)
+        return data
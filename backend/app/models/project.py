@@ -1,5 +1,7 @@
 from datetime import datetime
 from app import db
+from app.models.fields import column, computed, serialize, timestamp, wants
+from app.models.user import side_load
 
 
 class Project(db.Model):
@@ -13,30 +15,58 @@ class Project(db.Model):
     color_theme = db.Column(db.String(50), default='blue')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Set when the project is deleted; its rows are purged in the background
+    deleted_at = db.Column(db.DateTime, index=True)
     
-    # Relationships
+    # Relationships; children are removed by ON DELETE CASCADE, not loaded by the ORM
     boards = db.relationship('Board', backref='project', lazy='dynamic',
-                            cascade='all, delete-orphan')
+                            cascade='all, delete-orphan', passive_deletes=True)
     lists = db.relationship('List', backref='project', lazy='dynamic',
-                           cascade='all, delete-orphan')
+                           cascade='all, delete-orphan', passive_deletes=True)
     shares = db.relationship('ProjectShare', backref='project', lazy='dynamic',
-                            cascade='all, delete-orphan')
+                            cascade='all, delete-orphan', passive_deletes=True)
     
-    def to_dict(self, include_contents=False):
-        data = {
-            'id': self.id,
-            'owner_id': self.owner_id,
-            'name': self.name,
-            'description': self.description,
-            'color_theme': self.color_theme,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'board_count': self.boards.count(),
-            'list_count': self.lists.count()
-        }
+    def active_boards(self):
+        """Boards that have not been deleted"""
+        return self.boards.filter_by(deleted_at=None)
+    
+    def member_rows(self):
+        """(user, share) for the owner, with share None, then each shared user; one query.
+
+        Driven from the project's share rows, so users are read by primary key.
+        """
+        from app.models.user import SYSTEM_USER_GOOGLE_ID, User
+        member_ids = db.union_all(
+            db.select(db.literal(self.owner_id)),
+            db.select(ProjectShare.user_id).where(ProjectShare.project_id == self.id)
+        )
+        share_of = db.and_(ProjectShare.user_id == User.id, ProjectShare.project_id == self.id)
+        return db.session.execute(
+            db.select(User, ProjectShare)
+            .outerjoin(ProjectShare, share_of)
+            .where(User.id.in_(member_ids), User.google_id != SYSTEM_USER_GOOGLE_ID)
+            .order_by(ProjectShare.id.is_not(None), ProjectShare.id)
+        ).all()
+    
+    FIELDS = {
+        'id': column('id'),
+        'owner_id': column('owner_id'),
+        'name': column('name'),
+        'description': column('description'),
+        'color_theme': column('color_theme'),
+        'created_at': timestamp('created_at'),
+        'updated_at': timestamp('updated_at'),
+        'board_count': computed((), lambda project: project.active_boards().count()),
+        'list_count': computed((), lambda project: project.lists.count())
+    }
+    
+    def to_dict(self, include_contents=False, users=None, fields=None):
+        data = serialize(self, self.FIELDS, fields)
         if include_contents:
-            data['boards'] = [b.to_dict() for b in self.boards]
+            data['boards'] = [b.to_dict() for b in self.active_boards()]
             data['lists'] = [l.to_dict() for l in self.lists]
+        if users is not None and wants(fields, 'owner_id'):
+            side_load(users, self.owner)
         return data
 
 
@@ -45,7 +75,7 @@ class ProjectShare(db.Model):
     __tablename__ = 'project_shares'
     
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -53,11 +83,15 @@ class ProjectShare(db.Model):
         db.UniqueConstraint('project_id', 'user_id', name='unique_project_user_share'),
     )
     
-    def to_dict(self):
-        return {
+    def to_dict(self, users=None):
+        data = {
             'id': self.id,
             'project_id': self.project_id,
             'user_id': self.user_id,
-            'user': self.user.to_dict() if self.user else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+        if users is None:
+            data['user'] = self.user.to_dict() if self.user else None
+        else:
+            side_load(users, self.user)
+        return data
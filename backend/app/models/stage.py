@@ -6,15 +6,15 @@ class Stage(db.Model):
     __tablename__ = 'stages'
     
     id = db.Column(db.Integer, primary_key=True)
-    board_id = db.Column(db.Integer, db.ForeignKey('boards.id'), nullable=False)
+    board_id = db.Column(db.Integer, db.ForeignKey('boards.id', ondelete='CASCADE'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     position = db.Column(db.Integer, default=0)
     color = db.Column(db.String(20), default='#6B7280')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    tasks = db.relationship('Task', backref='stage', lazy='dynamic')
+    tasks = db.relationship('Task', backref='stage', lazy='dynamic', passive_deletes=True)
     
-    def to_dict(self, include_tasks=False):
+    def to_dict(self, include_tasks=False, users=None):
         data = {
             'id': self.id,
             'board_id': self.board_id,
@@ -24,5 +24,5 @@ class Stage(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
         if include_tasks:
-            data['tasks'] = [task.to_dict() for task in self.tasks.order_by('position')]
+            data['tasks'] = [task.to_dict(users) for task in self.tasks.order_by('position')]
         return data
@@ -1,35 +1,49 @@
 import json
 from datetime import datetime, date
+from sqlalchemy.orm import validates
 from app import db
+from app.database import JSONDocument
+from app.models.fields import column, computed, serialize, timestamp, wants
+from app.models.user import side_load
 
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        db.Index('ix_tasks_custom_fields', 'custom_fields', postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    board_id = db.Column(db.Integer, db.ForeignKey('boards.id'), nullable=False)
-    stage_id = db.Column(db.Integer, db.ForeignKey('stages.id'), nullable=False)
+    board_id = db.Column(db.Integer, db.ForeignKey('boards.id', ondelete='CASCADE'), nullable=False, index=True)
+    stage_id = db.Column(db.Integer, db.ForeignKey('stages.id', ondelete='CASCADE'), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     due_date = db.Column(db.Date)
     color_theme = db.Column(db.String(50))
-    custom_fields = db.Column(db.Text, default='{}')  # JSON storage
+    custom_fields = db.Column(JSONDocument, default=dict)  # JSONB on PostgreSQL
     position = db.Column(db.Integer, default=0)
     assigned_to = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # When the task last changed stage; auto-archiving measures time spent in the last stage
+    stage_entered_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     assignee = db.relationship('User', foreign_keys=[assigned_to], lazy='joined')
     
+    @validates('custom_fields')
+    def _parse_custom_fields(self, key, value):
+        # Older templates and clients send custom fields as a JSON-encoded string
+        if isinstance(value, str):
+            return json.loads(value) if value else {}
+        return value
+    
     def get_custom_fields(self):
-        """Parse and return custom fields as dict"""
-        if self.custom_fields:
-            return json.loads(self.custom_fields)
-        return {}
+        """Return custom fields as dict"""
+        return dict(self.custom_fields or {})
     
     def set_custom_fields(self, fields_dict):
         """Set custom fields from dict"""
-        self.custom_fields = json.dumps(fields_dict)
+        self.custom_fields = dict(fields_dict)
     
     def get_dynamic_color(self):
         """Calculate color based on days until deadline"""
@@ -47,20 +61,30 @@ class Task(db.Model):
         else:
             return self.color_theme or '#3B82F6'  # Default blue or custom
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'board_id': self.board_id,
-            'stage_id': self.stage_id,
-            'title': self.title,
-            'description': self.description,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'color_theme': self.color_theme,
-            'dynamic_color': self.get_dynamic_color(),
-            'custom_fields': self.get_custom_fields(),
-            'position': self.position,
-            'assigned_to': self.assigned_to,
-            'assignee': self.assignee.to_dict() if self.assignee else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    FIELDS = {
+        'id': column('id'),
+        'board_id': column('board_id'),
+        'stage_id': column('stage_id'),
+        'title': column('title'),
+        'description': column('description'),
+        'due_date': timestamp('due_date'),
+        'color_theme': column('color_theme'),
+        'dynamic_color': computed(('due_date', 'color_theme'), lambda task: task.get_dynamic_color()),
+        'custom_fields': computed(('custom_fields',), lambda task: task.get_custom_fields()),
+        'position': column('position'),
+        'assigned_to': column('assigned_to'),
+        'assignee': computed(('assigned_to',)),
+        'created_at': timestamp('created_at'),
+        'updated_at': timestamp('updated_at')
+    }
+    
+    def to_dict(self, users=None, fields=None):
+        """With a users map, the assignee is side-loaded into it instead of embedded.
+        With fields, only those keys are built (see FIELDS)."""
+        data = serialize(self, self.FIELDS, fields)
+        if wants(fields, 'assignee'):
+            if users is None:
+                data['assignee'] = self.assignee.to_dict() if self.assignee else None
+            else:
+                side_load(users, self.assignee)
+        return data
@@ -1,83 +1,244 @@
+import hashlib
+import json
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import declared_attr
 from app import db
+from app.database import JSONDocument
 
 
-class ProjectTemplate(db.Model):
+_UNSET = object()
+
+
+def _canonical_json(data):
+    return json.dumps(data, sort_keys=True, separators=(',', ':'))
+
+
+def _summarize(data):
+    """Count list-valued keys so listings can show sizes without the payload"""
+    if not isinstance(data, dict):
+        return {}
+    return {key: len(value) for key, value in data.items() if isinstance(value, list)}
+
+
+class TemplateBlob(db.Model):
+    """Template payload stored once per distinct content and shared by reference"""
+    __tablename__ = 'template_blobs'
+    __table_args__ = (
+        db.Index('ix_template_blobs_data', 'data', postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
+
+    # sha256 of the canonical JSON encoding of data
+    hash = db.Column(db.String(64), primary_key=True)
+    data = db.Column(JSONDocument, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @staticmethod
+    def digest(data):
+        return hashlib.sha256(_canonical_json(data).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def acquire(cls, connection, blob_hash, data):
+        """Store data under blob_hash, or add a reference if it is already stored"""
+        dialect_insert = postgresql.insert if connection.dialect.name == 'postgresql' else sqlite.insert
+        stmt = dialect_insert(cls.__table__).values(
+            hash=blob_hash,
+            data=data,
+            size=len(_canonical_json(data)),
+            ref_count=1,
+            created_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.__table__.c.hash],
+            set_={'ref_count': cls.__table__.c.ref_count + 1}
+        )
+        connection.execute(stmt)
+
+    @classmethod
+    def release(cls, connection, blob_hash):
+        """Drop one reference to blob_hash, deleting the payload when none remain"""
+        table = cls.__table__
+        connection.execute(
+            table.update().where(table.c.hash == blob_hash).values(ref_count=table.c.ref_count - 1)
+        )
+        connection.execute(
+            table.delete().where(table.c.hash == blob_hash, table.c.ref_count <= 0)
+        )
+
+
+class TemplateDataMixin:
+    """Stores template_data in the shared, hash-keyed template_blobs table.
+
+    Rows only hold the payload hash and a small summary of its size, so listing
+    templates never reads the payload itself.
+    """
+    # Counts of list-valued keys in template_data, e.g. {"stages": 4, "tasks": 7}
+    summary = db.Column(JSONDocument)
+
+    @declared_attr
+    def _legacy_template_data(cls):
+        # Pre-blob payload column, kept for rows written before template_blobs existed
+        return db.deferred(db.Column('template_data', JSONDocument, nullable=False, default=dict))
+
+    @declared_attr
+    def blob_hash(cls):
+        return db.Column(db.String(64), db.ForeignKey('template_blobs.hash'), nullable=True)
+
+    @declared_attr
+    def blob(cls):
+        return db.relationship('TemplateBlob', lazy='select')
+
+    @property
+    def template_data(self):
+        data = self.__dict__.get('_template_data', _UNSET)
+        if data is not _UNSET:
+            return data
+        if self.blob_hash is not None:
+            return self.blob.data
+        return self._legacy_template_data
+
+    @template_data.setter
+    def template_data(self, value):
+        value = value if value is not None else {}
+        if self.blob_hash is None and self.id is not None:
+            # Moving a pre-blob row: clear the payload it stored inline
+            self._legacy_template_data = {}
+        self.__dict__['_template_data'] = value
+        self.blob_hash = TemplateBlob.digest(value)
+        self.summary = _summarize(value)
+
+    def to_dict(self, include_data=True):
+        data = self._base_dict()
+        data['summary'] = self.summary
+        if include_data:
+            data['template_data'] = self.template_data
+        data['created_at'] = self.created_at.isoformat() if self.created_at else None
+        data['updated_at'] = self.updated_at.isoformat() if self.updated_at else None
+        return data
+
+
+class ProjectTemplate(TemplateDataMixin, db.Model):
     """Template for creating projects with predefined boards and lists"""
     __tablename__ = 'project_templates'
-    
+
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     color_theme = db.Column(db.String(50), default='blue')
-    # JSON structure: {"board_template_ids": [...], "list_template_ids": [...]}
-    template_data = db.Column(db.JSON, nullable=False, default=dict)
+    # template_data JSON structure: {"board_template_ids": [...], "list_template_ids": [...]}
+    # Built-in templates are stored once and shared by every user
+    is_system = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    def to_dict(self):
+
+    def _base_dict(self):
         return {
             'id': self.id,
             'owner_id': self.owner_id,
             'name': self.name,
             'description': self.description,
             'color_theme': self.color_theme,
-            'template_data': self.template_data,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'is_system': self.is_system
         }
 
 
-class BoardTemplate(db.Model):
+class BoardTemplate(TemplateDataMixin, db.Model):
     """Template for creating boards with predefined stages and tasks"""
     __tablename__ = 'board_templates'
-    
+
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     color_theme = db.Column(db.String(50), default='blue')
-    # JSON structure: {"stages": [...], "tasks": [...]}
-    template_data = db.Column(db.JSON, nullable=False, default=dict)
+    # template_data JSON structure: {"stages": [...], "tasks": [...]}
+    # Built-in templates are stored once and shared by every user
+    is_system = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    # Private copy of a system template, created the first time a user edits it
+    source_template_id = db.Column(db.Integer, db.ForeignKey('board_templates.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    def to_dict(self):
+
+    def _base_dict(self):
         return {
             'id': self.id,
             'owner_id': self.owner_id,
             'name': self.name,
             'description': self.description,
             'color_theme': self.color_theme,
-            'template_data': self.template_data,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'is_system': self.is_system,
+            'source_template_id': self.source_template_id
         }
 
 
-class ListTemplate(db.Model):
+class ListTemplate(TemplateDataMixin, db.Model):
     """Template for creating lists with predefined items"""
     __tablename__ = 'list_templates'
-    
+
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     color_theme = db.Column(db.String(50), default='gray')
-    # JSON structure: {"items": [...]}
-    template_data = db.Column(db.JSON, nullable=False, default=dict)
+    # template_data JSON structure: {"items": [...]}
+    # Built-in templates are stored once and shared by every user
+    is_system = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    # Private copy of a system template, created the first time a user edits it
+    source_template_id = db.Column(db.Integer, db.ForeignKey('list_templates.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    def to_dict(self):
+
+    def _base_dict(self):
         return {
             'id': self.id,
             'owner_id': self.owner_id,
             'name': self.name,
             'description': self.description,
             'color_theme': self.color_theme,
-            'template_data': self.template_data,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'is_system': self.is_system,
+            'source_template_id': self.source_template_id
         }
+
+
+# Reference counting runs at flush time on the flush's connection, so blob rows are
+# written before the templates that point at them and removed after them.
+
+def _acquire_blob(mapper, connection, target):
+    history = db.inspect(target).attrs.blob_hash.history
+    if history.added and history.added[0] is not None:
+        TemplateBlob.acquire(connection, history.added[0], target.template_data)
+
+
+def _release_replaced_blob(mapper, connection, target):
+    history = db.inspect(target).attrs.blob_hash.history
+    if history.added:
+        for old_hash in history.deleted:
+            if old_hash is not None:
+                TemplateBlob.release(connection, old_hash)
+
+
+def _release_deleted_blob(mapper, connection, target):
+    if target.blob_hash is not None:
+        TemplateBlob.release(connection, target.blob_hash)
+
+
+for _model in (ProjectTemplate, BoardTemplate, ListTemplate):
+    event.listen(_model, 'before_insert', _acquire_blob)
+    event.listen(_model, 'before_update', _acquire_blob)
+    event.listen(_model, 'after_update', _release_replaced_blob)
+    event.listen(_model, 'after_delete', _release_deleted_blob)
+
+
+def migrate_legacy_template_data():
+    """Move payloads of templates written before template_blobs into blob storage"""
+    migrated = False
+    for model in (ProjectTemplate, BoardTemplate, ListTemplate):
+        for template in model.query.filter(model.blob_hash.is_(None)):
+            template.template_data = template._legacy_template_data
+            migrated = True
+    if migrated:
+        db.session.commit()
@@ -2,6 +2,10 @@ from datetime import datetime
 from app import db
 
 
+# Owner of the built-in templates; never signs in and is never shared with
+SYSTEM_USER_GOOGLE_ID = 'system:templates'
+
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -25,3 +29,9 @@ class User(db.Model):
             'avatar_url': self.avatar_url,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+def side_load(users, user):
+    """Add a user to a normalized response's users map (keyed by id)"""
+    if user is not None and user.id not in users:
+        users[user.id] = user.to_dict()
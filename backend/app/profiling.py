@@ -0,0 +1,165 @@
+"""Per-request profiling: wall time, SQL statements, SQL time and JSON encoding time.
+
+Every request is timed and the SQL it issues is counted by engine events.
+A statement text that repeats PROFILING_N_PLUS_ONE_THRESHOLD or more times in
+one request (the same SELECT with different ids) is logged as a probable N+1.
+The numbers are exported per endpoint as Prometheus metrics at /metrics,
+aggregated over all gunicorn workers when PROMETHEUS_MULTIPROC_DIR is set
+(gunicorn.conf.py sets it), and sent as X-Query-Count / X-Query-Time headers
+in debug mode or with PROFILING_HEADERS. Each finished profile is also sent
+through the request_profiled signal. /metrics requires METRICS_TOKEN, or
+without one answers only direct requests from this host.
+"""
+import ipaddress
+import logging
+import os
+import time
+from collections import Counter
+from blinker import Namespace
+from flask import current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter as MetricCounter, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+request_profiled = Namespace().signal('request-profiled')
+
+REQUEST_TIME = Histogram(
+    'taskboard_request_duration_seconds', 'Wall time per request', ['endpoint', 'method']
+)
+SQL_STATEMENTS = Histogram(
+    'taskboard_request_sql_statements', 'SQL statements per request', ['endpoint', 'method'],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+)
+SQL_TIME = Histogram(
+    'taskboard_request_sql_seconds', 'Time spent in SQL per request', ['endpoint', 'method']
+)
+SERIALIZE_TIME = Histogram(
+    'taskboard_request_serialize_seconds', 'Time spent encoding JSON per request', ['endpoint', 'method'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+N_PLUS_ONE = MetricCounter(
+    'taskboard_n_plus_one', 'Requests with a statement repeated past the N+1 threshold', ['endpoint', 'method']
+)
+
+
+class Profile:
+    """What one request spent its time on"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serialize_time = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold):
+        """Statements issued at least threshold times, most frequent first"""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+def current_profile():
+    return g.get('profile') if has_request_context() else None
+
+
+# Start times live on the statement's execution context, so a statement that
+# raises leaves nothing behind on the pooled connection.
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and current_profile() is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile()
+    started = getattr(context, '_profile_started', None)
+    if profile is None or started is None:
+        return
+    profile.sql_time += time.perf_counter() - started
+    profile.sql_count += 1
+    profile.statements[statement] += 1
+
+
+class ProfilingJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            profile = current_profile()
+            if profile is not None:
+                profile.serialize_time += time.perf_counter() - started
+
+
+def start_profile():
+    g.profile = Profile()
+
+
+def finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is None or request.endpoint == 'metrics':
+        return response
+    profile.duration = time.perf_counter() - profile.started
+    labels = {'endpoint': request.endpoint or 'unmatched', 'method': request.method}
+
+    REQUEST_TIME.labels(**labels).observe(profile.duration)
+    SQL_STATEMENTS.labels(**labels).observe(profile.sql_count)
+    SQL_TIME.labels(**labels).observe(profile.sql_time)
+    SERIALIZE_TIME.labels(**labels).observe(profile.serialize_time)
+
+    repeated = profile.repeated(current_app.config['PROFILING_N_PLUS_ONE_THRESHOLD'])
+    if repeated:
+        N_PLUS_ONE.labels(**labels).inc()
+        statement, n = repeated[0]
+        logger.warning('Probable N+1 in %s %s: %d statements, %d x %s',
+                       request.method, labels['endpoint'], profile.sql_count, n, ' '.join(statement.split())[:300])
+
+    if current_app.debug or current_app.config['PROFILING_HEADERS']:
+        response.headers['X-Query-Count'] = str(profile.sql_count)
+        response.headers['X-Query-Time'] = f'{profile.sql_time * 1000:.1f}ms'
+    request_profiled.send(current_app._get_current_object(), profile=profile)
+    return response
+
+
+def _direct_local_request():
+    """Made from this host without passing through a proxy"""
+    try:
+        loopback = ipaddress.ip_address(request.remote_addr or '').is_loopback
+    except ValueError:
+        return False
+    return loopback and 'X-Forwarded-For' not in request.headers
+
+
+def metrics():
+    """Prometheus metrics for every worker; without METRICS_TOKEN only local scrapes are served"""
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return {'error': {'code': 'UNAUTHORIZED', 'message': 'Metrics token required'}}, 401
+    elif not _direct_local_request():
+        return {'error': {'code': 'FORBIDDEN', 'message': 'Set METRICS_TOKEN to scrape metrics remotely'}}, 403
+
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), 200, {'Content-Type': CONTENT_TYPE_LATEST}
+
+
+def init_profiling(app):
+    if not app.config['PROFILING_ENABLED']:
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.json = ProfilingJSONProvider(app)
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -0,0 +1,131 @@
+"""Per-user token-bucket admission control.
+
+Every authenticated request takes a token from its user's bucket for the
+request's class: GET/HEAD/OPTIONS are reads, everything else is a write, so a
+script flooding task creation cannot exhaust the budget for browsing and the
+single SQLite writer is only queued up to the write budget. A bucket holds up
+to RATE_LIMIT_<CLASS>_BURST tokens and refills at RATE_LIMIT_<CLASS>_RATE
+tokens per second; an empty bucket gets 429 with Retry-After.
+
+Buckets live in a small SQLite file on local disk (RATE_LIMIT_SQLITE_PATH) so
+all gunicorn workers on a host share them. Each take is a single UPSERT, so it
+is atomic across processes. RATE_LIMIT_STORAGE=memory keeps them per process.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app, request
+
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+TAKE_SQL = '''
+INSERT INTO buckets (key, tokens, updated, allowed) VALUES (:key, :burst - 1, :now, 1)
+ON CONFLICT (key) DO UPDATE SET
+    allowed = min(:burst, tokens + (:now - updated) * :rate) >= 1,
+    tokens = min(:burst, tokens + (:now - updated) * :rate)
+        - (min(:burst, tokens + (:now - updated) * :rate) >= 1),
+    updated = :now
+RETURNING allowed, tokens
+'''
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f'Rate limit exceeded, retry in {retry_after}s')
+        self.retry_after = retry_after
+
+
+class MemoryBuckets:
+    """Buckets for a single process"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+        return allowed, tokens
+
+
+class SQLiteBuckets:
+    """Buckets shared by every process on the host through one SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Losing a few seconds of bucket state in a crash is harmless
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS buckets '
+                '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, allowed INTEGER NOT NULL)'
+            )
+            self.local.conn, self.local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, key, rate, burst, now):
+        allowed, tokens = self._connection().execute(
+            TAKE_SQL, {'key': key, 'rate': rate, 'burst': burst, 'now': now}
+        ).fetchone()
+        return bool(allowed), tokens
+
+    def prune(self, now, max_idle):
+        """Drop buckets idle long enough to have refilled completely"""
+        return self._connection().execute('DELETE FROM buckets WHERE updated < ?', (now - max_idle,)).rowcount
+
+
+def request_class():
+    return 'read' if request.method in READ_METHODS else 'write'
+
+
+def limits(config, name):
+    """(tokens per second, burst) for a request class"""
+    prefix = f'RATE_LIMIT_{name.upper()}'
+    return float(config[f'{prefix}_RATE']), float(config[f'{prefix}_BURST'])
+
+
+def check_rate_limit(user_id):
+    """Take a token for the current request; raises RateLimited when the bucket is empty"""
+    config = current_app.config
+    if not config['RATE_LIMIT_ENABLED']:
+        return
+    name = request_class()
+    rate, burst = limits(config, name)
+    allowed, tokens = current_app.extensions['rate_limit'].take(f'{name}:{user_id}', rate, burst, time.time())
+    if not allowed:
+        raise RateLimited(max(1, math.ceil((1 - tokens) / rate)))
+
+
+def prune_buckets(app):
+    buckets = app.extensions['rate_limit']
+    if not isinstance(buckets, SQLiteBuckets):
+        return {'pruned': 0}
+    max_idle = max(burst / rate for rate, burst in (limits(app.config, 'read'), limits(app.config, 'write')))
+    return {'pruned': buckets.prune(time.time(), max_idle)}
+
+
+def init_rate_limit(app, scheduler):
+    storage = app.config['RATE_LIMIT_STORAGE']
+    if storage == 'memory':
+        app.extensions['rate_limit'] = MemoryBuckets()
+    elif storage == 'sqlite':
+        app.extensions['rate_limit'] = SQLiteBuckets(app.config['RATE_LIMIT_SQLITE_PATH'])
+    else:
+        raise ValueError(f"RATE_LIMIT_STORAGE must be 'sqlite' or 'memory', got {storage!r}")
+
+    if app.config['RATE_LIMIT_ENABLED'] and storage == 'sqlite':
+        scheduler.add_task('prune_rate_limits', 3600, lambda: prune_buckets(app))
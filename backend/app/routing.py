@@ -0,0 +1,98 @@
+"""Read/write connection routing.
+
+GET requests read through a separate pool of read-only connections (the
+``reader`` bind), everything else uses the writer engine. A request switches to
+the writer for good as soon as it writes, and reads go to the writer for a
+short window after the caller's own writes so they always see them.
+"""
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app.database import is_postgres, postgres_connect_options
+
+READER_BIND = 'reader'
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+def _pin_writer(wrote=False):
+    g.db_use_writer = True
+    if wrote:
+        g.db_pending_write = True
+
+
+class RoutingSession(Session):
+    """Session that sends reads made while serving GET requests to the reader bind"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or getattr(clause, 'is_dml', False):
+                _pin_writer(wrote=True)
+            elif request.method in READ_METHODS and not g.get('db_use_writer'):
+                reader = self._db.engines.get(READER_BIND)
+                if reader is not None:
+                    return reader
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def record_committed_write():
+    """Count a write committed outside the request's session (e.g. by the group committer) as its own"""
+    if has_request_context():
+        _pin_writer(wrote=True)
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_write(db_session):
+    if has_request_context() and g.get('db_pending_write'):
+        g.db_wrote = True
+
+
+def use_writer(f):
+    """Decorator for read endpoints that must see the latest committed data"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        _pin_writer()
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def configure_read_split(app):
+    """Register the reader bind before the database is initialised.
+
+    The reader defaults to the primary database; SQLALCHEMY_READ_URI can point it
+    at a replica. In-memory SQLite databases are not shared between connections,
+    so the split is disabled for them.
+    """
+    if not app.config['DB_READ_SPLIT']:
+        return
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    read_url = app.config.get('SQLALCHEMY_READ_URI') or app.config['SQLALCHEMY_DATABASE_URI']
+    # Bind options do not inherit SQLALCHEMY_ENGINE_OPTIONS, so copy the pool settings
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.update(url=read_url, pool_size=app.config['DB_READ_POOL_SIZE'])
+    if is_postgres(read_url):
+        options['connect_args'] = postgres_connect_options(app.config, read_only=True)
+    binds[READER_BIND] = options
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+    @app.before_request
+    def route_own_writes_to_writer():
+        for flag in ('db_use_writer', 'db_pending_write', 'db_wrote'):
+            g.pop(flag, None)
+        if request.headers.get('X-Consistency', '').lower() == 'strong':
+            _pin_writer()
+        elif session.get('db_wrote_at', 0) > time.time() - current_app.config['DB_READ_AFTER_WRITE']:
+            _pin_writer()
+
+    @app.after_request
+    def remember_own_writes(response):
+        if g.get('db_wrote'):
+            session['db_wrote_at'] = time.time()
+        return response
@@ -0,0 +1,143 @@
+"""Archive tier: move finished tasks out of the hot tasks table.
+
+Archiving copies task rows into archived_tasks with INSERT ... SELECT and then
+deletes them from tasks, so board loads, counts and template captures only
+scan active work. Tasks are archived manually or, when TASK_ARCHIVE_AFTER_DAYS
+is set, automatically once they have sat in their board's last stage for that
+many days. Archived tasks stay searchable and can be restored into their
+stage (or the board's last stage if it was deleted).
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func, or_, select
+from app import db
+from app.models.archived_task import ArchivedTask
+from app.models.stage import Stage
+from app.models.task import Task
+
+# Tasks moved per statement; each batch is committed separately when auto-archiving
+ARCHIVE_BATCH_SIZE = 500
+
+# Columns copied verbatim between tasks and archived_tasks
+_COPIED_COLUMNS = (
+    'board_id', 'stage_id', 'title', 'description', 'due_date', 'color_theme',
+    'custom_fields', 'position', 'assigned_to', 'created_at', 'updated_at', 'stage_entered_at'
+)
+
+
+def archive_tasks(task_ids, archived_by=None):
+    """Move the given tasks into the archive; returns the number archived.
+
+    The caller commits.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return 0
+
+    tasks = Task.__table__
+    source = select(
+        tasks.c.id,
+        *(tasks.c[name] for name in _COPIED_COLUMNS),
+        Stage.name,
+        db.literal(archived_by, db.Integer),
+        db.literal(datetime.utcnow(), db.DateTime)
+    ).select_from(
+        tasks.outerjoin(Stage.__table__, tasks.c.stage_id == Stage.id)
+    ).where(tasks.c.id.in_(task_ids)).order_by(tasks.c.id)
+    db.session.execute(ArchivedTask.__table__.insert().from_select(
+        ['task_id', *_COPIED_COLUMNS, 'stage_name', 'archived_by', 'archived_at'], source
+    ))
+    result = db.session.execute(db.delete(Task).where(Task.id.in_(task_ids)))
+    return result.rowcount
+
+
+def archive_stage(board_id, stage_id, archived_by=None):
+    """Archive every task currently in a stage; returns the number archived"""
+    ids = db.session.scalars(select(Task.id).filter_by(board_id=board_id, stage_id=stage_id)).all()
+    return archive_tasks(ids, archived_by=archived_by)
+
+
+def _last_stages():
+    """(board_id, position) of the last stage of every board"""
+    return select(
+        Stage.board_id, func.max(Stage.position).label('position')
+    ).group_by(Stage.board_id).subquery()
+
+
+def stale_task_ids(days, limit=ARCHIVE_BATCH_SIZE):
+    """Ids of tasks that have been in their board's last stage for more than days"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    last = _last_stages()
+    # Tasks created before stage_entered_at existed fall back to their last update
+    entered = func.coalesce(Task.stage_entered_at, Task.updated_at, Task.created_at)
+    return db.session.scalars(
+        select(Task.id)
+        .join(Stage, Task.stage_id == Stage.id)
+        .join(last, and_(last.c.board_id == Stage.board_id, last.c.position == Stage.position))
+        .where(entered < cutoff)
+        .order_by(Task.id)
+        .limit(limit)
+        # Workers archiving concurrently on PostgreSQL skip each other's rows
+        .with_for_update(of=Task, skip_locked=True)
+    ).all()
+
+
+def auto_archive(days):
+    """Archive stale tasks in committed batches; returns the number archived"""
+    archived = 0
+    while True:
+        ids = stale_task_ids(days)
+        if not ids:
+            break
+        archived += archive_tasks(ids)
+        db.session.commit()
+        if len(ids) < ARCHIVE_BATCH_SIZE:
+            break
+    return {'archived': archived}
+
+
+def search_archive(board_ids, query=None, limit=50, offset=0):
+    """Archived tasks of the given boards, newest first, optionally matching query"""
+    q = ArchivedTask.query.filter(ArchivedTask.board_id.in_(board_ids))
+    if query:
+        pattern = f'%{query}%'
+        q = q.filter(or_(ArchivedTask.title.ilike(pattern), ArchivedTask.description.ilike(pattern)))
+    total = q.count()
+    items = q.order_by(ArchivedTask.archived_at.desc(), ArchivedTask.id.desc()).offset(offset).limit(limit).all()
+    return items, total
+
+
+def restore_task(archived):
+    """Move an archived task back to the end of its stage; returns the restored Task or None.
+
+    Returns None when the board no longer has any stage to restore into. The
+    caller commits.
+    """
+    stage = None
+    if archived.stage_id is not None:
+        stage = Stage.query.filter_by(id=archived.stage_id, board_id=archived.board_id).first()
+    if stage is None:
+        stage = Stage.query.filter_by(board_id=archived.board_id).order_by(Stage.position.desc()).first()
+    if stage is None:
+        return None
+
+    max_pos = db.session.query(func.max(Task.position)).filter_by(stage_id=stage.id).scalar()
+    task = Task(**{name: getattr(archived, name) for name in _COPIED_COLUMNS})
+    # Keep the original id unless SQLite has reused it for a newer task
+    if db.session.get(Task, archived.task_id) is None:
+        task.id = archived.task_id
+    task.stage_id = stage.id
+    task.position = (max_pos if max_pos is not None else -1) + 1
+    # Restart the clock so auto-archiving does not immediately take it back
+    task.stage_entered_at = datetime.utcnow()
+
+    db.session.add(task)
+    db.session.delete(archived)
+    db.session.flush()
+    return task
+
+
+def init_archive(app, scheduler):
+    """Schedule automatic archiving when TASK_ARCHIVE_AFTER_DAYS is positive"""
+    days = app.config['TASK_ARCHIVE_AFTER_DAYS']
+    if days and days > 0:
+        scheduler.add_task('archive_tasks', app.config['TASK_ARCHIVE_INTERVAL'], lambda: auto_archive(days))
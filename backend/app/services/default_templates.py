@@ -1,8 +1,13 @@
-"""Service to seed default project templates for new users."""
+"""Service to seed the built-in project templates shared by all users."""
+from sqlalchemy.exc import IntegrityError
 from app import db
+from app.models.user import SYSTEM_USER_GOOGLE_ID, User
 from app.models.template import ProjectTemplate, BoardTemplate, ListTemplate
 
 
+SYSTEM_USER_EMAIL = 'templates@system.taskboard.local'
+
+
 # Default project templates with their boards and lists
 DEFAULT_TEMPLATES = [
     {
@@ -281,14 +286,29 @@ DEFAULT_TEMPLATES = [
 ]
 
 
-def seed_default_templates(user_id):
-    """Create default project templates for a new user."""
+def seed_system_templates():
+    """Store the built-in templates once as system-owned rows shared by all users.
+
+    Runs at startup and is a no-op once the system user exists, so first logins
+    no longer pay for per-user seeding. The first run also removes the per-user
+    copies the old seeder left behind.
+    """
+    if User.query.filter_by(google_id=SYSTEM_USER_GOOGLE_ID).first():
+        return
+    
+    system_user = User(
+        google_id=SYSTEM_USER_GOOGLE_ID,
+        email=SYSTEM_USER_EMAIL,
+        name='TaskBoard'
+    )
+    db.session.add(system_user)
+    db.session.flush()
+    
     for template_def in DEFAULT_TEMPLATES:
-        # Create board templates
-        board_template_ids = []
-        for board_def in template_def.get('boards', []):
-            board_template = BoardTemplate(
-                owner_id=user_id,
+        board_templates = [
+            BoardTemplate(
+                owner_id=system_user.id,
+                is_system=True,
                 name=board_def['name'],
                 description=board_def.get('description'),
                 color_theme=board_def.get('color_theme', 'blue'),
@@ -297,35 +317,93 @@ def seed_default_templates(user_id):
                     'tasks': board_def.get('tasks', [])
                 }
             )
-            db.session.add(board_template)
-            db.session.flush()
-            board_template_ids.append(board_template.id)
-        
-        # Create list templates
-        list_template_ids = []
-        for list_def in template_def.get('lists', []):
-            items = [{'content': item, 'position': idx} for idx, item in enumerate(list_def.get('items', []))]
-            list_template = ListTemplate(
-                owner_id=user_id,
+            for board_def in template_def.get('boards', [])
+        ]
+        list_templates = [
+            ListTemplate(
+                owner_id=system_user.id,
+                is_system=True,
                 name=list_def['name'],
                 color_theme=list_def.get('color_theme', 'gray'),
-                template_data={'items': items}
+                template_data={
+                    'items': [{'content': item, 'position': idx} for idx, item in enumerate(list_def.get('items', []))]
+                }
             )
-            db.session.add(list_template)
-            db.session.flush()
-            list_template_ids.append(list_template.id)
+            for list_def in template_def.get('lists', [])
+        ]
+        db.session.add_all(board_templates + list_templates)
+        db.session.flush()
         
-        # Create project template
         project_template = ProjectTemplate(
-            owner_id=user_id,
+            owner_id=system_user.id,
+            is_system=True,
             name=template_def['name'],
             description=template_def.get('description'),
             color_theme=template_def.get('color_theme', 'blue'),
             template_data={
-                'board_template_ids': board_template_ids,
-                'list_template_ids': list_template_ids
+                'board_template_ids': [bt.id for bt in board_templates],
+                'list_template_ids': [lt.id for lt in list_templates]
             }
         )
         db.session.add(project_template)
     
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker seeded concurrently
+        db.session.rollback()
+        return
+    
+    # First seeding of a database that may predate shared system templates
+    remove_legacy_template_copies()
+
+
+def remove_legacy_template_copies():
+    """Delete the per-user copies of the built-in templates made by the old first-login seeder.
+
+    A copy is removed only while it and all of its board and list templates
+    still match the system template exactly; edited copies stay with their owner.
+    Runs once, when seed_system_templates() first creates the system rows.
+    """
+    def key(template):
+        return template.name, template.description, template.color_theme, template.blob_hash
+    
+    system_boards = {t.id: key(t) for t in BoardTemplate.query.filter_by(is_system=True)}
+    system_lists = {t.id: key(t) for t in ListTemplate.query.filter_by(is_system=True)}
+    expected = {}
+    for template in ProjectTemplate.query.filter_by(is_system=True):
+        data = template.template_data
+        expected[template.name, template.description, template.color_theme] = (
+            [system_boards.get(i) for i in data.get('board_template_ids', [])],
+            [system_lists.get(i) for i in data.get('list_template_ids', [])]
+        )
+    
+    legacy = [
+        (template, template.template_data) for template in ProjectTemplate.query.filter(
+            ProjectTemplate.is_system.is_(False),
+            ProjectTemplate.name.in_([t['name'] for t in DEFAULT_TEMPLATES])
+        )
+        if (template.name, template.description, template.color_theme) in expected
+    ]
+    if not legacy:
+        return
+    board_ids = {i for _, data in legacy for i in data.get('board_template_ids', [])}
+    list_ids = {i for _, data in legacy for i in data.get('list_template_ids', [])}
+    boards = {t.id: t for t in BoardTemplate.query.filter(BoardTemplate.id.in_(board_ids))}
+    lists = {t.id: t for t in ListTemplate.query.filter(ListTemplate.id.in_(list_ids))}
+    
+    removed = False
+    for template, data in legacy:
+        own_boards = [boards.get(i) for i in data.get('board_template_ids', [])]
+        own_lists = [lists.get(i) for i in data.get('list_template_ids', [])]
+        children = own_boards + own_lists
+        if any(t is None or t.owner_id != template.owner_id or t.is_system for t in children):
+            continue
+        match = expected[template.name, template.description, template.color_theme]
+        if ([key(t) for t in own_boards], [key(t) for t in own_lists]) != match:
+            continue
+        for copy in children + [template]:
+            db.session.delete(copy)
+        removed = True
+    if removed:
+        db.session.commit()
@@ -0,0 +1,213 @@
+"""Service to duplicate projects and boards with set-based INSERT ... SELECT statements.
+
+Rows are copied inside the database without loading them into Python. Copying a
+level that has children also yields an old-id -> new-id mapping used to remap
+foreign keys such as tasks.stage_id:
+
+- SQLite assigns rowids in insertion order, so children are inserted in old-id
+  order and the n-th child of a copied parent (ordered by id) is the copy of the
+  n-th child of the original; joining row numbers on both sides gives the map.
+- Other databases (PostgreSQL) do not promise that order, so new ids are drawn
+  from the table's sequence into a temporary mapping table first and the rows
+  are inserted with those ids.
+"""
+from datetime import datetime
+from uuid import uuid4
+from sqlalchemy import Column, Integer, MetaData, Table, and_, func, literal, null, select, true
+from app import db
+from app.models.project import Project
+from app.models.board import Board
+from app.models.stage import Stage
+from app.models.task import Task
+from app.models.custom_field import CustomFieldDefinition
+from app.models.list import List
+from app.models.list_item import ListItem
+
+COPY_SUFFIX = ' (copy)'
+
+
+def _single_map(old_id, new_id):
+    """Id map for one copied row"""
+    return select(literal(old_id).label('old_id'), literal(new_id).label('new_id')).subquery()
+
+
+def _inserts_follow_select_order():
+    """Whether INSERT ... SELECT ... ORDER BY assigns ids in that order (SQLite rowids)"""
+    return db.engine.dialect.name == 'sqlite'
+
+
+def _copy_children(table, parent_key, parent_map, values, now, where=None, map_ids=True):
+    """Copy rows of table whose parent was copied, returning their old-id -> new-id map.
+
+    values maps column names to expressions over table; parent_key and the timestamps
+    are filled in here. where optionally restricts the rows copied. The returned
+    selectable has old_id, new_id and new_parent_id; None when map_ids is false.
+    """
+    parent_col = table.c[parent_key]
+    where = where if where is not None else true()
+    columns = dict(values)
+    for name in ('created_at', 'updated_at'):
+        if name in table.c:
+            columns[name] = literal(now, db.DateTime)
+
+    if map_ids and not _inserts_follow_select_order():
+        return _copy_through_id_map(table, parent_col, parent_map, columns, where)
+
+    columns[parent_key] = parent_map.c.new_id
+    source = (
+        select(*columns.values())
+        .select_from(table.join(parent_map, parent_col == parent_map.c.old_id))
+        .where(where)
+        .order_by(table.c.id)
+    )
+    db.session.execute(table.insert().from_select(list(columns), source))
+    if not map_ids:
+        return None
+
+    old = select(
+        table.c.id.label('old_id'),
+        parent_map.c.new_id.label('new_parent_id'),
+        func.row_number().over(partition_by=parent_col, order_by=table.c.id).label('rn')
+    ).select_from(table.join(parent_map, parent_col == parent_map.c.old_id)).where(where).subquery()
+    new = select(
+        table.c.id.label('new_id'),
+        parent_col.label('parent_id'),
+        func.row_number().over(partition_by=parent_col, order_by=table.c.id).label('rn')
+    ).where(parent_col.in_(select(parent_map.c.new_id))).subquery()
+
+    return select(old.c.old_id, new.c.new_id, old.c.new_parent_id).select_from(
+        old.join(new, and_(new.c.parent_id == old.c.new_parent_id, new.c.rn == old.c.rn))
+    ).subquery()
+
+
+def _copy_through_id_map(table, parent_col, parent_map, columns, where):
+    """Allocate new ids from the table's sequence into a temporary map, then copy with them"""
+    id_map = Table(
+        f'copy_map_{uuid4().hex[:12]}', MetaData(),
+        Column('old_id', Integer, primary_key=True),
+        Column('new_id', Integer, nullable=False),
+        Column('new_parent_id', Integer, nullable=False),
+        prefixes=['TEMPORARY'],
+        postgresql_on_commit='DROP'
+    )
+    id_map.create(db.session.connection())
+
+    sequence = func.pg_get_serial_sequence(table.name, 'id')
+    db.session.execute(id_map.insert().from_select(
+        ['old_id', 'new_id', 'new_parent_id'],
+        select(table.c.id, func.nextval(sequence), parent_map.c.new_id)
+        .select_from(table.join(parent_map, parent_col == parent_map.c.old_id))
+        .where(where)
+        .order_by(table.c.id)
+    ))
+
+    columns = {'id': id_map.c.new_id, parent_col.name: id_map.c.new_parent_id, **columns}
+    db.session.execute(table.insert().from_select(
+        list(columns),
+        select(*columns.values()).select_from(table.join(id_map, table.c.id == id_map.c.old_id))
+    ))
+    return id_map
+
+
+def _copy_board_contents(board_map, now, keep_assignees=True):
+    """Copy stages, custom fields and tasks of every board in board_map"""
+    stages = Stage.__table__
+    stage_map = _copy_children(stages, 'board_id', board_map, {
+        'name': stages.c.name,
+        'position': stages.c.position,
+        'color': stages.c.color
+    }, now)
+
+    fields = CustomFieldDefinition.__table__
+    _copy_children(fields, 'board_id', board_map, {
+        'field_name': fields.c.field_name,
+        'field_type': fields.c.field_type,
+        'options': fields.c.options,
+        'position': fields.c.position
+    }, now, map_ids=False)
+
+    # Tasks hang off stages and boards; the stage map carries the new board id too
+    tasks = Task.__table__
+    source = select(
+        stage_map.c.new_parent_id,
+        stage_map.c.new_id,
+        tasks.c.title,
+        tasks.c.description,
+        tasks.c.due_date,
+        tasks.c.color_theme,
+        tasks.c.custom_fields,
+        tasks.c.position,
+        tasks.c.assigned_to if keep_assignees else null(),
+        literal(now, db.DateTime),
+        literal(now, db.DateTime),
+        literal(now, db.DateTime)
+    ).select_from(
+        tasks.join(stage_map, tasks.c.stage_id == stage_map.c.old_id)
+    ).order_by(tasks.c.id)
+    db.session.execute(tasks.insert().from_select([
+        'board_id', 'stage_id', 'title', 'description', 'due_date', 'color_theme',
+        'custom_fields', 'position', 'assigned_to', 'created_at', 'updated_at', 'stage_entered_at'
+    ], source))
+
+
+def _copy_lists(list_map, now, keep_assignees=True, keep_checked=True):
+    """Copy the items of every list in list_map"""
+    items = ListItem.__table__
+    _copy_children(items, 'list_id', list_map, {
+        'content': items.c.content,
+        'is_checked': items.c.is_checked if keep_checked else literal(False),
+        'position': items.c.position,
+        'assigned_to': items.c.assigned_to if keep_assignees else null()
+    }, now, map_ids=False)
+
+
+def duplicate_board(board, keep_assignees=True):
+    """Copy a board with its stages, custom fields and tasks into the same project.
+
+    The caller commits.
+    """
+    now = datetime.utcnow()
+    copy = Board(
+        project_id=board.project_id,
+        title=board.title + COPY_SUFFIX,
+        description=board.description,
+        color_theme=board.color_theme
+    )
+    db.session.add(copy)
+    db.session.flush()
+
+    _copy_board_contents(_single_map(board.id, copy.id), now, keep_assignees=keep_assignees)
+    return copy
+
+
+def duplicate_project(project, owner_id, keep_assignees=True, keep_checked=True):
+    """Copy a project with all of its boards and lists into a new project owned by owner_id.
+
+    Shares are not copied. The caller commits.
+    """
+    now = datetime.utcnow()
+    copy = Project(
+        owner_id=owner_id,
+        name=project.name + COPY_SUFFIX,
+        description=project.description,
+        color_theme=project.color_theme
+    )
+    db.session.add(copy)
+    db.session.flush()
+    project_map = _single_map(project.id, copy.id)
+
+    boards = Board.__table__
+    board_map = _copy_children(boards, 'project_id', project_map, {
+        'title': boards.c.title,
+        'description': boards.c.description,
+        'color_theme': boards.c.color_theme
+    }, now, where=boards.c.deleted_at.is_(None))
+    _copy_board_contents(board_map, now, keep_assignees=keep_assignees)
+
+    lists = List.__table__
+    list_map = _copy_children(lists, 'project_id', project_map, {
+        'title': lists.c.title,
+        'color_theme': lists.c.color_theme
+    }, now)
+    _copy_lists(list_map, now, keep_assignees=keep_assignees, keep_checked=keep_checked)
+    return copy
@@ -0,0 +1,89 @@
+"""Streaming NDJSON export of a project.
+
+Records are written in the format read back by app.services.importer, one
+JSON object per line: boards, then stages, tasks, lists and list items, so
+every record refers only to ids that appeared on an earlier line. Assignees
+are exported by email and matched to project members again on import.
+
+Each record type is a single column-only query read with yield_per, so no ORM
+objects are built and memory stays flat however large the project is. Lines
+are joined into chunks of about CHUNK_SIZE bytes before they are yielded to the
+response. Archived and soft-deleted data is not exported.
+"""
+import json
+from app import db
+from app.models.board import Board
+from app.models.list import List
+from app.models.list_item import ListItem
+from app.models.stage import Stage
+from app.models.task import Task
+from app.models.user import User
+
+# Rows fetched per round trip
+EXPORT_BATCH_SIZE = 1000
+
+# Approximate bytes per chunk handed to the WSGI server
+CHUNK_SIZE = 64 * 1024
+
+
+def _stream(statement):
+    return db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+
+def iter_project_records(project_id):
+    """Yield the export records of a project, parents before their children"""
+    board_ids = db.select(Board.id).where(Board.project_id == project_id, Board.deleted_at.is_(None))
+    list_ids = db.select(List.id).where(List.project_id == project_id)
+
+    for row in _stream(
+        db.select(Board.id, Board.title, Board.description, Board.color_theme)
+        .where(Board.id.in_(board_ids)).order_by(Board.id)
+    ):
+        yield {'type': 'board', 'id': row.id, 'title': row.title, 'description': row.description,
+               'color_theme': row.color_theme}
+
+    for row in _stream(
+        db.select(Stage.id, Stage.board_id, Stage.name, Stage.position, Stage.color)
+        .where(Stage.board_id.in_(board_ids)).order_by(Stage.board_id, Stage.position, Stage.id)
+    ):
+        yield {'type': 'stage', 'id': row.id, 'board_id': row.board_id, 'name': row.name,
+               'position': row.position, 'color': row.color}
+
+    for row in _stream(
+        db.select(Task.board_id, Task.stage_id, Task.title, Task.description, Task.due_date,
+                  Task.color_theme, Task.custom_fields, Task.position, User.email)
+        .outerjoin(User, User.id == Task.assigned_to)
+        .where(Task.board_id.in_(board_ids)).order_by(Task.board_id, Task.id)
+    ):
+        yield {'type': 'task', 'board_id': row.board_id, 'stage_id': row.stage_id, 'title': row.title,
+               'description': row.description, 'due_date': row.due_date.isoformat() if row.due_date else None,
+               'color_theme': row.color_theme, 'custom_fields': row.custom_fields or {},
+               'position': row.position, 'assignee': row.email}
+
+    for row in _stream(
+        db.select(List.id, List.title, List.color_theme)
+        .where(List.project_id == project_id).order_by(List.id)
+    ):
+        yield {'type': 'list', 'id': row.id, 'title': row.title, 'color_theme': row.color_theme}
+
+    for row in _stream(
+        db.select(ListItem.list_id, ListItem.content, ListItem.is_checked, ListItem.position, User.email)
+        .outerjoin(User, User.id == ListItem.assigned_to)
+        .where(ListItem.list_id.in_(list_ids)).order_by(ListItem.list_id, ListItem.position, ListItem.id)
+    ):
+        yield {'type': 'list_item', 'list_id': row.list_id, 'content': row.content,
+               'is_checked': bool(row.is_checked), 'position': row.position, 'assignee': row.email}
+
+
+def export_ndjson(project_id, chunk_size=CHUNK_SIZE):
+    """Yield the project as NDJSON text in chunks of roughly chunk_size bytes"""
+    lines, size = [], 0
+    for record in iter_project_records(project_id):
+        line = json.dumps(record, separators=(',', ':'), default=str) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(lines)
+            lines, size = [], 0
+    if lines:
+        yield ''.join(lines)
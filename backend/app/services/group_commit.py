@@ -0,0 +1,163 @@
+"""Group commit: coalesce small concurrent writes into one database commit.
+
+With GROUP_COMMIT enabled, write() hands an operation to a committer thread
+instead of committing on the request's session. The committer collects the
+operations submitted within GROUP_COMMIT_WINDOW seconds and runs them in a
+single transaction, each inside its own SAVEPOINT, so one failing operation
+rolls back only its own changes. Every caller waits for the shared COMMIT and
+then receives its own result or exception.
+
+This only helps when a worker serves requests concurrently (threaded workers);
+with GROUP_COMMIT off, write() runs the operation and commits immediately.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from flask import current_app
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from app import db
+from app.routing import record_committed_write
+
+logger = logging.getLogger(__name__)
+
+
+def write(operation, *args):
+    """Run operation(session, *args) in a committed transaction and return its result.
+
+    The operation must use only the session it is given and should return plain
+    data (e.g. to_dict()), since it may run on the committer's session.
+    """
+    committer = current_app.extensions.get('group_commit')
+    if committer is not None and committer.enabled:
+        result = committer.submit(operation, *args)
+        record_committed_write()
+        return result
+
+    result = operation(db.session, *args)
+    db.session.commit()
+    return result
+
+
+class _Operation:
+    __slots__ = ('func', 'args', 'future')
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self.future = Future()
+
+
+class GroupCommitter:
+    """Committer thread batching operations onto one writer connection per process"""
+
+    def __init__(self, app):
+        self.app = app
+        self.window = app.config['GROUP_COMMIT_WINDOW']
+        self.max_batch = app.config['GROUP_COMMIT_MAX_BATCH']
+        self.timeout = app.config['GROUP_COMMIT_TIMEOUT']
+        self.stats = {'batches': 0, 'operations': 0}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._engine = None
+
+    @property
+    def enabled(self):
+        return bool(self.app.config['GROUP_COMMIT'])
+
+    def submit(self, func, *args):
+        """Queue an operation and wait for the commit that includes it"""
+        self.ensure_started()
+        op = _Operation(func, args)
+        self._queue.put(op)
+        return op.future.result(timeout=self.timeout)
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._engine = self._create_engine()
+            self._pid = os.getpid()
+            threading.Thread(target=self._loop, name='group-commit', daemon=True).start()
+
+    def _create_engine(self):
+        """Dedicated single-connection writer engine for the committer thread"""
+        with self.app.app_context():
+            url = db.engine.url
+        engine = create_engine(url, pool_size=1, max_overflow=0)
+        if engine.dialect.name == 'sqlite':
+            from app.services.storage import apply_pragmas, connection_pragmas
+            apply_pragmas(engine, connection_pragmas(self.app.config))
+
+            # pysqlite's implicit transactions break SAVEPOINT; take control of BEGIN
+            @event.listens_for(engine, 'connect')
+            def disable_implicit_begin(dbapi_connection, connection_record):
+                dbapi_connection.isolation_level = None
+
+            @event.listens_for(engine, 'begin')
+            def begin_immediate(conn):
+                conn.exec_driver_sql('BEGIN IMMEDIATE')
+        return engine
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                with self.app.app_context():
+                    self._commit_batch(batch)
+            except Exception as exc:
+                logger.exception('Group commit batch failed')
+                for op in batch:
+                    if not op.future.done():
+                        op.future.set_exception(exc)
+
+    def _commit_batch(self, batch):
+        results = []
+        with Session(bind=self._engine, expire_on_commit=False) as session:
+            for op in batch:
+                try:
+                    with session.begin_nested():
+                        result = op.func(session, *op.args)
+                    results.append((op, result, None))
+                except Exception as exc:
+                    results.append((op, None, exc))
+
+            try:
+                session.commit()
+            except Exception as exc:
+                session.rollback()
+                results = [(op, None, error or exc) for op, _, error in results]
+
+        self.stats['batches'] += 1
+        self.stats['operations'] += len(batch)
+        for op, result, error in results:
+            if error is not None:
+                op.future.set_exception(error)
+            else:
+                op.future.set_result(result)
+
+
+def init_group_commit(app):
+    committer = GroupCommitter(app)
+    app.extensions['group_commit'] = committer
+    return committer
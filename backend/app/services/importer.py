@@ -0,0 +1,341 @@
+"""Streaming import of boards, tasks and lists from Trello, CSV and NDJSON files.
+
+Every format is read as a stream of records in the project export format
+(NDJSON, one object per line), so the file is never held in memory:
+
+    {"type": "board", "id": 1, "title": "Roadmap", "description": null, "color_theme": "blue"}
+    {"type": "stage", "id": 7, "board_id": 1, "name": "To Do", "position": 0, "color": "#6B7280"}
+    {"type": "task", "board_id": 1, "stage_id": 7, "title": "Ship it", "assignee": "a@example.com", ...}
+    {"type": "list", "id": 3, "title": "Groceries", "color_theme": "gray"}
+    {"type": "list_item", "list_id": 3, "content": "Milk", "is_checked": false, "position": 0}
+
+Record ids are the source's own and are only used to connect stages and
+tasks to their board and items to their list. A Trello board export becomes
+one board with a stage per open Trello list; a CSV file becomes one board
+with a stage per distinct value of its stage column.
+
+Boards, stages and lists are inserted as they arrive; tasks and list items are
+buffered and inserted batch_size rows at a time, each batch committed together
+with a checkpoint, so an interrupted import job resumes after its last batch.
+"""
+import csv
+import io
+import json
+import os
+import uuid
+from datetime import date
+from app import db
+from app.models.board import Board
+from app.models.list import List
+from app.models.list_item import ListItem
+from app.models.project import Project, ProjectShare
+from app.models.stage import Stage
+from app.models.task import Task
+from app.models.user import User
+from app.services.jobs import job_handler
+
+FORMATS = ('trello', 'csv', 'ndjson')
+EXTENSIONS = {'.json': 'trello', '.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+# CSV header (lowercased) -> task field; other columns become custom fields
+CSV_COLUMNS = {
+    'title': 'title', 'name': 'title', 'task': 'title', 'summary': 'title',
+    'description': 'description', 'desc': 'description', 'notes': 'description',
+    'stage': 'stage', 'status': 'stage', 'list': 'stage', 'column': 'stage',
+    'due_date': 'due_date', 'due': 'due_date', 'due date': 'due_date',
+    'assignee': 'assignee', 'assigned_to': 'assignee', 'owner': 'assignee',
+    'color': 'color_theme', 'color_theme': 'color_theme'
+}
+DEFAULT_STAGE = 'To Do'
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(filename):
+    return EXTENSIONS.get(os.path.splitext(filename or '')[1].lower())
+
+
+def save_upload(upload, directory):
+    """Stream an uploaded file to disk under a random name; returns its path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, uuid.uuid4().hex + os.path.splitext(upload.filename or '')[1].lower())
+    upload.save(path)
+    return path
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(str(value)[:10]) if value else None
+    except ValueError:
+        return None
+
+
+def read_ndjson(source, board_title=None):
+    for number, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ImportFormatError(f'Line {number} is not valid JSON')
+        if not isinstance(record, dict) or 'type' not in record:
+            raise ImportFormatError(f'Line {number} is not an export record')
+        yield record
+
+
+def read_csv(source, board_title=None):
+    text = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+    try:
+        yield from _csv_records(csv.DictReader(text), board_title)
+    finally:
+        text.detach()  # leave the binary file open for the caller
+
+
+def _csv_records(rows, board_title):
+    fields = {header: CSV_COLUMNS.get(header.strip().lower()) for header in rows.fieldnames or ()}
+    if 'title' not in fields.values():
+        raise ImportFormatError('CSV needs a title (or name) column')
+
+    yield {'type': 'board', 'id': 1, 'title': board_title or 'CSV import'}
+    stages = {}
+    for position, row in enumerate(rows):
+        task = {'type': 'task', 'board_id': 1, 'position': position, 'custom_fields': {}}
+        for header, value in row.items():
+            value = (value or '').strip() if isinstance(value, str) else ''
+            field = fields.get(header)
+            if field:
+                task[field] = value or None
+            elif header and value:
+                task['custom_fields'][header.strip()] = value
+
+        stage = task.pop('stage', None) or DEFAULT_STAGE
+        if stage not in stages:
+            stages[stage] = len(stages) + 1
+            yield {'type': 'stage', 'id': stages[stage], 'board_id': 1, 'name': stage, 'position': len(stages) - 1}
+        task['stage_id'] = stages[stage]
+        yield task
+
+
+def read_trello(source, board_title=None, include_closed=False):
+    """Two passes over a Trello board export: its lists, then its cards"""
+    import ijson
+
+    try:
+        title = board_title or next(ijson.items(source, 'name'), None) or 'Trello import'
+        source.seek(0)
+        yield {'type': 'board', 'id': 1, 'title': title}
+
+        stages = {}
+        for trello_list in ijson.items(source, 'lists.item', use_float=True):
+            if trello_list.get('closed') and not include_closed:
+                continue
+            stages[trello_list['id']] = (trello_list.get('pos') or 0, trello_list.get('name') or 'Untitled')
+        if not stages:
+            raise ImportFormatError('No lists found; is this a Trello board export?')
+        for position, (list_id, (_, name)) in enumerate(sorted(stages.items(), key=lambda item: item[1][0])):
+            yield {'type': 'stage', 'id': list_id, 'board_id': 1, 'name': name, 'position': position}
+
+        source.seek(0)
+        for card in ijson.items(source, 'cards.item', use_float=True):
+            if card.get('idList') not in stages or (card.get('closed') and not include_closed):
+                continue
+            labels = [label.get('name') or label.get('color') for label in card.get('labels') or ()]
+            yield {
+                'type': 'task',
+                'board_id': 1,
+                'stage_id': card['idList'],
+                'title': card.get('name') or 'Untitled',
+                'description': card.get('desc') or None,
+                'due_date': card.get('due'),
+                'position': int(card.get('pos') or 0),
+                'custom_fields': {'labels': [label for label in labels if label]} if labels else {}
+            }
+    except ijson.JSONError as e:
+        raise ImportFormatError(f'Invalid Trello JSON: {e}')
+
+
+READERS = {'trello': read_trello, 'csv': read_csv, 'ndjson': read_ndjson}
+
+
+def _project_members(project_id):
+    """Member email -> user id; assignees outside the project are dropped"""
+    owner = db.select(Project.owner_id).where(Project.id == project_id)
+    shared = db.select(ProjectShare.user_id).where(ProjectShare.project_id == project_id)
+    rows = db.session.execute(
+        db.select(User.email, User.id).where(db.or_(User.id.in_(owner), User.id.in_(shared)))
+    )
+    return {email.lower(): user_id for email, user_id in rows}
+
+
+def _insert_one(model, values):
+    return db.session.execute(db.insert(model).values(**values).returning(model.id)).scalar_one()
+
+
+class _ImportState:
+    """Id maps, counts and buffered rows of one import, checkpointed between batches"""
+
+    def __init__(self, project_id, state):
+        self.project_id = project_id
+        self.maps = state.get('maps') or {'board': {}, 'stage': {}, 'list': {}}
+        self.counts = state.get('counts') or {
+            'boards': 0, 'stages': 0, 'tasks': 0, 'lists': 0, 'list_items': 0, 'skipped': 0
+        }
+        self.members = _project_members(project_id)
+        self.first_stage = {}
+        self.tasks = []
+        self.items = []
+
+    def ref(self, kind, source_id):
+        # JSON object keys are strings, so ids are mapped as strings for checkpoints
+        return self.maps[kind].get(str(source_id))
+
+    def assignee(self, record):
+        email = record.get('assignee')
+        return self.members.get(email.lower()) if isinstance(email, str) else None
+
+    def default_stage(self, board_id):
+        if board_id not in self.first_stage:
+            self.first_stage[board_id] = db.session.scalar(
+                db.select(Stage.id).where(Stage.board_id == board_id).order_by(Stage.position).limit(1)
+            )
+        return self.first_stage[board_id]
+
+    def flush_rows(self):
+        """Insert the buffered tasks and list items"""
+        if self.tasks:
+            db.session.execute(db.insert(Task), self.tasks)
+        if self.items:
+            db.session.execute(db.insert(ListItem), self.items)
+        self.counts['tasks'] += len(self.tasks)
+        self.counts['list_items'] += len(self.items)
+        self.tasks.clear()
+        self.items.clear()
+
+
+def _import_board(state, record):
+    state.maps['board'][str(record.get('id'))] = _insert_one(Board, {
+        'project_id': state.project_id,
+        'title': record.get('title') or 'Imported board',
+        'description': record.get('description'),
+        'color_theme': record.get('color_theme') or 'blue'
+    })
+    state.counts['boards'] += 1
+
+
+def _import_stage(state, record):
+    board_id = state.ref('board', record.get('board_id'))
+    if board_id is None:
+        raise ImportFormatError(f'Stage {record.get("name")!r} refers to an unknown board')
+    state.maps['stage'][str(record.get('id'))] = _insert_one(Stage, {
+        'board_id': board_id,
+        'name': record.get('name') or 'Stage',
+        'position': record.get('position') or 0,
+        'color': record.get('color') or '#6B7280'
+    })
+    state.counts['stages'] += 1
+
+
+def _import_task(state, record):
+    board_id = state.ref('board', record.get('board_id'))
+    if board_id is None or not record.get('title'):
+        state.counts['skipped'] += 1
+        return
+    stage_id = state.ref('stage', record.get('stage_id')) or state.default_stage(board_id)
+    if stage_id is None:
+        state.counts['skipped'] += 1
+        return
+    state.tasks.append({
+        'board_id': board_id,
+        'stage_id': stage_id,
+        'title': str(record['title'])[:255],
+        'description': record.get('description'),
+        'due_date': _parse_date(record.get('due_date')),
+        'color_theme': record.get('color_theme'),
+        'custom_fields': record.get('custom_fields') or {},
+        'position': record.get('position') or 0,
+        'assigned_to': state.assignee(record)
+    })
+
+
+def _import_list(state, record):
+    state.maps['list'][str(record.get('id'))] = _insert_one(List, {
+        'project_id': state.project_id,
+        'title': record.get('title') or 'Imported list',
+        'color_theme': record.get('color_theme') or 'gray'
+    })
+    state.counts['lists'] += 1
+
+
+def _import_list_item(state, record):
+    list_id = state.ref('list', record.get('list_id'))
+    if list_id is None or not record.get('content'):
+        state.counts['skipped'] += 1
+        return
+    state.items.append({
+        'list_id': list_id,
+        'content': str(record['content'])[:500],
+        'is_checked': bool(record.get('is_checked')),
+        'position': record.get('position') or 0,
+        'assigned_to': state.assignee(record)
+    })
+
+
+# Record type -> handler(state, record); records of other types are ignored
+RECORD_HANDLERS = {
+    'board': _import_board,
+    'stage': _import_stage,
+    'task': _import_task,
+    'list': _import_list,
+    'list_item': _import_list_item
+}
+
+
+def import_file(path, fmt, project_id, board_title=None, batch_size=1000, ctx=None, progress=None):
+    """Stream a file into a project; returns counts of created rows.
+
+    With a job context each batch is committed through it with a checkpoint;
+    otherwise batches are committed directly and progress(done_bytes, total_bytes, counts)
+    is called after each.
+    """
+    if fmt not in READERS:
+        raise ImportFormatError(f'Unknown import format {fmt!r}; expected one of {", ".join(FORMATS)}')
+    checkpoint_state = ctx.state if ctx else {}
+    records_done = checkpoint_state.get('records_done', 0)
+    state = _ImportState(project_id, checkpoint_state)
+    total = os.path.getsize(path)
+
+    with open(path, 'rb') as source:
+        def checkpoint(done):
+            state.flush_rows()
+            if ctx:
+                ctx.commit(done=source.tell(), total=total, records_done=done, maps=state.maps, counts=state.counts)
+            else:
+                db.session.commit()
+                if progress:
+                    progress(source.tell(), total, dict(state.counts))
+
+        index = records_done - 1
+        for index, record in enumerate(READERS[fmt](source, board_title)):
+            if index < records_done:
+                continue
+            handler = RECORD_HANDLERS.get(record.get('type'))
+            if handler is not None:
+                handler(state, record)
+            if len(state.tasks) + len(state.items) >= batch_size:
+                checkpoint(index + 1)
+        checkpoint(index + 1)
+
+    return dict(state.counts, board_ids=list(state.maps['board'].values()))
+
+
+@job_handler('import')
+def import_job(ctx):
+    payload = ctx.payload
+    try:
+        return import_file(payload['path'], payload['format'], payload['project_id'],
+                           board_title=payload.get('board_title'), batch_size=payload.get('batch_size', 1000), ctx=ctx)
+    finally:
+        if os.path.exists(payload['path']):
+            os.remove(payload['path'])
@@ -0,0 +1,349 @@
+"""Background job runner for long-running operations.
+
+Jobs are rows in the jobs table, so the queue survives restarts. A dispatcher
+thread claims queued jobs with a conditional UPDATE (safe across gunicorn
+workers) and hands them to a small thread pool. Handlers commit their work in
+steps through JobContext.commit(), which stores progress and a checkpoint in
+the same transaction; a job interrupted by a restart is requeued and resumes
+from its last checkpoint. A heartbeat thread keeps heartbeat_at fresh while a
+job runs, and checkpoints and outcomes are only written while the worker still
+owns the job.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app, request
+from app import db
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def job_handler(job_type):
+    """Register a function as the handler for a job type.
+
+    The handler receives a JobContext and returns a JSON-serializable result.
+    """
+    def decorator(f):
+        _handlers[job_type] = f
+        return f
+    return decorator
+
+
+class JobLost(RuntimeError):
+    """The job was requeued and claimed by another worker while this one ran it"""
+
+
+def _owned(job_id, worker_id):
+    return db.and_(Job.id == job_id, Job.worker_id == worker_id, Job.status == 'running')
+
+
+class JobContext:
+    """Payload, checkpoint state and progress reporting for a running job"""
+
+    def __init__(self, job):
+        self.job_id = job.id
+        self.owner_id = job.owner_id
+        self.worker_id = job.worker_id
+        self.payload = dict(job.payload or {})
+        self.state = dict(job.state or {})
+
+    def commit(self, done=None, total=None, **state):
+        """Commit the handler's pending work together with progress and checkpoint state.
+
+        Raises JobLost, discarding the work, if another worker has taken the job over.
+        """
+        self.state.update(state)
+        values = {'state': dict(self.state), 'heartbeat_at': datetime.utcnow()}
+        if done is not None:
+            values['progress_done'] = done
+        if total is not None:
+            values['progress_total'] = total
+        updated = db.session.execute(
+            db.update(Job).where(_owned(self.job_id, self.worker_id)).values(**values)
+        ).rowcount
+        if not updated:
+            db.session.rollback()
+            raise JobLost(f'Job {self.job_id} is no longer owned by {self.worker_id}')
+        db.session.commit()
+
+
+class _Heartbeat:
+    """Thread refreshing a running job's heartbeat_at, independent of its checkpoints.
+
+    Keeps a job whose single step outlasts JOBS_STALE_AFTER from looking abandoned.
+    """
+
+    def __init__(self, app, job_id, worker_id, interval):
+        self.app = app
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'job-heartbeat-{job_id}', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    try:
+                        db.session.execute(
+                            db.update(Job).where(_owned(self.job_id, self.worker_id))
+                            .values(heartbeat_at=datetime.utcnow())
+                        )
+                        db.session.commit()
+                    finally:
+                        db.session.remove()
+            except Exception:
+                logger.exception('Heartbeat for job %s failed', self.job_id)
+
+
+def _worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def wants_async():
+    """Whether the client asked for a long operation to run as a background job"""
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '')
+
+
+def job_accepted(job):
+    """202 response pointing the client at the job status endpoint"""
+    return {'data': job.to_dict()}, 202, {'Location': f'/api/v1/jobs/{job.id}'}
+
+
+def enqueue(job_type, payload=None, owner_id=None):
+    """Queue a job and wake the runner (or run it inline when JOBS_EAGER is set)"""
+    if job_type not in _handlers:
+        raise LookupError(f'No handler registered for job type {job_type!r}')
+
+    job = Job(job_type=job_type, payload=payload or {}, owner_id=owner_id)
+    db.session.add(job)
+    db.session.commit()
+
+    if current_app.config.get('JOBS_EAGER'):
+        run_job(job.id)
+        db.session.refresh(job)
+    else:
+        runner = current_app.extensions['job_runner']
+        runner.ensure_started()
+        runner.wake()
+    return job
+
+
+def run_job(job_id, worker_id=None):
+    """Claim a queued job and execute it in the current app context.
+
+    Returns False if another worker claimed the job first.
+    """
+    now = datetime.utcnow()
+    worker_id = worker_id or _worker_id()
+    claimed = db.session.execute(
+        db.update(Job)
+        .where(Job.id == job_id, Job.status == 'queued')
+        .values(
+            status='running',
+            worker_id=worker_id,
+            attempts=Job.attempts + 1,
+            started_at=now,
+            heartbeat_at=now
+        )
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        return False
+
+    job = db.session.get(Job, job_id)
+    job_type = job.job_type
+    app = current_app._get_current_object()
+    try:
+        handler = _handlers.get(job_type)
+        if handler is None:
+            raise LookupError(f'No handler registered for job type {job_type!r}')
+        with _Heartbeat(app, job_id, worker_id, app.config['JOBS_STALE_AFTER'] / 3):
+            result = handler(JobContext(job))
+    except Exception as exc:
+        db.session.rollback()
+        logger.exception('Job %s (%s) failed', job_id, job_type)
+        _finish(job_id, worker_id, status='failed', error=str(exc) or exc.__class__.__name__)
+        return True
+
+    _finish(job_id, worker_id, status='succeeded', result=result,
+            progress_done=db.func.coalesce(Job.progress_total, Job.progress_done))
+    return True
+
+
+def _finish(job_id, worker_id, **values):
+    """Record a job's outcome unless another worker has taken it over meanwhile"""
+    finished = db.session.execute(
+        db.update(Job).where(_owned(job_id, worker_id)).values(finished_at=datetime.utcnow(), **values)
+    ).rowcount
+    db.session.commit()
+    if not finished:
+        logger.warning('Job %s was taken over by another worker; discarding this run\'s outcome', job_id)
+
+
+def recover_interrupted_jobs(stale_after, max_attempts, running=()):
+    """Requeue running jobs whose worker died, failing those interrupted too often.
+
+    running holds the ids of jobs this process is executing; they are never
+    requeued. Any other job claimed under this process's pid is left over from
+    a previous runner and is treated as dead.
+    """
+    host = socket.gethostname()
+    stale_before = datetime.utcnow() - timedelta(seconds=stale_after)
+    recovered = 0
+
+    for job in Job.query.filter_by(status='running').all():
+        if job.id in running:
+            continue
+        job_host, _, pid = (job.worker_id or '').rpartition(':')
+        dead = job_host == host and pid.isdigit() and (
+            int(pid) == os.getpid() or not _pid_alive(int(pid))
+        )
+        stale = job.heartbeat_at is None or job.heartbeat_at < stale_before
+        if not (dead or stale):
+            continue
+
+        if job.attempts >= max_attempts:
+            job.status = 'failed'
+            job.error = 'Job was interrupted too many times'
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = 'queued'
+            job.worker_id = None
+        recovered += 1
+
+    db.session.commit()
+    return recovered
+
+
+class JobRunner:
+    """Dispatcher thread plus worker pool executing queued jobs for one process"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+        self._slots = None
+        self._inflight = set()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def ensure_started(self):
+        """Start the runner in this process; no-op if running or disabled.
+
+        Started lazily on first use so threads are created after gunicorn forks.
+        """
+        config = self.app.config
+        if config.get('JOBS_EAGER') or not config.get('JOBS_ENABLED', True):
+            return
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            workers = config['JOBS_WORKERS']
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job-worker')
+            self._slots = threading.Semaphore(workers)
+            self._stopped.clear()
+            self._pid = os.getpid()
+            threading.Thread(target=self._dispatch_loop, name='job-dispatcher', daemon=True).start()
+
+    def wake(self):
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+        self._pid = None
+
+    def _dispatch_loop(self):
+        config = self.app.config
+        next_recovery = 0
+        while not self._stopped.is_set():
+            dispatched = False
+            try:
+                with self.app.app_context():
+                    if time.monotonic() >= next_recovery:
+                        recover_interrupted_jobs(config['JOBS_STALE_AFTER'], config['JOBS_MAX_ATTEMPTS'],
+                                                 running=frozenset(self._inflight))
+                        next_recovery = time.monotonic() + config['JOBS_STALE_AFTER'] / 2
+                    dispatched = self._dispatch_pending()
+                    db.session.remove()
+            except Exception:
+                logger.exception('Job dispatch failed')
+            if not dispatched:
+                self._wakeup.wait(config['JOBS_POLL_INTERVAL'])
+                self._wakeup.clear()
+
+    def _dispatch_pending(self):
+        job_ids = [row.id for row in db.session.query(Job.id).filter(
+            Job.status == 'queued'
+        ).order_by(Job.created_at).limit(self.app.config['JOBS_WORKERS'])]
+
+        dispatched = False
+        for job_id in job_ids:
+            if job_id in self._inflight:
+                continue
+            if not self._slots.acquire(blocking=False):
+                break
+            self._inflight.add(job_id)
+            self._executor.submit(self._run, job_id)
+            dispatched = True
+        return dispatched
+
+    def _run(self, job_id):
+        try:
+            with self.app.app_context():
+                try:
+                    run_job(job_id)
+                finally:
+                    db.session.remove()
+        except Exception:
+            logger.exception('Job %s crashed the worker', job_id)
+        finally:
+            self._inflight.discard(job_id)
+            self._slots.release()
+            self.wake()
+
+
+def init_jobs(app):
+    """Attach a job runner to the app, started on the first request in each process"""
+    runner = JobRunner(app)
+    app.extensions['job_runner'] = runner
+
+    @app.before_request
+    def start_job_runner():
+        runner.ensure_started()
+
+    return runner
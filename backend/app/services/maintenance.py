@@ -0,0 +1,102 @@
+"""Periodic maintenance tasks run on a background thread in each process."""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceScheduler:
+    """Runs registered tasks at fixed intervals inside an app context.
+
+    Started lazily on first use so the thread is created after gunicorn forks.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.tasks = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._stopped = threading.Event()
+
+    def add_task(self, name, interval, func):
+        """Run func() every interval seconds; a non-positive interval disables the task"""
+        if interval and interval > 0:
+            self.tasks[name] = {
+                'interval': interval,
+                'func': func,
+                'next_run': time.monotonic() + interval,
+                'last_run': None,
+                'last_result': None,
+                'last_error': None
+            }
+
+    def ensure_started(self):
+        if not self.tasks or not self.app.config.get('MAINTENANCE_ENABLED', True):
+            return
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stopped.clear()
+            self._pid = os.getpid()
+            threading.Thread(target=self._loop, name='maintenance', daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        self._pid = None
+
+    def run_task(self, name):
+        """Run one task now in the current app context and record its outcome"""
+        task = self.tasks[name]
+        try:
+            task['last_result'] = task['func']()
+            task['last_error'] = None
+        except Exception as exc:
+            db.session.rollback()
+            logger.exception('Maintenance task %s failed', name)
+            task['last_error'] = str(exc)
+        finally:
+            task['last_run'] = datetime.utcnow()
+            task['next_run'] = time.monotonic() + task['interval']
+        return task['last_result']
+
+    def status(self):
+        return {
+            name: {
+                'interval': task['interval'],
+                'last_run': task['last_run'].isoformat() if task['last_run'] else None,
+                'last_result': task['last_result'],
+                'last_error': task['last_error']
+            }
+            for name, task in self.tasks.items()
+        }
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            now = time.monotonic()
+            for name, task in list(self.tasks.items()):
+                if task['next_run'] <= now:
+                    with self.app.app_context():
+                        try:
+                            self.run_task(name)
+                        finally:
+                            db.session.remove()
+            wait = min(task['next_run'] for task in self.tasks.values()) - time.monotonic()
+            self._stopped.wait(max(wait, 1))
+
+
+def init_maintenance(app):
+    """Attach a maintenance scheduler to the app, started on the first request in each process"""
+    scheduler = MaintenanceScheduler(app)
+    app.extensions['maintenance'] = scheduler
+
+    @app.before_request
+    def start_maintenance():
+        scheduler.ensure_started()
+
+    return scheduler
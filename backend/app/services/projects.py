@@ -0,0 +1,130 @@
+"""Soft deletion of projects and boards and the background purge of their rows.
+
+Deleting a project or board only stamps deleted_at, so the request returns
+immediately and the rows disappear from every listing. A purge job then
+deletes the contents bottom-up in batches of PURGE_BATCH_SIZE rows, committing
+after each batch so no single transaction grows with the project. ON DELETE
+CASCADE foreign keys back this up for anything deleted directly.
+"""
+from datetime import datetime, timedelta
+from app import db
+from app.models.project import Project, ProjectShare
+from app.models.board import Board
+from app.models.stage import Stage
+from app.models.task import Task
+from app.models.archived_task import ArchivedTask
+from app.models.custom_field import CustomFieldDefinition
+from app.models.list import List
+from app.models.list_item import ListItem
+from app.services.jobs import enqueue, job_handler
+
+PURGE_BATCH_SIZE = 1000
+
+
+def soft_delete_project(project, owner_id=None):
+    """Hide a project immediately and queue the purge of its rows; returns the job"""
+    project.deleted_at = datetime.utcnow()
+    db.session.commit()
+    return enqueue('delete_project', {'project_id': project.id}, owner_id=owner_id)
+
+
+def soft_delete_board(board, owner_id=None):
+    """Hide a board immediately and queue the purge of its rows; returns the job"""
+    board.deleted_at = datetime.utcnow()
+    db.session.commit()
+    return enqueue('delete_board', {'board_id': board.id}, owner_id=owner_id)
+
+
+def _board_contents(board_ids):
+    """(model, condition) pairs for the rows hanging off the given boards, children first"""
+    return [
+        (Task, Task.board_id.in_(board_ids)),
+        (ArchivedTask, ArchivedTask.board_id.in_(board_ids)),
+        (CustomFieldDefinition, CustomFieldDefinition.board_id.in_(board_ids)),
+        (Stage, Stage.board_id.in_(board_ids))
+    ]
+
+
+def project_purge_steps(project_id):
+    board_ids = db.select(Board.id).where(Board.project_id == project_id)
+    list_ids = db.select(List.id).where(List.project_id == project_id)
+    return _board_contents(board_ids) + [
+        (Board, Board.project_id == project_id),
+        (ListItem, ListItem.list_id.in_(list_ids)),
+        (List, List.project_id == project_id),
+        (ProjectShare, ProjectShare.project_id == project_id),
+        (Project, Project.id == project_id)
+    ]
+
+
+def board_purge_steps(board_id):
+    return _board_contents([board_id]) + [(Board, Board.id == board_id)]
+
+
+def _delete_batch(model, condition, batch_size):
+    batch = db.select(model.id).where(condition).limit(batch_size).scalar_subquery()
+    return db.session.execute(
+        db.delete(model).where(model.id.in_(batch)),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+
+
+def purge(steps, ctx=None, batch_size=PURGE_BATCH_SIZE):
+    """Delete the rows selected by steps in committed batches; returns the number deleted.
+
+    With a job context progress is reported after every batch, and a resumed job
+    simply continues with whatever rows are left.
+    """
+    deleted = ctx.state.get('deleted', 0) if ctx else 0
+    if ctx:
+        remaining = sum(model.query.filter(condition).count() for model, condition in steps)
+        ctx.commit(done=deleted, total=deleted + remaining)
+
+    for model, condition in steps:
+        while True:
+            count = _delete_batch(model, condition, batch_size)
+            deleted += count
+            if ctx:
+                ctx.commit(done=deleted, deleted=deleted)
+            else:
+                db.session.commit()
+            if count < batch_size:
+                break
+    db.session.expire_all()
+    return deleted
+
+
+@job_handler('delete_project')
+def delete_project_job(ctx):
+    project_id = ctx.payload['project_id']
+    return {'project_id': project_id, 'deleted': purge(project_purge_steps(project_id), ctx=ctx)}
+
+
+@job_handler('delete_board')
+def delete_board_job(ctx):
+    board_id = ctx.payload['board_id']
+    return {'board_id': board_id, 'deleted': purge(board_purge_steps(board_id), ctx=ctx)}
+
+
+def purge_deleted(grace_seconds):
+    """Purge projects and boards deleted more than grace_seconds ago whose job never finished"""
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    project_ids = db.session.scalars(
+        db.select(Project.id).where(Project.deleted_at.is_not(None), Project.deleted_at < cutoff)
+    ).all()
+    board_ids = db.session.scalars(
+        db.select(Board.id).where(Board.deleted_at.is_not(None), Board.deleted_at < cutoff)
+    ).all()
+
+    deleted = 0
+    for project_id in project_ids:
+        deleted += purge(project_purge_steps(project_id))
+    for board_id in board_ids:
+        deleted += purge(board_purge_steps(board_id))
+    return {'projects': len(project_ids), 'boards': len(board_ids), 'deleted': deleted}
+
+
+def init_purge(app, scheduler):
+    """Sweep up soft-deleted projects and boards left behind by failed purge jobs"""
+    grace = app.config['DELETE_PURGE_GRACE']
+    scheduler.add_task('purge_deleted', app.config['DELETE_PURGE_INTERVAL'], lambda: purge_deleted(grace))
@@ -0,0 +1,259 @@
+"""Replicate the live SQLite database to durable storage with online backups.
+
+The live database can then sit on fast local (ephemeral) disk. Every
+SQLITE_REPLICA_INTERVAL seconds a consistent snapshot is taken with the
+sqlite3 backup API, written to a temporary file in SQLITE_REPLICA_DIR and
+atomically renamed over the previous replica. At startup a missing live
+database is restored from the replica. A lock file makes sure only one
+process on the host replicates or restores at a time.
+
+Each host has its own live database, so replication supports a single
+instance only. A lease file in the replica directory records the host that
+replicates; other hosts refuse to overwrite the replica until it expires.
+The lease does not rely on file locking, which is unreliable on SMB shares.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+REPLICA_NAME = 'taskboard.db'
+META_NAME = 'replica.json'
+LOCK_NAME = '.replica.lock'
+LEASE_NAME = 'replica.lease'
+# Missed renewals before another host may take over the replica
+LEASE_INTERVALS = 3
+
+
+def live_database_path(app):
+    """Filesystem path of the app's SQLite database, or None for other databases"""
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return None
+    if os.path.isabs(url.database):
+        return url.database
+    # Flask-SQLAlchemy resolves relative SQLite paths against the instance folder
+    return os.path.join(app.instance_path, url.database)
+
+
+@contextmanager
+def _replica_lock(replica_dir, blocking=True):
+    """Hold an exclusive lock on the replica directory; yields False if it is busy"""
+    os.makedirs(replica_dir, exist_ok=True)
+    with open(os.path.join(replica_dir, LOCK_NAME), 'a') as lock_file:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock_file, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _fingerprint(path):
+    """Cheap change detector for the live database and its WAL"""
+    parts = []
+    for suffix in ('', '-wal'):
+        try:
+            stat = os.stat(path + suffix)
+            parts.append([stat.st_size, stat.st_mtime_ns])
+        except FileNotFoundError:
+            parts.append(None)
+    return parts
+
+
+def _read_meta(replica_dir):
+    try:
+        with open(os.path.join(replica_dir, META_NAME)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_meta(replica_dir, meta):
+    tmp_path = os.path.join(replica_dir, META_NAME + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(replica_dir, META_NAME))
+
+
+def _read_lease(replica_dir):
+    try:
+        with open(os.path.join(replica_dir, LEASE_NAME)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _acquire_lease(app, replica_dir):
+    """Take or renew the replica lease for this host; returns the other holder if refused"""
+    host = socket.gethostname()
+    lease = _read_lease(replica_dir)
+    if lease.get('host') not in (None, host) and lease.get('expires_at', 0) > time.time():
+        return lease['host']
+
+    expires_at = time.time() + LEASE_INTERVALS * app.config['SQLITE_REPLICA_INTERVAL']
+    tmp_path = os.path.join(replica_dir, f'{LEASE_NAME}.{host}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump({'host': host, 'expires_at': expires_at}, f)
+    os.replace(tmp_path, os.path.join(replica_dir, LEASE_NAME))
+    # Two hosts taking an expired lease at once: the last rename wins
+    holder = _read_lease(replica_dir).get('host')
+    return None if holder == host else holder
+
+
+def _release_lease(replica_dir):
+    """Drop this host's lease so a replacement instance can replicate right away"""
+    if _read_lease(replica_dir).get('host') == socket.gethostname():
+        try:
+            os.remove(os.path.join(replica_dir, LEASE_NAME))
+        except FileNotFoundError:
+            pass
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _backup(source_path, target_path):
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+        target.execute('PRAGMA journal_mode=DELETE')
+        target.commit()
+    finally:
+        target.close()
+        source.close()
+
+
+def replicate(app, force=False):
+    """Copy the live database to the replica directory if it changed since the last copy.
+
+    Returns a dict describing what happened.
+    """
+    replica_dir = app.config['SQLITE_REPLICA_DIR']
+    live_path = live_database_path(app)
+    if not replica_dir or not live_path or not os.path.exists(live_path):
+        return {'replicated': False, 'reason': 'disabled'}
+
+    with _replica_lock(replica_dir, blocking=False) as acquired:
+        if not acquired:
+            return {'replicated': False, 'reason': 'busy'}
+
+        holder = _acquire_lease(app, replica_dir)
+        if holder:
+            logger.warning('Replica in %s is leased by %s; is the app scaled out?', replica_dir, holder)
+            return {'replicated': False, 'reason': 'leased', 'holder': holder}
+
+        meta = _read_meta(replica_dir)
+        fingerprint = _fingerprint(live_path)
+        # A fingerprint taken on another host says nothing about this live file
+        if not force and meta.get('fingerprint') == fingerprint and meta.get('host') == socket.gethostname():
+            return {'replicated': False, 'reason': 'unchanged'}
+
+        started = time.time()
+        tmp_path = os.path.join(replica_dir, REPLICA_NAME + '.tmp')
+        _backup(live_path, tmp_path)
+        with open(tmp_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(replica_dir, REPLICA_NAME))
+        _fsync_dir(replica_dir)
+
+        meta = {
+            'fingerprint': fingerprint,
+            'replicated_at': started,
+            'duration': round(time.time() - started, 3),
+            'size': os.path.getsize(os.path.join(replica_dir, REPLICA_NAME)),
+            'source': live_path,
+            'host': socket.gethostname()
+        }
+        _write_meta(replica_dir, meta)
+    return {'replicated': True, 'duration': meta['duration'], 'size': meta['size']}
+
+
+def restore(app):
+    """Restore the live database from the replica when the live file is missing.
+
+    Returns True if a replica was restored.
+    """
+    replica_dir = app.config['SQLITE_REPLICA_DIR']
+    live_path = live_database_path(app)
+    if not replica_dir or not live_path:
+        return False
+    replica_path = os.path.join(replica_dir, REPLICA_NAME)
+    # The live directory is typically on ephemeral disk and gone after a restart
+    os.makedirs(os.path.dirname(live_path), exist_ok=True)
+
+    with _replica_lock(replica_dir):
+        if os.path.exists(live_path) or not os.path.exists(replica_path):
+            return False
+        tmp_path = live_path + '.restore'
+        _backup(replica_path, tmp_path)
+        os.replace(tmp_path, live_path)
+        # Later changes are only on the live copy until the next replication
+        meta = _read_meta(replica_dir)
+        meta['fingerprint'] = _fingerprint(live_path)
+        meta['host'] = socket.gethostname()
+        meta['restored_at'] = time.time()
+        _write_meta(replica_dir, meta)
+
+    logger.info('Restored %s from replica %s', live_path, replica_path)
+    return True
+
+
+def replication_status(app):
+    """Replica age and whether the live database has changes not yet replicated"""
+    replica_dir = app.config['SQLITE_REPLICA_DIR']
+    live_path = live_database_path(app)
+    if not replica_dir or not live_path:
+        return {'enabled': False}
+
+    meta = _read_meta(replica_dir)
+    replicated_at = meta.get('replicated_at')
+    pending = meta.get('fingerprint') != _fingerprint(live_path) or meta.get('host') != socket.gethostname()
+    lag = round(time.time() - replicated_at, 1) if pending and replicated_at else 0.0
+    return {
+        'enabled': True,
+        'replica_path': os.path.join(replica_dir, REPLICA_NAME),
+        'interval': app.config['SQLITE_REPLICA_INTERVAL'],
+        'replicated_at': replicated_at,
+        'restored_at': meta.get('restored_at'),
+        'size': meta.get('size'),
+        'pending_changes': pending,
+        'lease_holder': _read_lease(replica_dir).get('host'),
+        # Seconds of committed changes that would be lost if the live disk disappeared now
+        'lag_seconds': lag if replicated_at else None
+    }
+
+
+def init_replication(app, scheduler):
+    """Schedule replication of the live SQLite database when SQLITE_REPLICA_DIR is set"""
+    if not (app.config['SQLITE_REPLICA_DIR'] and live_database_path(app)):
+        return
+    scheduler.add_task('replicate', app.config['SQLITE_REPLICA_INTERVAL'], lambda: replicate(app))
+
+    # Ship the last changes when a worker shuts down cleanly
+    @atexit.register
+    def replicate_on_exit():
+        try:
+            replicate(app)
+            with _replica_lock(app.config['SQLITE_REPLICA_DIR']):
+                _release_lease(app.config['SQLITE_REPLICA_DIR'])
+        except Exception:
+            logger.exception('Final replication failed')
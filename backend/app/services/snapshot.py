@@ -0,0 +1,119 @@
+"""Service to capture boards and lists as template data."""
+from itertools import groupby
+from app import db
+from app.models.board import Board
+from app.models.stage import Stage
+from app.models.task import Task
+from app.models.list import List
+from app.models.list_item import ListItem
+
+
+# Rows fetched per round trip while streaming tasks and list items
+STREAM_BATCH_SIZE = 1000
+
+
+def _board_filter(column, project_id=None, board_id=None):
+    """Restrict a board_id column to one board or to every board of a project"""
+    if board_id is not None:
+        return column == board_id
+    return column.in_(db.select(Board.id).where(Board.project_id == project_id, Board.deleted_at.is_(None)))
+
+
+def _list_filter(column, project_id=None, list_id=None):
+    """Restrict a list_id column to one list or to every list of a project"""
+    if list_id is not None:
+        return column == list_id
+    return column.in_(db.select(List.id).where(List.project_id == project_id))
+
+
+def _group_stream(rows, key):
+    """Group a stream of rows sorted by key, returning a lookup for ascending keys"""
+    groups = groupby(rows, key=key)
+    current = next(groups, None)
+
+    def take(wanted):
+        nonlocal current
+        while current is not None and current[0] < wanted:
+            current = next(groups, None)
+        if current is not None and current[0] == wanted:
+            rows_for_key = list(current[1])
+            current = next(groups, None)
+            return rows_for_key
+        return ()
+
+    return take
+
+
+def iter_board_snapshots(project_id=None, board_id=None):
+    """Yield (board, template_data) for one board or every board in a project.
+
+    Stages for all boards are read in a single query and mapped to positions in
+    memory. Tasks are streamed in board order, so only one board's task data is
+    held at a time regardless of project size.
+    """
+    boards_query = Board.query
+    if board_id is not None:
+        boards_query = boards_query.filter(Board.id == board_id)
+    else:
+        boards_query = boards_query.filter(Board.project_id == project_id, Board.deleted_at.is_(None))
+    boards = boards_query.order_by(Board.id).all()
+    if not boards:
+        return
+
+    stages_by_board = {}
+    stage_positions = {}
+    stage_rows = db.session.query(
+        Stage.id, Stage.board_id, Stage.name, Stage.position, Stage.color
+    ).filter(
+        _board_filter(Stage.board_id, project_id, board_id)
+    ).order_by(Stage.board_id, Stage.position, Stage.id)
+    for stage in stage_rows:
+        stages_by_board.setdefault(stage.board_id, []).append({
+            'name': stage.name,
+            'position': stage.position,
+            'color': stage.color
+        })
+        stage_positions[stage.id] = stage.position
+
+    task_rows = db.session.query(
+        Task.board_id, Task.stage_id, Task.title, Task.description,
+        Task.color_theme, Task.custom_fields
+    ).filter(
+        _board_filter(Task.board_id, project_id, board_id)
+    ).order_by(Task.board_id, Task.id).execution_options(yield_per=STREAM_BATCH_SIZE)
+    tasks_for = _group_stream(task_rows, key=lambda row: row.board_id)
+
+    for board in boards:
+        tasks_data = [{
+            'title': task.title,
+            'description': task.description,
+            'color_theme': task.color_theme,
+            'stage_position': stage_positions.get(task.stage_id, 0),
+            'custom_fields': task.custom_fields
+        } for task in tasks_for(board.id)]
+        yield board, {'stages': stages_by_board.get(board.id, []), 'tasks': tasks_data}
+
+
+def iter_list_snapshots(project_id=None, list_id=None):
+    """Yield (list, template_data) for one list or every list in a project"""
+    lists_query = List.query
+    if list_id is not None:
+        lists_query = lists_query.filter(List.id == list_id)
+    else:
+        lists_query = lists_query.filter(List.project_id == project_id)
+    lists = lists_query.order_by(List.id).all()
+    if not lists:
+        return
+
+    item_rows = db.session.query(
+        ListItem.list_id, ListItem.content, ListItem.position
+    ).filter(
+        _list_filter(ListItem.list_id, project_id, list_id)
+    ).order_by(ListItem.list_id, ListItem.position, ListItem.id).execution_options(
+        yield_per=STREAM_BATCH_SIZE
+    )
+    items_for = _group_stream(item_rows, key=lambda row: row.list_id)
+
+    for list_obj in lists:
+        items_data = [{'content': i.content, 'position': i.position} for i in items_for(list_obj.id)]
+        yield list_obj, {'items': items_data}
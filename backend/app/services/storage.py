@@ -0,0 +1,117 @@
+"""SQLite storage profile: connection pragmas, WAL checkpoints and incremental vacuum."""
+import os
+from sqlalchemy import event
+from app import db
+from app.routing import READER_BIND
+
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SYNCHRONOUS_MODES = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+AUTO_VACUUM_MODES = {'NONE', 'FULL', 'INCREMENTAL'}
+CHECKPOINT_MODES = {'PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'}
+
+# Pragmas that change the database file itself, so only the writer applies them
+WRITER_ONLY_PRAGMAS = {'auto_vacuum', 'journal_mode', 'journal_size_limit'}
+
+# Pragmas reported by the admin storage endpoint
+STATUS_PRAGMAS = (
+    'journal_mode', 'synchronous', 'busy_timeout', 'foreign_keys', 'mmap_size', 'cache_size',
+    'journal_size_limit', 'auto_vacuum', 'page_size', 'page_count', 'freelist_count'
+)
+
+
+def _choice(value, allowed, name):
+    value = str(value).upper()
+    if value not in allowed:
+        raise ValueError(f'{name} must be one of {sorted(allowed)}, got {value!r}')
+    return value
+
+
+def connection_pragmas(config):
+    """Pragmas applied to every new SQLite connection, in order"""
+    return [
+        # auto_vacuum only takes effect before the first table is created (or after VACUUM)
+        ('auto_vacuum', _choice(config['SQLITE_AUTO_VACUUM'], AUTO_VACUUM_MODES, 'SQLITE_AUTO_VACUUM')),
+        ('journal_mode', _choice(config['SQLITE_JOURNAL_MODE'], JOURNAL_MODES, 'SQLITE_JOURNAL_MODE')),
+        ('synchronous', _choice(config['SQLITE_SYNCHRONOUS'], SYNCHRONOUS_MODES, 'SQLITE_SYNCHRONOUS')),
+        ('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT'])),
+        ('foreign_keys', 'ON' if config['SQLITE_FOREIGN_KEYS'] else 'OFF'),
+        ('mmap_size', int(config['SQLITE_MMAP_SIZE'])),
+        ('cache_size', int(config['SQLITE_CACHE_SIZE'])),
+        ('journal_size_limit', int(config['SQLITE_JOURNAL_SIZE_LIMIT']))
+    ]
+
+
+def _is_sqlite(engine):
+    return engine.dialect.name == 'sqlite'
+
+
+def checkpoint_wal(mode='PASSIVE'):
+    """Copy WAL frames back into the database file; returns SQLite's (busy, log, checkpointed)"""
+    mode = _choice(mode, CHECKPOINT_MODES, 'SQLITE_CHECKPOINT_MODE')
+    with db.engine.connect() as conn:
+        busy, log, checkpointed = conn.exec_driver_sql(f'PRAGMA wal_checkpoint({mode})').one()
+    return {'busy': busy, 'log_frames': log, 'checkpointed_frames': checkpointed}
+
+
+def incremental_vacuum(pages):
+    """Return up to pages free pages to the filesystem; a no-op unless auto_vacuum is incremental"""
+    with db.engine.connect() as conn:
+        before = conn.exec_driver_sql('PRAGMA freelist_count').scalar()
+        # sqlite3's execute() steps a statement once, freeing a single page;
+        # executescript() steps it to completion
+        conn.connection.driver_connection.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+        after = conn.exec_driver_sql('PRAGMA freelist_count').scalar()
+    return {'freed_pages': before - after, 'freelist_count': after}
+
+
+def storage_status():
+    """Pool state, pragma values and file sizes of the primary database"""
+    engine = db.engine
+    if not _is_sqlite(engine):
+        return {'dialect': engine.dialect.name, 'pool': engine.pool.status()}
+
+    with engine.connect() as conn:
+        pragmas = {name: conn.exec_driver_sql(f'PRAGMA {name}').scalar() for name in STATUS_PRAGMAS}
+
+    files = {}
+    path = engine.url.database
+    if path and path != ':memory:':
+        for suffix in ('', '-wal', '-shm'):
+            files[f'db{suffix}'] = os.path.getsize(path + suffix) if os.path.exists(path + suffix) else None
+    return {'dialect': 'sqlite', 'pool': engine.pool.status(), 'pragmas': pragmas, 'files': files}
+
+
+def apply_pragmas(engine, pragmas):
+    """Run pragmas on every new DBAPI connection of engine"""
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def init_storage(app, scheduler=None):
+    """Apply the SQLite storage profile to the app's engines and schedule its maintenance"""
+    with app.app_context():
+        engine = db.engine
+        reader = db.engines.get(READER_BIND)
+    if not _is_sqlite(engine):
+        return
+
+    pragmas = connection_pragmas(app.config)
+    apply_pragmas(engine, pragmas)
+
+    if reader is not None and _is_sqlite(reader):
+        # Readers share the database file but never change its mode or contents
+        reader_pragmas = [(name, value) for name, value in pragmas if name not in WRITER_ONLY_PRAGMAS]
+        apply_pragmas(reader, reader_pragmas + [('query_only', 'ON')])
+
+    if scheduler is not None:
+        if dict(pragmas)['journal_mode'] == 'WAL':
+            mode = app.config['SQLITE_CHECKPOINT_MODE']
+            scheduler.add_task('wal_checkpoint', app.config['SQLITE_CHECKPOINT_INTERVAL'],
+                               lambda: checkpoint_wal(mode))
+        pages = app.config['SQLITE_VACUUM_PAGES']
+        scheduler.add_task('incremental_vacuum', app.config['SQLITE_VACUUM_INTERVAL'],
+                           lambda: incremental_vacuum(pages))
@@ -0,0 +1,167 @@
+"""Service to create projects, boards and lists from templates."""
+import json
+from app import db
+from app.models.template import ProjectTemplate, BoardTemplate, ListTemplate
+from app.models.project import Project
+from app.models.board import Board
+from app.models.stage import Stage
+from app.models.task import Task
+from app.models.list import List
+from app.models.list_item import ListItem
+from app.services.jobs import job_handler
+
+
+def create_board_contents(board, template_data):
+    """Create stages and tasks for a new board from board template data.
+
+    Stages are inserted in one statement whose RETURNING clause gives their ids,
+    instead of a flush per stage.
+    """
+    stage_rows = [
+        {
+            'board_id': board.id,
+            'name': stage_data.get('name', 'New Stage'),
+            'position': stage_data.get('position', 0),
+            'color': stage_data.get('color', '#6B7280')
+        }
+        for stage_data in template_data.get('stages', [])
+    ]
+
+    stage_map = {}  # position -> stage_id
+    if stage_rows:
+        stage_ids = db.session.scalars(
+            db.insert(Stage).returning(Stage.id, sort_by_parameter_order=True), stage_rows
+        ).all()
+        for row, stage_id in zip(stage_rows, stage_ids):
+            stage_map[row['position']] = stage_id
+    else:
+        # Create default stages if none in template
+        board.create_default_stages()
+        db.session.flush()
+        for stage in board.stages:
+            stage_map[stage.position] = stage.id
+
+    default_stage_id = next(iter(stage_map.values()), None)
+    task_rows = []
+    for task_data in template_data.get('tasks', []):
+        stage_id = stage_map.get(task_data.get('stage_position', 0), default_stage_id)
+        if stage_id:
+            task_rows.append({
+                'board_id': board.id,
+                'stage_id': stage_id,
+                'title': task_data.get('title', 'New Task'),
+                'description': task_data.get('description'),
+                'color_theme': task_data.get('color_theme', 'blue'),
+                'custom_fields': _custom_fields(task_data.get('custom_fields'))
+            })
+    if task_rows:
+        db.session.execute(db.insert(Task), task_rows)
+
+
+def _custom_fields(value):
+    # Templates captured before custom_fields became a JSON column hold encoded strings
+    if isinstance(value, str):
+        return json.loads(value) if value else {}
+    return value or {}
+
+
+def create_list_contents(list_obj, template_data):
+    """Create unchecked items for a new list from list template data"""
+    item_rows = [
+        {
+            'list_id': list_obj.id,
+            'content': item_data.get('content', ''),
+            'position': item_data.get('position', 0),
+            'is_checked': False
+        }
+        for item_data in template_data.get('items', [])
+    ]
+    if item_rows:
+        db.session.execute(db.insert(ListItem), item_rows)
+
+
+def _own_copies(model, template_ids, owner_id):
+    """System template id -> id of the owner's copy-on-write copy of it"""
+    if not template_ids:
+        return {}
+    rows = db.session.execute(
+        db.select(model.source_template_id, model.id)
+        .where(model.owner_id == owner_id, model.source_template_id.in_(template_ids))
+    )
+    return dict(rows.all())
+
+
+def apply_project_template(template, owner_id, name, description, ctx=None):
+    """Create a new project with boards and lists from a project template.
+
+    Without a job context the caller commits. With one, each board and list is
+    committed as a checkpoint so an interrupted job resumes after the last one.
+    Board and list templates the owner has edited (copied on write) are used in
+    place of the system originals.
+    """
+    template_data = template.template_data or {}
+    board_template_ids = template_data.get('board_template_ids', [])
+    list_template_ids = template_data.get('list_template_ids', [])
+    total = len(board_template_ids) + len(list_template_ids)
+    state = ctx.state if ctx else {}
+
+    project = db.session.get(Project, state['project_id']) if state.get('project_id') else None
+    if project is None:
+        project = Project(
+            owner_id=owner_id,
+            name=name,
+            description=description,
+            color_theme=template.color_theme
+        )
+        db.session.add(project)
+        db.session.flush()
+        if ctx:
+            ctx.commit(done=0, total=total, project_id=project.id, boards_done=0, lists_done=0)
+
+    boards_done = state.get('boards_done', 0)
+    board_copies = _own_copies(BoardTemplate, board_template_ids, owner_id)
+    for bt_id in board_template_ids[boards_done:]:
+        bt = db.session.get(BoardTemplate, board_copies.get(bt_id, bt_id))
+        if bt:
+            board = Board(
+                project_id=project.id,
+                title=bt.name,
+                description=bt.description,
+                color_theme=bt.color_theme
+            )
+            db.session.add(board)
+            db.session.flush()
+            create_board_contents(board, bt.template_data or {})
+        boards_done += 1
+        if ctx:
+            ctx.commit(done=boards_done, boards_done=boards_done)
+
+    lists_done = state.get('lists_done', 0)
+    list_copies = _own_copies(ListTemplate, list_template_ids, owner_id)
+    for lt_id in list_template_ids[lists_done:]:
+        lt = db.session.get(ListTemplate, list_copies.get(lt_id, lt_id))
+        if lt:
+            list_obj = List(
+                project_id=project.id,
+                title=lt.name,
+                color_theme=lt.color_theme
+            )
+            db.session.add(list_obj)
+            db.session.flush()
+            create_list_contents(list_obj, lt.template_data or {})
+        lists_done += 1
+        if ctx:
+            ctx.commit(done=boards_done + lists_done, lists_done=lists_done)
+
+    return project
+
+
+@job_handler('apply_project_template')
+def apply_project_template_job(ctx):
+    template = db.session.get(ProjectTemplate, ctx.payload['template_id'])
+    if template is None:
+        raise LookupError('Template no longer exists')
+    project = apply_project_template(
+        template, ctx.owner_id, ctx.payload['name'], ctx.payload.get('description'), ctx=ctx
+    )
+    return {'project_id': project.id}
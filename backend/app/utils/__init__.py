@@ -4,7 +4,8 @@ from app.utils.auth import (
     require_board_access,
     require_list_access,
     get_current_user,
-    get_project_access
+    get_project_access,
+    admin_required
 )
 
 __all__ = [
@@ -13,5 +14,6 @@ __all__ = [
     'require_board_access',
     'require_list_access',
     'get_current_user',
-    'get_project_access'
+    'get_project_access',
+    'admin_required'
 ]
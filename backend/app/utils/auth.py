@@ -1,7 +1,8 @@
 from functools import wraps
 import jwt
-from flask import session, request, g, current_app
+from flask import session, request, g, current_app, abort
 from app.models.user import User
+from app.ratelimit import RateLimited, check_rate_limit
 
 
 def get_current_user():
@@ -40,6 +41,10 @@ def login_required(f):
         user = get_current_user()
         if not user:
             return {'error': {'code': 'UNAUTHORIZED', 'message': 'Authentication required'}}, 401
+        try:
+            check_rate_limit(user.id)
+        except RateLimited as e:
+            return {'error': {'code': 'RATE_LIMITED', 'message': str(e)}}, 429, {'Retry-After': str(e.retry_after)}
         g.current_user = user
         return f(*args, **kwargs)
     return decorated_function
@@ -64,7 +69,7 @@ def require_project_access():
         def decorated_function(*args, **kwargs):
             from app.models.project import Project
             project_id = kwargs.get('project_id')
-            project = Project.query.get_or_404(project_id)
+            project = Project.query.filter_by(id=project_id, deleted_at=None).first_or_404()
             
             access = get_project_access(project, g.current_user)
             if not access:
@@ -84,7 +89,9 @@ def require_board_access():
         def decorated_function(*args, **kwargs):
             from app.models.board import Board
             board_id = kwargs.get('board_id')
-            board = Board.query.get_or_404(board_id)
+            board = Board.query.filter_by(id=board_id, deleted_at=None).first_or_404()
+            if board.project.deleted_at is not None:
+                abort(404)
             
             # Access is determined by project membership
             access = get_project_access(board.project, g.current_user)
@@ -107,6 +114,8 @@ def require_list_access():
             from app.models.list import List
             list_id = kwargs.get('list_id')
             list_obj = List.query.get_or_404(list_id)
+            if list_obj.project.deleted_at is not None:
+                abort(404)
             
             # Access is determined by project membership
             access = get_project_access(list_obj.project, g.current_user)
@@ -119,3 +128,14 @@ def require_list_access():
             return f(*args, **kwargs)
         return decorated_function
     return decorator
+
+
+def admin_required(f):
+    """Decorator to restrict an endpoint to users listed in ADMIN_EMAILS"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        admins = {e.strip().lower() for e in current_app.config.get('ADMIN_EMAILS', '').split(',') if e.strip()}
+        if g.current_user.email.lower() not in admins:
+            return {'error': {'code': 'FORBIDDEN', 'message': 'Admin access required'}}, 403
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,48 @@
+from flask import request
+from sqlalchemy.orm import lazyload, load_only
+from app.models.fields import columns_for
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def wants_normalized():
+    """?normalize=1: rows carry user ids and the users are side-loaded once"""
+    return request.args.get('normalize', '').lower() in ('1', 'true', 'yes')
+
+
+def side_loaded_users():
+    """A users map for to_dict(users=...) in normalized mode, else None to embed users"""
+    return {} if wants_normalized() else None
+
+
+def with_users(payload, users):
+    """Add the side-loaded users map to a response payload"""
+    if users is not None:
+        payload['users'] = users
+    return payload
+
+
+def requested_fields(model):
+    """?fields=a,b as a set of the model's output fields (id is always included); None when absent"""
+    value = request.args.get('fields')
+    if not value:
+        return None
+    fields = {name.strip() for name in value.split(',') if name.strip()} | {'id'}
+    unknown = fields - set(model.FIELDS)
+    if unknown:
+        raise InvalidFields(
+            f'Unknown fields: {", ".join(sorted(unknown))}; expected any of {", ".join(model.FIELDS)}'
+        )
+    return fields
+
+
+def sparse_options(model, fields):
+    """Query options reading only the columns behind fields, and no assignee join unless asked for"""
+    if fields is None:
+        return ()
+    options = [load_only(*(getattr(model, name) for name in columns_for(model.FIELDS, fields)))]
+    if 'assignee' in model.FIELDS and 'assignee' not in fields:
+        options.append(lazyload(model.assignee))
+    return options
@@ -0,0 +1,124 @@
+from sqlalchemy.schema import AddConstraint, CreateColumn, CreateTable
+from app import db
+
+
+def add_missing_columns():
+    """Add model columns that are missing from existing tables.
+
+    db.create_all() only creates missing tables, so a database created before a
+    column was introduced needs it added in place. Columns added this way must be
+    nullable or carry a server_default.
+    """
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+
+
+def add_missing_indexes():
+    """Create model indexes that are missing from existing tables"""
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {i['name'] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    # Honours ddl_if, so PostgreSQL-only indexes are skipped on SQLite
+                    index.create(conn, checkfirst=True)
+
+
+def _stale_foreign_keys(inspector, table):
+    """Model foreign keys whose ON DELETE rule differs from the database"""
+    reflected = {
+        (tuple(fk['constrained_columns']), fk['referred_table']): fk
+        for fk in inspector.get_foreign_keys(table.name)
+    }
+    stale = []
+    for fk in table.foreign_key_constraints:
+        current = reflected.get((tuple(fk.column_keys), fk.referred_table.name))
+        if current is None:
+            continue
+        if (current['options'].get('ondelete') or '').upper() != (fk.ondelete or '').upper():
+            stale.append((fk, current))
+    return stale
+
+
+def upgrade_foreign_keys():
+    """Bring ON DELETE rules of existing foreign keys in line with the models.
+
+    PostgreSQL constraints are dropped and re-added. SQLite cannot alter a
+    constraint, so affected tables are rebuilt with the documented
+    create-copy-drop-rename procedure while foreign key enforcement is off.
+    Returns the names of the upgraded tables.
+    """
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    stale = {
+        table: fks for table in db.metadata.sorted_tables
+        if table.name in existing_tables and (fks := _stale_foreign_keys(inspector, table))
+    }
+    if not stale:
+        return []
+
+    if db.engine.dialect.name == 'sqlite':
+        _rebuild_sqlite_tables(list(stale))
+    else:
+        with db.engine.begin() as conn:
+            for table, fks in stale.items():
+                for fk, current in fks:
+                    conn.execute(db.text(f'ALTER TABLE {table.name} DROP CONSTRAINT {current["name"]}'))
+                    conn.execute(AddConstraint(fk))
+    return [table.name for table in stale]
+
+
+def _rebuild_sqlite_tables(tables):
+    with db.engine.connect() as conn:
+        dialect = conn.dialect
+        quote = dialect.identifier_preparer.quote
+        raw = conn.connection.driver_connection
+        isolation_level = raw.isolation_level
+        raw.isolation_level = None  # issue BEGIN/COMMIT ourselves
+        foreign_keys = raw.execute('PRAGMA foreign_keys').fetchone()[0]
+        raw.execute('PRAGMA foreign_keys=OFF')
+        try:
+            raw.execute('BEGIN IMMEDIATE')
+            for table in tables:
+                tmp = f'{table.name}__rebuild'
+                ddl = str(CreateTable(table).compile(dialect=dialect)).strip()
+                raw.execute(ddl.replace(f'CREATE TABLE {table.name} ', f'CREATE TABLE {tmp} ', 1))
+                columns = ', '.join(quote(c.name) for c in table.columns)
+                raw.execute(f'INSERT INTO {tmp} ({columns}) SELECT {columns} FROM {table.name}')
+                raw.execute(f'DROP TABLE {table.name}')
+                raw.execute(f'ALTER TABLE {tmp} RENAME TO {table.name}')
+            raw.execute('COMMIT')
+        except Exception:
+            raw.execute('ROLLBACK')
+            raise
+        finally:
+            raw.execute(f'PRAGMA foreign_keys={foreign_keys}')
+            raw.isolation_level = isolation_level
+
+
+def setup_database():
+    """Create missing tables, upgrade existing ones and seed system templates"""
+    from app.models.template import migrate_legacy_template_data
+    from app.services.default_templates import seed_system_templates
+    db.create_all()
+    add_missing_columns()
+    upgrade_foreign_keys()
+    add_missing_indexes()
+    migrate_legacy_template_data()
+    seed_system_templates()
@@ -0,0 +1,133 @@
+"""Bytes and latency saved by response compression on realistic board payloads.
+
+Builds a project with BOARDS boards of TASKS tasks (with descriptions, custom
+fields and assignees) and a few long lists, then requests the heaviest read
+endpoints once per encoding. For each endpoint and encoding it reports the
+body size, the extra server time spent compressing (median of --repeat runs)
+and the net time saved at the given link speed.
+
+    cd backend && python benchmarks/compression.py --tasks 300 --mbps 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.compression import ENCODERS  # noqa: E402
+from app.models import User, Project, Board, Stage, Task, List, ListItem  # noqa: E402
+
+WORDS = ('plan', 'review', 'ship', 'fix', 'design', 'deploy', 'test', 'call', 'write', 'update')
+
+
+def text(i, words):
+    return ' '.join(WORDS[(i * 7 + n) % len(WORDS)] for n in range(words))
+
+
+def setup(app, boards, tasks, items):
+    with app.app_context():
+        user = User(google_id='bench', email='bench@example.com', name='Bench User')
+        db.session.add(user)
+        db.session.flush()
+        project = Project(owner_id=user.id, name='Compression bench')
+        db.session.add(project)
+        db.session.flush()
+
+        board_ids = []
+        for b in range(boards):
+            board = Board(project_id=project.id, title=f'Board {b}', description=text(b, 12))
+            db.session.add(board)
+            db.session.flush()
+            board.create_default_stages()
+            db.session.flush()
+            stage_ids = [s.id for s in Stage.query.filter_by(board_id=board.id)]
+            db.session.add_all(Task(
+                board_id=board.id,
+                stage_id=stage_ids[i % len(stage_ids)],
+                title=f'Task {i}: {text(i, 4)}',
+                description=text(i, 40),
+                due_date=(datetime.utcnow() + timedelta(days=i % 30)).date(),
+                custom_fields={'priority': ['low', 'medium', 'high'][i % 3], 'estimate': i % 8},
+                position=i,
+                assigned_to=user.id
+            ) for i in range(tasks))
+            board_ids.append(board.id)
+
+        list_obj = List(project_id=project.id, title='Groceries')
+        db.session.add(list_obj)
+        db.session.flush()
+        db.session.add_all(ListItem(list_id=list_obj.id, content=text(i, 6), position=i) for i in range(items))
+        db.session.commit()
+
+        token = jwt.encode({
+            'sub': str(user.id),
+            'iat': datetime.utcnow(),
+            'exp': datetime.utcnow() + timedelta(hours=1)
+        }, app.config['JWT_SECRET_KEY'], algorithm='HS256')
+        base = f'/api/v1/projects/{project.id}'
+        return token, {
+            'project_contents': base,
+            'board_tasks': f'{base}/boards/{board_ids[0]}/tasks',
+            'list_items': f'{base}/lists/{list_obj.id}/items'
+        }
+
+
+def timed_get(client, url, headers, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append(time.perf_counter() - start)
+    return response, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--boards', type=int, default=5)
+    parser.add_argument('--tasks', type=int, default=300)
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=15)
+    parser.add_argument('--mbps', type=float, default=20.0, help='client link speed in megabits per second')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(tmp, "bench.db")}',
+        'JOBS_ENABLED': False,
+        'MAINTENANCE_ENABLED': False
+    })
+    token, endpoints = setup(app, args.boards, args.tasks, args.items)
+    client = app.test_client()
+    bytes_per_second = args.mbps * 1_000_000 / 8
+
+    for name, url in endpoints.items():
+        headers = {'Authorization': f'Bearer {token}'}
+        plain, plain_time = timed_get(client, url, headers, args.repeat)
+        raw_size = len(plain.data)
+        for encoding in ENCODERS:
+            response, encoded_time = timed_get(client, url, dict(headers, **{'Accept-Encoding': encoding}),
+                                               args.repeat)
+            size = len(response.data)
+            compress_ms = (encoded_time - plain_time) * 1000
+            transfer_saved_ms = (raw_size - size) / bytes_per_second * 1000
+            print(json.dumps({
+                'endpoint': name,
+                'encoding': response.headers.get('Content-Encoding', 'identity'),
+                'raw_bytes': raw_size,
+                'encoded_bytes': size,
+                'ratio': round(raw_size / size, 2),
+                'compress_ms': round(compress_ms, 2),
+                'net_saved_ms': round(transfer_saved_ms - compress_ms, 1),
+                'mbps': args.mbps
+            }))
+
+
+if __name__ == '__main__':
+    main()
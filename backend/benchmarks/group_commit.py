@@ -0,0 +1,103 @@
+"""Throughput of small concurrent writes with and without group commit.
+
+Runs CONCURRENCY threads toggling list items through the API against a
+temporary SQLite database and reports requests per second for each mode.
+
+    cd backend && python benchmarks/group_commit.py --threads 16 --requests 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models import User, Project, List, ListItem  # noqa: E402
+
+
+def setup(app, items):
+    with app.app_context():
+        user = User(google_id='bench', email='bench@example.com', name='Bench')
+        db.session.add(user)
+        db.session.flush()
+        project = Project(owner_id=user.id, name='Bench')
+        db.session.add(project)
+        db.session.flush()
+        list_obj = List(project_id=project.id, title='Bench')
+        db.session.add(list_obj)
+        db.session.flush()
+        db.session.add_all(ListItem(list_id=list_obj.id, content=f'Item {i}', position=i) for i in range(items))
+        db.session.commit()
+
+        token = jwt.encode({
+            'sub': str(user.id),
+            'iat': datetime.utcnow(),
+            'exp': datetime.utcnow() + timedelta(hours=1)
+        }, app.config['JWT_SECRET_KEY'], algorithm='HS256')
+        item_ids = [i.id for i in ListItem.query.filter_by(list_id=list_obj.id)]
+        return f'/api/v1/projects/{project.id}/lists/{list_obj.id}/items', item_ids, token
+
+
+def run(group_commit, synchronous, threads, requests):
+    tmp = tempfile.mkdtemp()
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(tmp, "bench.db")}',
+        'SQLITE_SYNCHRONOUS': synchronous,
+        'GROUP_COMMIT': group_commit,
+        'JOBS_ENABLED': False,
+        'MAINTENANCE_ENABLED': False
+    })
+    base, item_ids, token = setup(app, threads * 4)
+    headers = {'Authorization': f'Bearer {token}'}
+    per_thread = requests // threads
+    errors = []
+
+    def worker(n):
+        client = app.test_client()
+        for i in range(per_thread):
+            item_id = item_ids[(n * per_thread + i) % len(item_ids)]
+            response = client.put(f'{base}/{item_id}/toggle', headers=headers)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    committer = app.extensions['group_commit']
+    return {
+        'group_commit': group_commit,
+        'synchronous': synchronous,
+        'threads': threads,
+        'requests': per_thread * threads,
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(per_thread * threads / elapsed, 1),
+        'commits': committer.stats['batches'] if group_commit else per_thread * threads
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--synchronous', default='FULL,NORMAL')
+    args = parser.parse_args()
+
+    for synchronous in args.synchronous.split(','):
+        for group_commit in (False, True):
+            print(json.dumps(run(group_commit, synchronous, args.threads, args.requests)))
+
+
+if __name__ == '__main__':
+    main()
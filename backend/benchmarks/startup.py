@@ -0,0 +1,113 @@
+"""Cold-start cost of the app and of gunicorn workers with and without preload.
+
+For each mode, starts gunicorn with gunicorn.conf.py against a temporary SQLite
+database and reports how long it takes until every worker is ready and until
+the first /api/v1/health request succeeds. Also reports the time a fresh
+interpreter spends importing the app and running create_app.
+
+    cd backend && python benchmarks/startup.py --workers 4 --runs 3
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READY = re.compile(r'Worker \d+ ready in ([\d.]+)s')
+
+CREATE_APP_SNIPPET = '''
+import json, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+print(json.dumps({'import': imported - start, 'create_app': time.perf_counter() - imported}))
+'''
+
+
+def environment(tmp):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f'sqlite:///{os.path.join(tmp, "bench.db")}',
+        'MAINTENANCE_ENABLED': 'false',
+        'JOBS_ENABLED': 'false',
+        'GUNICORN_ACCESS_LOG': ''
+    })
+    return env
+
+
+def time_create_app(env):
+    output = subprocess.run([sys.executable, '-c', CREATE_APP_SNIPPET], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def time_gunicorn(env, workers, preload, port):
+    env = dict(env, GUNICORN_WORKERS=str(workers), GUNICORN_PRELOAD=str(preload).lower(), PORT=str(port))
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'], cwd=BACKEND_DIR,
+                            env=env, stderr=subprocess.PIPE, text=True)
+    first_response = None
+    worker_boot = []
+    try:
+        while first_response is None:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/api/v1/health', timeout=1).read()
+                first_response = time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+            if time.perf_counter() - start > 60:
+                raise RuntimeError('gunicorn did not answer within 60s')
+        for line in proc.stderr:
+            match = READY.search(line)
+            if match:
+                worker_boot.append(float(match.group(1)))
+                if len(worker_boot) == workers:
+                    break
+        all_ready = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {'first_response': first_response, 'all_workers_ready': all_ready, 'worker_boot_max': max(worker_boot)}
+
+
+def median(runs, key):
+    return round(statistics.median(run[key] for run in runs), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = environment(tmp)
+        time_create_app(env)  # create the schema so every run measures a warm database
+        runs = [time_create_app(env) for _ in range(args.runs)]
+        print(json.dumps({'mode': 'create_app', 'runs': args.runs,
+                          'import_seconds': median(runs, 'import'),
+                          'create_app_seconds': median(runs, 'create_app')}))
+
+        for preload in (False, True):
+            runs = [time_gunicorn(env, args.workers, preload, args.port) for _ in range(args.runs)]
+            print(json.dumps({
+                'mode': 'gunicorn',
+                'preload': preload,
+                'workers': args.workers,
+                'runs': args.runs,
+                'first_response_seconds': median(runs, 'first_response'),
+                'all_workers_ready_seconds': median(runs, 'all_workers_ready'),
+                'worker_boot_seconds': median(runs, 'worker_boot_max')
+            }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Gunicorn settings for production.
+
+    gunicorn -c gunicorn.conf.py
+
+With preload_app the master imports the app and runs the schema setup once;
+workers are forked from it ready to serve, so adding workers or restarting
+them costs a fork instead of a full import and database check each.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+wsgi_app = 'app:create_app()'
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2, 4))))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+
+# Workers write their Prometheus metrics here so /metrics can add them up
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'taskboard-metrics'))
+
+
+def on_starting(server):
+    # Files left by a previous run would be counted again
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'])
+
+
+def post_fork(server, worker):
+    worker.boot_started = time.perf_counter()
+    if not server.cfg.preload_app:
+        return
+
+    # Pooled connections opened by the master must not be shared with workers
+    from app import db
+    with server.app.wsgi().app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    worker.log.info('Worker %s ready in %.3fs', worker.pid, time.perf_counter() - worker.boot_started)
@@ -1,8 +1,8 @@
 import os
 from app import create_app
 
-app = create_app()
-
 if __name__ == '__main__':
+    # Production servers load the app through gunicorn.conf.py instead of this module
+    app = create_app()
     port = int(os.getenv('PORT', 5001))
     app.run(debug=True, port=port, use_reloader=False)
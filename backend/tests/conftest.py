@@ -1,23 +1,32 @@
+import os
+from contextlib import contextmanager
 import pytest
+from flask import request_started
 from app import create_app, db
+from app.profiling import request_profiled
 
 
 @pytest.fixture
 def app(tmp_path):
-    """Create application for testing with file-based SQLite"""
+    """Create application for testing with file-based SQLite, or TEST_DATABASE_URL if set"""
     db_path = tmp_path / "test.db"
-    app = create_app()
-    app.config.update({
+    app = create_app({
         'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'SQLALCHEMY_DATABASE_URI': os.getenv('TEST_DATABASE_URL') or f'sqlite:///{db_path}',
         'SECRET_KEY': 'test-secret-key',
         'JWT_SECRET_KEY': 'test-jwt-secret',
-        'WTF_CSRF_ENABLED': False
+        'WTF_CSRF_ENABLED': False,
+        'JOBS_EAGER': True,
+        'MAINTENANCE_ENABLED': False,
+        'RATE_LIMIT_ENABLED': False,
+        'RATE_LIMIT_STORAGE': 'memory',
+        'RESPONSE_CACHE_STORAGE': 'memory'
     })
     
     with app.app_context():
         db.create_all()
         yield app
+        db.session.remove()
         db.drop_all()
 
 
@@ -93,3 +102,67 @@ def jwt_headers(app, auth_user):
         'Authorization': f'Bearer {token}',
         'Content-Type': 'application/json'
     }
+
+
+@pytest.fixture
+def sqlite_only(app):
+    """Skip tests of SQLite-specific storage behaviour on other databases"""
+    if db.engine.dialect.name != 'sqlite':
+        pytest.skip('requires SQLite')
+
+
+class QueryCounter:
+    """SQL statements issued by the requests a test makes"""
+    
+    def __init__(self):
+        self.profiles = []
+    
+    def record(self, sender, profile):
+        self.profiles.append(profile)
+    
+    def count(self, make_requests):
+        """Total statements issued by the requests made in make_requests(), and their profiles"""
+        start = len(self.profiles)
+        make_requests()
+        profiles = self.profiles[start:]
+        assert profiles, 'no request was profiled (is PROFILING_ENABLED off?)'
+        return sum(p.sql_count for p in profiles), profiles
+    
+    @staticmethod
+    def describe(profiles):
+        repeated = [r for p in profiles for r in p.repeated(2)][:3]
+        return ''.join(f'\n  {n} x {" ".join(statement.split())[:200]}' for statement, n in repeated)
+    
+    @contextmanager
+    def at_most(self, limit):
+        """Fail if the requests made in the block issue more than limit statements"""
+        start = len(self.profiles)
+        yield
+        profiles = self.profiles[start:]
+        assert profiles, 'no request was profiled (is PROFILING_ENABLED off?)'
+        total = sum(p.sql_count for p in profiles)
+        assert total <= limit, f'{total} SQL statements, budget {limit}' + self.describe(profiles)
+    
+    def assert_constant(self, make_requests, grow, tolerance=0):
+        """Fail if make_requests() issues more statements after grow() adds data"""
+        before, _ = self.count(make_requests)
+        grow()
+        after, profiles = self.count(make_requests)
+        assert after <= before + tolerance, (
+            f'{before} SQL statements before growing the data, {after} after' + self.describe(profiles)
+        )
+
+
+@pytest.fixture
+def query_counter(app):
+    """Count SQL statements per request; each request starts from a fresh session as in production"""
+    counter = QueryCounter()
+    
+    def fresh_session(sender, **extra):
+        db.session.remove()
+    
+    request_started.connect(fresh_session, app)
+    request_profiled.connect(counter.record, app)
+    yield counter
+    request_profiled.disconnect(counter.record, app)
+    request_started.disconnect(fresh_session, app)
@@ -0,0 +1,46 @@
+"""Tests for the SQLite storage profile and admin endpoints"""
+import pytest
+import json
+
+
+@pytest.mark.usefixtures('sqlite_only')
+class TestStorageProfile:
+    """Test connection pragmas, maintenance tasks and /api/v1/admin/storage"""
+
+    def test_pragmas_applied(self, app):
+        """Should apply the storage profile to new connections"""
+        from app import db
+
+        with db.engine.connect() as conn:
+            pragma = lambda name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            assert pragma('journal_mode') == 'wal'
+            assert pragma('synchronous') == 1  # NORMAL
+            assert pragma('busy_timeout') == 5000
+            assert pragma('foreign_keys') == 1
+            assert pragma('auto_vacuum') == 2  # INCREMENTAL
+
+    def test_maintenance_tasks(self, app):
+        """Should checkpoint the WAL and run incremental vacuum on demand"""
+        scheduler = app.extensions['maintenance']
+        assert set(scheduler.tasks) == {'wal_checkpoint', 'incremental_vacuum', 'purge_deleted'}
+
+        result = scheduler.run_task('wal_checkpoint')
+        assert result['busy'] == 0
+        assert scheduler.run_task('incremental_vacuum')['freelist_count'] == 0
+        assert scheduler.status()['wal_checkpoint']['last_run'] is not None
+
+    def test_storage_requires_admin(self, auth_client):
+        """Should return 403 for users not listed in ADMIN_EMAILS"""
+        response = auth_client.get('/api/v1/admin/storage')
+        assert response.status_code == 403
+
+    def test_storage_status(self, app, auth_client):
+        """Should report pragma state and file sizes to admins"""
+        app.config['ADMIN_EMAILS'] = 'someone@example.com, Test@Example.com'
+        response = auth_client.get('/api/v1/admin/storage')
+        assert response.status_code == 200
+        data = json.loads(response.data)['data']
+        assert data['dialect'] == 'sqlite'
+        assert data['pragmas']['journal_mode'] == 'wal'
+        assert data['files']['db'] > 0
+        assert 'wal_checkpoint' in data['maintenance']
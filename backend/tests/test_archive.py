@@ -0,0 +1,122 @@
+"""Tests for archiving tasks out of the hot tasks table"""
+import pytest
+import json
+from datetime import datetime, timedelta
+from app import db
+from app.models import Task, ArchivedTask
+from app.services.archive import auto_archive, init_archive
+from app.services.maintenance import MaintenanceScheduler
+
+
+class TestArchive:
+    """Test manual and automatic archiving, search and restore"""
+
+    @pytest.fixture
+    def board(self, auth_client, test_project):
+        """Create a board with one task per default stage"""
+        project_id = test_project['id']
+        response = auth_client.post(f'/api/v1/projects/{project_id}/boards',
+            data=json.dumps({'title': 'Archive Board'}),
+            content_type='application/json'
+        )
+        data = json.loads(response.data)['data']
+        base = f'/api/v1/projects/{project_id}/boards/{data["id"]}'
+        stages = {s['name']: s['id'] for s in data['stages']}
+        tasks = {}
+        for name, stage_id in stages.items():
+            response = auth_client.post(f'{base}/tasks',
+                data=json.dumps({'title': f'{name} task', 'description': f'Work for {name}', 'stage_id': stage_id}),
+                content_type='application/json'
+            )
+            tasks[name] = json.loads(response.data)['data']['id']
+        return {'project_id': project_id, 'base': base, 'stages': stages, 'tasks': tasks}
+
+    def test_archive_and_restore(self, auth_client, board):
+        """Should move a task to the archive and back into its stage"""
+        base = board['base']
+        task_id = board['tasks']['Done']
+
+        response = auth_client.post(f'{base}/tasks/{task_id}/archive')
+        assert response.status_code == 200
+        archived = response.get_json()['data']
+        assert archived['id'] == task_id
+        assert archived['stage_name'] == 'Done'
+        assert Task.query.get(task_id) is None
+
+        titles = [t['title'] for t in auth_client.get(f'{base}/tasks').get_json()['data']]
+        assert 'Done task' not in titles
+        response = auth_client.get(f'{base}/tasks?include_archived=1')
+        assert [t['title'] for t in response.get_json()['data'] if t.get('archived')] == ['Done task']
+        assert auth_client.get(f'{base}/tasks/{task_id}').status_code == 404
+        assert auth_client.get(f'{base}/tasks/{task_id}?include_archived=1').status_code == 200
+
+        response = auth_client.post(f'{base}/archive/{archived["archive_id"]}/restore')
+        assert response.status_code == 200
+        restored = response.get_json()['data']
+        assert restored['id'] == task_id
+        assert restored['stage_id'] == board['stages']['Done']
+        assert ArchivedTask.query.count() == 0
+
+    def test_restore_into_last_stage_when_stage_deleted(self, auth_client, board):
+        """Should restore into the board's last stage if the original stage is gone"""
+        base = board['base']
+        stage_id = board['stages']['In Progress']
+        auth_client.post(f'{base}/tasks/archive', data=json.dumps({'stage_id': stage_id}),
+                         content_type='application/json')
+        assert auth_client.delete(f'{base}/stages/{stage_id}').status_code == 200
+
+        archive_id = auth_client.get(f'{base}/archive').get_json()['data'][0]['archive_id']
+        restored = auth_client.post(f'{base}/archive/{archive_id}/restore').get_json()['data']
+        assert restored['stage_id'] == board['stages']['Done']
+
+    def test_search_archive(self, auth_client, board):
+        """Should search archived tasks by title and description on boards and projects"""
+        base = board['base']
+        for stage_id in board['stages'].values():
+            auth_client.post(f'{base}/tasks/archive', data=json.dumps({'stage_id': stage_id}),
+                             content_type='application/json')
+
+        response = auth_client.get(f'{base}/archive?q=progress')
+        body = response.get_json()
+        assert body['total'] == 1
+        assert body['data'][0]['title'] == 'In Progress task'
+
+        response = auth_client.get(f'/api/v1/projects/{board["project_id"]}/archive?limit=2')
+        body = response.get_json()
+        assert body['total'] == 3
+        assert len(body['data']) == 2
+
+    def test_auto_archive_last_stage(self, app, auth_client, board):
+        """Should archive only tasks that sat in the last stage longer than the threshold"""
+        old = datetime.utcnow() - timedelta(days=40)
+        Task.query.filter(Task.id.in_(board['tasks'].values())).update(
+            {Task.stage_entered_at: old}, synchronize_session=False)
+        db.session.commit()
+
+        assert auto_archive(30) == {'archived': 1}
+        assert [t.title for t in ArchivedTask.query] == ['Done task']
+        assert auto_archive(30) == {'archived': 0}
+
+    def test_auto_archive_opt_in(self, app):
+        """Should schedule automatic archiving only when TASK_ARCHIVE_AFTER_DAYS is set"""
+        assert app.config['TASK_ARCHIVE_AFTER_DAYS'] == 0
+        assert 'archive_tasks' not in app.extensions['maintenance'].tasks
+
+        app.config['TASK_ARCHIVE_AFTER_DAYS'] = 30
+        scheduler = MaintenanceScheduler(app)
+        init_archive(app, scheduler)
+        assert 'archive_tasks' in scheduler.tasks
+
+    def test_moving_resets_stage_clock(self, auth_client, board):
+        """Should record when a task enters a new stage"""
+        base = board['base']
+        task_id = board['tasks']['To Do']
+        Task.query.filter_by(id=task_id).update(
+            {Task.stage_entered_at: datetime.utcnow() - timedelta(days=40)}, synchronize_session=False)
+        db.session.commit()
+
+        auth_client.put(f'{base}/tasks/{task_id}/move',
+            data=json.dumps({'stage_id': board['stages']['Done']}),
+            content_type='application/json'
+        )
+        assert auto_archive(30) == {'archived': 0}
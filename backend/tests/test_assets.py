@@ -0,0 +1,82 @@
+"""Tests for the fingerprinted frontend asset build and how it is served"""
+import gzip
+import json
+import pytest
+from app.assets import load_manifest
+
+
+@pytest.fixture
+def frontend(tmp_path):
+    """A small frontend whose modules import each other in a cycle"""
+    source = tmp_path / 'frontend'
+    (source / 'js' / 'views').mkdir(parents=True)
+    (source / 'css').mkdir()
+    (source / 'index.html').write_text(
+        '<html><head><link rel="stylesheet" href="css/styles.css"></head>'
+        '<body><script type="module" src="js/app.js"></script></body></html>'
+    )
+    (source / 'css' / 'styles.css').write_text('body { color: #333; }\n' * 100)
+    (source / 'js' / 'app.js').write_text("import { render } from './views/board.js';\nexport const x = 1;\n" * 20)
+    (source / 'js' / 'views' / 'board.js').write_text("import { x } from '../app.js';\nexport const render = x;\n")
+    return source
+
+
+@pytest.fixture
+def built(app, runner, frontend, tmp_path):
+    """Build the frontend and serve it from the app's static folder"""
+    output = tmp_path / 'static'
+    result = runner.invoke(args=['build-assets', '--source', str(frontend), '--output', str(output)])
+    assert result.exit_code == 0, result.output
+    app.static_folder = str(output)
+    app.extensions['assets'] = load_manifest(app.static_folder)
+    return json.loads((output / 'manifest.json').read_text())
+
+
+class TestAssets:
+    """Test the asset build, cache headers and precompressed variants"""
+
+    def test_build_rewrites_index(self, client, built):
+        """Should point index.html at hashed files and map module imports through an import map"""
+        assert set(built) == {'css/styles.css', 'js/app.js', 'js/views/board.js'}
+        response = client.get('/')
+        html = response.get_data(as_text=True)
+        assert f'href="{built["css/styles.css"]}"' in html
+        assert f'src="{built["js/app.js"]}"' in html
+        assert f'"/js/views/board.js": "/{built["js/views/board.js"]}"' in html
+        assert response.cache_control.no_cache
+
+    def test_hashed_assets_immutable(self, client, built):
+        """Should serve hashed files with a year-long immutable Cache-Control"""
+        response = client.get('/' + built['css/styles.css'])
+        assert response.status_code == 200
+        assert response.cache_control.immutable
+        assert response.cache_control.max_age == 365 * 24 * 3600
+        assert response.mimetype == 'text/css'
+
+        response = client.get('/css/styles.css')
+        assert response.cache_control.no_cache and not response.cache_control.immutable
+
+    def test_precompressed_variants(self, client, built):
+        """Should send the precompressed variant the client prefers"""
+        url = '/' + built['js/app.js']
+        plain = client.get(url)
+
+        response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert response.mimetype == plain.mimetype
+        assert gzip.decompress(response.data) == plain.data
+
+        brotli = pytest.importorskip('brotli')
+        response = client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+        assert response.headers['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.data) == plain.data
+
+    def test_rebuild_only_over_previous_build(self, runner, frontend, tmp_path):
+        """Should refuse to wipe an output folder it did not create"""
+        output = tmp_path / 'other'
+        output.mkdir()
+        (output / 'keep.txt').write_text('important')
+        result = runner.invoke(args=['build-assets', '--source', str(frontend), '--output', str(output)])
+        assert result.exit_code != 0
+        assert (output / 'keep.txt').exists()
@@ -69,3 +69,34 @@ class TestAuthAPI:
         }
         response = client.get('/api/v1/auth/me', headers=headers)
         assert response.status_code == 401
+    
+    def test_oauth_metadata_from_disk_cache(self, client, app, tmp_path):
+        """Should build the Google client on first login from cached OpenID metadata"""
+        cache = tmp_path / 'google.json'
+        cache.write_text(json.dumps({
+            '_loaded_at': 1,
+            'issuer': 'https://accounts.google.com',
+            'authorization_endpoint': 'https://accounts.example.com/auth'
+        }))
+        app.config['OAUTH_METADATA_CACHE'] = str(cache)
+        assert 'google_oauth' not in app.extensions
+        
+        response = client.get('/api/v1/auth/login')
+        assert response.status_code == 302
+        assert response.headers['Location'].startswith('https://accounts.example.com/auth?')
+        assert 'google_oauth' in app.extensions
+
+
+class TestStartup:
+    """Test the startup helpers used by gunicorn and deploy scripts"""
+    
+    def test_health(self, client):
+        """Should answer the health check without touching the database"""
+        response = client.get('/api/v1/health')
+        assert response.status_code == 200
+        assert json.loads(response.data)['data']['status'] == 'ok'
+    
+    def test_init_db_command(self, runner):
+        """Should run the schema setup from the CLI"""
+        result = runner.invoke(args=['init-db'])
+        assert result.exit_code == 0
@@ -0,0 +1,45 @@
+"""Tests for the `flask bench` dataset generator and load runner"""
+import json
+from app import db
+from app.models import User, Project, Task, ListItem
+
+
+def _json_lines(output):
+    return [json.loads(line) for line in output.splitlines() if line.startswith('{')]
+
+
+class TestBench:
+    """Test generating, measuring and clearing the benchmark dataset"""
+
+    def test_generate_run_clear(self, app, runner, auth_user):
+        """Should build a skewed dataset, report latency per endpoint and remove only bench data"""
+        result = runner.invoke(args=['bench', 'generate', '--users', '5', '--projects', '4', '--boards', '2',
+                                     '--tasks', '300', '--list-items', '80'])
+        assert result.exit_code == 0, result.output
+        counts = _json_lines(result.output)[0]
+        assert counts['tasks'] == Task.query.count() == 300
+        assert counts['list_items'] == ListItem.query.count() == 80
+        assert counts['stages'] == 4 * 2 * 8
+
+        result = runner.invoke(args=['bench', 'generate'])
+        assert result.exit_code != 0
+        assert 'already exists' in result.output
+
+        result = runner.invoke(args=['bench', 'run', '--concurrency', '1,2', '--requests', '6', '--warmup', '0',
+                                     '--endpoint', 'tasks.list', '--endpoint', 'tasks.create'])
+        assert result.exit_code == 0, result.output
+        rows = _json_lines(result.output)
+        assert [(r['endpoint'], r['concurrency']) for r in rows] == [
+            ('tasks.list', 1), ('tasks.create', 1), ('tasks.list', 2), ('tasks.create', 2)
+        ]
+        for row in rows:
+            assert row['requests'] == 6 and row['errors'] == 0
+            assert row['p50_ms'] <= row['p95_ms'] <= row['p99_ms'] <= row['max_ms']
+            assert row['throughput_rps'] > 0 and row['queries_per_request'] > 0
+
+        result = runner.invoke(args=['bench', 'clear'])
+        assert result.exit_code == 0, result.output
+        db.session.remove()
+        assert User.query.filter(User.google_id.startswith('bench-')).count() == 0
+        assert db.session.get(User, auth_user['id']) is not None
+        assert Project.query.count() == Task.query.count() == 0
@@ -70,6 +70,19 @@ class TestBoardsAPI:
         data = json.loads(response.data)
         assert data['data']['title'] == 'Get Test'
     
+    def test_get_board_query_budget(self, auth_client, test_project, query_counter):
+        """Should load a board with its stages in a handful of queries"""
+        project_id = test_project['id']
+        create_resp = auth_client.post(f'/api/v1/projects/{project_id}/boards',
+            data=json.dumps({'title': 'Budget Test'}),
+            content_type='application/json'
+        )
+        board_id = json.loads(create_resp.data)['data']['id']
+        
+        with query_counter.at_most(4):
+            response = auth_client.get(f'/api/v1/projects/{project_id}/boards/{board_id}')
+        assert response.status_code == 200
+    
     def test_get_board_not_found(self, auth_client, test_project):
         """Should return 404 for non-existent board"""
         project_id = test_project['id']
@@ -113,3 +126,23 @@ class TestBoardsAPI:
         # Verify deleted
         get_resp = auth_client.get(f'/api/v1/projects/{project_id}/boards/{board_id}')
         assert get_resp.status_code == 404
+    
+    def test_list_boards_sparse_fields(self, auth_client, test_project, query_counter):
+        """Should return only the fields named in ?fields= and skip project counts nobody asked for"""
+        project_id = test_project['id']
+        auth_client.post(f'/api/v1/projects/{project_id}/boards',
+            data=json.dumps({'title': 'Roadmap', 'description': 'Long text'}),
+            content_type='application/json'
+        )
+        
+        data = json.loads(auth_client.get(f'/api/v1/projects/{project_id}/boards?fields=title').data)['data']
+        assert [set(b) for b in data] == [{'id', 'title'}]
+        
+        full, _ = query_counter.count(lambda: auth_client.get('/api/v1/projects'))
+        sparse, _ = query_counter.count(lambda: auth_client.get('/api/v1/projects?fields=name'))
+        assert sparse < full
+        data = json.loads(auth_client.get('/api/v1/projects?fields=name').data)['data']
+        assert data['owned'] == [{'id': project_id, 'name': test_project['name']}]
+        
+        response = auth_client.get(f'/api/v1/projects/{project_id}/boards?fields=owner')
+        assert response.status_code == 400
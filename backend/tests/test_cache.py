@@ -0,0 +1,116 @@
+"""Tests for the response cache and its per-project invalidation"""
+import json
+import pytest
+from app import db
+from app.cache import SQLiteCache, _statement_refs
+from app.models import Task, User
+
+
+@pytest.fixture
+def two_lists(auth_client):
+    """A list with an item in each of two projects"""
+    urls = []
+    for name in ('Home', 'Work'):
+        response = auth_client.post('/api/v1/projects', data=json.dumps({'name': name}),
+                                    content_type='application/json')
+        project_id = json.loads(response.data)['data']['id']
+        response = auth_client.post(f'/api/v1/projects/{project_id}/lists', data=json.dumps({'title': name}),
+                                    content_type='application/json')
+        url = f'/api/v1/projects/{project_id}/lists/{json.loads(response.data)["data"]["id"]}'
+        auth_client.post(f'{url}/items', data=json.dumps({'content': 'First'}), content_type='application/json')
+        urls.append(url)
+    return urls
+
+
+def _get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers['X-Cache'], json.loads(response.data)['data']
+
+
+class TestResponseCache:
+    """Test cache hits and precise invalidation on commit"""
+
+    def test_write_invalidates_only_its_project(self, auth_client, two_lists):
+        """Should serve repeats from the cache until a commit changes the same project"""
+        home, work = two_lists
+        assert _get(auth_client, home)[0] == 'MISS'
+        assert _get(auth_client, home)[0] == 'HIT'
+        assert _get(auth_client, work)[0] == 'MISS'
+
+        auth_client.post(f'{home}/items', data=json.dumps({'content': 'Second'}), content_type='application/json')
+        state, data = _get(auth_client, home)
+        assert state == 'MISS'
+        assert [i['content'] for i in data['items']] == ['First', 'Second']
+        assert _get(auth_client, work)[0] == 'HIT'
+
+    def test_query_string_in_key(self, auth_client, two_lists):
+        """Should cache each query string separately"""
+        home = two_lists[0]
+        _get(auth_client, home)
+        assert _get(auth_client, f'{home}?view=compact')[0] == 'MISS'
+        assert _get(auth_client, f'{home}?view=compact')[0] == 'HIT'
+        assert _get(auth_client, home)[0] == 'HIT'
+
+    def test_group_commit_invalidates(self, app, auth_client, two_lists):
+        """Should invalidate after the committer thread's shared commit, not a SAVEPOINT release"""
+        app.config['GROUP_COMMIT'] = True
+        home = two_lists[0]
+        item = _get(auth_client, home)[1]['items'][0]
+        auth_client.put(f'{home}/items/{item["id"]}/toggle')
+        state, data = _get(auth_client, home)
+        assert state == 'MISS'
+        assert data['items'][0]['is_checked'] is True
+
+    def test_bulk_statements(self, app, auth_client, auth_user, two_lists, test_project):
+        """Should scope bulk UPDATE / DELETE by their WHERE clause and fall back to every project"""
+        project_id = test_project['id']
+        response = auth_client.post(f'/api/v1/projects/{project_id}/boards', data=json.dumps({'title': 'Flow'}),
+                                    content_type='application/json')
+        board = f'/api/v1/projects/{project_id}/boards/{json.loads(response.data)["data"]["id"]}'
+        stage_ids = [s['id'] for s in _get(auth_client, board)[1]['stages']]
+        _get(auth_client, two_lists[0])
+
+        # Query.update() on stages filtered by board_id
+        auth_client.put(f'{board}/stages/{stage_ids[0]}/reorder', data=json.dumps({'position': 2}),
+                        content_type='application/json')
+        state, data = _get(auth_client, board)
+        assert state == 'MISS'
+        assert [s['id'] for s in data['stages']] == stage_ids[1:] + stage_ids[:1]
+        assert _get(auth_client, two_lists[0])[0] == 'HIT'
+
+        assert _statement_refs(db.delete(Task).where(Task.id.in_([4, 5])), {}) == {'task': {4, 5}}
+        assert _statement_refs(db.insert(Task).from_select(['title'], db.select(Task.title)), {}) is None
+        assert _statement_refs(db.update(Task).values(title='x'), {}) is None
+
+        # Renaming a user can change assignees anywhere
+        db.session.get(User, auth_user['id']).name = 'Renamed'
+        db.session.commit()
+        assert _get(auth_client, two_lists[0])[0] == 'MISS'
+
+    def test_metrics(self, auth_client, two_lists):
+        """Should export hits and misses per endpoint"""
+        _get(auth_client, two_lists[0])
+        _get(auth_client, two_lists[0])
+        body = auth_client.get('/metrics').get_data(as_text=True)
+        assert 'taskboard_response_cache_requests_total{endpoint="lists.get_list",result="hit"}' in body
+        assert 'taskboard_response_cache_requests_total{endpoint="lists.get_list",result="miss"}' in body
+
+    def test_sqlite_store(self, tmp_path):
+        """Should share revisions through the file and prune retired and surplus entries"""
+        first, second = SQLiteCache(str(tmp_path / 'cache.db'), 2), SQLiteCache(str(tmp_path / 'cache.db'), 2)
+        assert first.revision('ns:1', 'ns:*') == '0.0'
+        first.set('a', 'ns:1', '0.0', b'{"a": 1}')
+        first.set('b', 'ns:2', '0.0', b'{"b": 1}')
+        assert second.get('a') == b'{"a": 1}'
+
+        second.bump(['ns:1'])
+        assert first.revision('ns:1', 'ns:*') == '0.1'
+        first.set('c', 'ns:2', '0.0', b'{}')
+        first.set('d', 'ns:2', '0.0', b'{}')
+        assert first.prune() == {'stale': 1, 'trimmed': 1}
+        assert first.get('a') is None and first.get('b') is None and first.get('d') == b'{}'
+
+        first.bump(['ns:*'])
+        assert second.revision('ns:2', 'ns:*') == '1.0'
+        assert first.prune()['stale'] == 2
@@ -0,0 +1,84 @@
+"""Tests for content-negotiated response compression"""
+import gzip
+import json
+import pytest
+import zlib
+from flask import Response
+from app.compression import compress_response, ENCODERS
+
+
+@pytest.fixture
+def tasks_url(auth_client, test_project):
+    """A board whose task list is comfortably above the compression threshold"""
+    project_id = test_project['id']
+    response = auth_client.post(f'/api/v1/projects/{project_id}/boards',
+        data=json.dumps({'title': 'Compression Board'}),
+        content_type='application/json'
+    )
+    url = f'/api/v1/projects/{project_id}/boards/{json.loads(response.data)["data"]["id"]}/tasks'
+    for i in range(20):
+        auth_client.post(url, data=json.dumps({'title': f'Task {i}', 'description': 'Lorem ipsum ' * 10}),
+                         content_type='application/json')
+    return url
+
+
+class TestCompression:
+    """Test encoding negotiation, thresholds and streaming"""
+
+    def test_identity_without_accept_encoding(self, auth_client, tasks_url):
+        """Should send the body as is when the client accepts no encoding"""
+        response = auth_client.get(tasks_url)
+        assert 'Content-Encoding' not in response.headers
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert len(json.loads(response.data)['data']) == 20
+
+    def test_gzip(self, auth_client, tasks_url):
+        """Should gzip large JSON bodies and set Content-Length to the compressed size"""
+        plain = auth_client.get(tasks_url).data
+        response = auth_client.get(tasks_url, headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert int(response.headers['Content-Length']) == len(response.data) < len(plain)
+        assert gzip.decompress(response.data) == plain
+
+    @pytest.mark.skipif('br' not in ENCODERS, reason='brotli not installed')
+    def test_prefers_server_order_on_ties(self, auth_client, tasks_url):
+        """Should pick brotli over gzip when both are equally acceptable"""
+        import brotli
+        plain = auth_client.get(tasks_url).data
+        response = auth_client.get(tasks_url, headers={'Accept-Encoding': 'gzip, deflate, br'})
+        assert response.headers['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.data) == plain
+
+    @pytest.mark.skipif('zstd' not in ENCODERS, reason='zstandard not installed')
+    def test_honours_quality_values(self, auth_client, tasks_url):
+        """Should follow the client's q-values and skip refused encodings"""
+        import zstandard
+        plain = auth_client.get(tasks_url).data
+        response = auth_client.get(tasks_url, headers={'Accept-Encoding': 'zstd;q=1, br;q=0.5, gzip;q=0'})
+        assert response.headers['Content-Encoding'] == 'zstd'
+        assert zstandard.ZstdDecompressor().decompressobj().decompress(response.data) == plain
+
+        response = auth_client.get(tasks_url, headers={'Accept-Encoding': 'gzip;q=0, identity'})
+        assert 'Content-Encoding' not in response.headers
+
+    def test_small_body_skipped(self, auth_client):
+        """Should not compress bodies below COMPRESS_MIN_SIZE"""
+        response = auth_client.get('/api/v1/auth/me', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+
+    def test_streamed_response(self, app):
+        """Should compress streamed bodies chunk by chunk without a Content-Length"""
+        lines = [json.dumps({'n': i}) + '\n' for i in range(200)]
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = compress_response(Response(iter(lines), mimetype='application/x-ndjson'))
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert 'Content-Length' not in response.headers
+            body = b''.join(response.response)
+        assert zlib.decompress(body, 31).decode() == ''.join(lines)
+
+    def test_already_encoded_left_alone(self, app):
+        """Should not touch responses that already have a Content-Encoding"""
+        body = gzip.compress(b'x' * 5000)
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = Response(body, mimetype='application/json', headers={'Content-Encoding': 'gzip'})
+            assert compress_response(response).get_data() == body
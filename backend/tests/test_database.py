@@ -0,0 +1,58 @@
+"""Tests for database URL and engine configuration"""
+from flask import Flask
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+
+class TestDatabaseConfig:
+    """Test PostgreSQL configuration helpers"""
+
+    def test_normalize_database_url(self):
+        """Should pin PostgreSQL URLs to the psycopg driver"""
+        from app.database import normalize_database_url
+
+        assert normalize_database_url('postgres://u:p@db/app') == 'postgresql+psycopg://u:p@db/app'
+        assert normalize_database_url('postgresql://u:p@db/app') == 'postgresql+psycopg://u:p@db/app'
+        assert normalize_database_url('sqlite:///taskboard.db') == 'sqlite:///taskboard.db'
+
+    def test_postgres_pool_options(self):
+        """Should configure pooling and a statement timeout for PostgreSQL"""
+        from app.database import configure_engine_options
+
+        app = Flask(__name__)
+        app.config.update({
+            'SQLALCHEMY_DATABASE_URI': 'postgres://u:p@db/app',
+            'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': 20},
+            'DB_POOL_SIZE': 5,
+            'DB_MAX_OVERFLOW': 10,
+            'DB_POOL_TIMEOUT': 30,
+            'DB_POOL_RECYCLE': 1800,
+            'DB_POOL_PRE_PING': True,
+            'DB_STATEMENT_TIMEOUT': 15000
+        })
+        configure_engine_options(app)
+
+        options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+        assert app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql+psycopg://')
+        assert options['pool_size'] == 20
+        assert options['max_overflow'] == 10
+        assert options['pool_pre_ping'] is True
+        assert options['connect_args'] == {'options': '-c statement_timeout=15000'}
+
+    def test_postgres_schema_uses_jsonb(self, app):
+        """Should store JSON columns as JSONB with GIN indexes on PostgreSQL"""
+        from app.models.task import Task
+        from app.models.template import TemplateBlob
+
+        dialect = postgresql.dialect()
+        assert 'custom_fields JSONB' in str(CreateTable(Task.__table__).compile(dialect=dialect))
+        assert 'data JSONB' in str(CreateTable(TemplateBlob.__table__).compile(dialect=dialect))
+        index = next(i for i in Task.__table__.indexes if i.name == 'ix_tasks_custom_fields')
+        assert 'USING gin' in str(CreateIndex(index).compile(dialect=dialect))
+
+    def test_custom_fields_accept_encoded_strings(self, app):
+        """Should parse custom fields given as a JSON-encoded string"""
+        from app.models.task import Task
+
+        task = Task(custom_fields='{"points": 3}')
+        assert task.get_custom_fields() == {'points': 3}
@@ -0,0 +1,133 @@
+"""Tests for soft deletion, batched purging and cascading foreign keys"""
+import pytest
+import json
+import sqlite3
+from datetime import datetime
+from app import create_app, db
+from app.models import Project, Board, Stage, Task, List, ListItem
+from app.services.projects import purge, project_purge_steps, purge_deleted
+
+
+@pytest.fixture
+def populated_project(auth_client, test_project):
+    """Give the test project a board with tasks and a list with items"""
+    project_id = test_project['id']
+    base = f'/api/v1/projects/{project_id}'
+    board = json.loads(auth_client.post(f'{base}/boards', data=json.dumps({'title': 'Board'}),
+                                        content_type='application/json').data)['data']
+    for i in range(5):
+        auth_client.post(f'{base}/boards/{board["id"]}/tasks', data=json.dumps({'title': f'Task {i}'}),
+                         content_type='application/json')
+    list_obj = json.loads(auth_client.post(f'{base}/lists', data=json.dumps({'title': 'List'}),
+                                           content_type='application/json').data)['data']
+    for i in range(3):
+        auth_client.post(f'{base}/lists/{list_obj["id"]}/items', data=json.dumps({'content': f'Item {i}'}),
+                         content_type='application/json')
+    return {'id': project_id, 'board_id': board['id'], 'list_id': list_obj['id']}
+
+
+def remaining_rows():
+    return {model.__name__: model.query.count() for model in (Project, Board, Stage, Task, List, ListItem)}
+
+
+class TestSoftDelete:
+    """Test that deleted projects and boards vanish at once and are purged later"""
+
+    def test_delete_project_purges_rows(self, auth_client, populated_project):
+        """Should hide the project and purge every row it owns"""
+        response = auth_client.delete(f'/api/v1/projects/{populated_project["id"]}')
+        assert response.status_code == 200
+        job_id = response.get_json()['data']['job_id']
+
+        assert auth_client.get(f'/api/v1/projects/{populated_project["id"]}').status_code == 404
+        job = auth_client.get(f'/api/v1/jobs/{job_id}').get_json()['data']
+        assert job['status'] == 'succeeded'
+        assert job['result']['deleted'] == 1 + 1 + 3 + 5 + 1 + 3
+        assert remaining_rows() == {'Project': 0, 'Board': 0, 'Stage': 0, 'Task': 0, 'List': 0, 'ListItem': 0}
+
+    def test_deleted_board_hidden(self, auth_client, populated_project):
+        """Should drop a deleted board from listings, counts, copies and direct access"""
+        project_id = populated_project['id']
+        board_id = populated_project['board_id']
+        Board.query.filter_by(id=board_id).update({Board.deleted_at: datetime.utcnow()})
+        db.session.commit()
+
+        assert auth_client.get(f'/api/v1/projects/{project_id}/boards').get_json()['data'] == []
+        assert auth_client.get(f'/api/v1/projects/{project_id}/boards/{board_id}').status_code == 404
+        assert auth_client.get(f'/api/v1/projects/{project_id}').get_json()['data']['board_count'] == 0
+
+        response = auth_client.post(f'/api/v1/projects/{project_id}/duplicate')
+        assert response.get_json()['data']['boards'] == []
+
+    def test_purge_in_batches(self, app, populated_project):
+        """Should delete in small committed batches and finish with nothing left"""
+        Project.query.filter_by(id=populated_project['id']).update({Project.deleted_at: datetime.utcnow()})
+        db.session.commit()
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        db.event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            assert purge(project_purge_steps(populated_project['id']), batch_size=2) == 14
+        finally:
+            db.event.remove(db.engine, 'before_cursor_execute', listener)
+
+        deletes = [s for s in statements if s.startswith('DELETE')]
+        assert len(deletes) > 7  # tasks, stages and items each take several batches
+        assert remaining_rows()['Project'] == 0
+
+    def test_sweep_purges_leftovers(self, app, populated_project):
+        """Should purge soft-deleted projects whose purge job never ran"""
+        Project.query.filter_by(id=populated_project['id']).update({Project.deleted_at: datetime.utcnow()})
+        db.session.commit()
+
+        assert purge_deleted(grace_seconds=0) == {'projects': 1, 'boards': 0, 'deleted': 14}
+        assert sum(remaining_rows().values()) == 0
+
+
+class TestCascadingForeignKeys:
+    """Test ON DELETE CASCADE in the database and the upgrade of existing schemas"""
+
+    def test_database_cascade(self, app, populated_project):
+        """Should remove a project's contents when its row is deleted directly"""
+        db.session.delete(db.session.get(Project, populated_project['id']))
+        db.session.commit()
+        assert sum(remaining_rows().values()) == 0
+
+    @pytest.mark.usefixtures('sqlite_only')
+    def test_upgrade_legacy_sqlite_schema(self, tmp_path):
+        """Should rebuild tables created without ON DELETE rules and keep their rows"""
+        path = tmp_path / 'legacy.db'
+        conn = sqlite3.connect(path)
+        conn.executescript('''
+            CREATE TABLE users (id INTEGER PRIMARY KEY, google_id VARCHAR(255), email VARCHAR(255),
+                                name VARCHAR(255));
+            CREATE TABLE projects (id INTEGER PRIMARY KEY, owner_id INTEGER NOT NULL REFERENCES users (id),
+                                   name VARCHAR(255) NOT NULL);
+            CREATE TABLE lists (id INTEGER PRIMARY KEY, project_id INTEGER NOT NULL REFERENCES projects (id),
+                                title VARCHAR(255) NOT NULL);
+            CREATE TABLE list_items (id INTEGER PRIMARY KEY, list_id INTEGER NOT NULL REFERENCES lists (id),
+                                     content TEXT NOT NULL);
+            INSERT INTO users (id, google_id, email, name) VALUES (1, 'g', 'legacy@example.com', 'Legacy');
+            INSERT INTO projects (id, owner_id, name) VALUES (1, 1, 'Legacy');
+            INSERT INTO lists (id, project_id, title) VALUES (1, 1, 'List');
+            INSERT INTO list_items (id, list_id, content) VALUES (1, 1, 'Item');
+        ''')
+        conn.close()
+
+        legacy = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+            'MAINTENANCE_ENABLED': False
+        })
+        with legacy.app_context():
+            inspector = db.inspect(db.engine)
+            fk = inspector.get_foreign_keys('list_items')[0]
+            assert fk['options'] == {'ondelete': 'CASCADE'}
+            assert 'ix_list_items_list_id' in {i['name'] for i in inspector.get_indexes('list_items')}
+            assert ListItem.query.one().content == 'Item'
+
+            db.session.delete(db.session.get(Project, 1))
+            db.session.commit()
+            assert ListItem.query.count() == 0
+            db.engine.dispose()
@@ -0,0 +1,144 @@
+"""Tests for project and board duplication"""
+import pytest
+import json
+from itertools import count
+from sqlalchemy import event
+
+
+class TestDuplicateAPI:
+    """Test /api/v1/projects/:id/duplicate and /boards/:id/duplicate endpoints"""
+
+    @pytest.fixture
+    def populated_project(self, auth_client, test_project, auth_user):
+        """Create a project with two boards holding assigned tasks and a checked list item"""
+        project_id = test_project['id']
+        boards = []
+        for title in ['Alpha', 'Beta']:
+            response = auth_client.post(f'/api/v1/projects/{project_id}/boards',
+                data=json.dumps({'title': title}),
+                content_type='application/json'
+            )
+            board = json.loads(response.data)['data']
+            for stage in board['stages']:
+                auth_client.post(f'/api/v1/projects/{project_id}/boards/{board["id"]}/tasks',
+                    data=json.dumps({
+                        'title': f'{title} {stage["name"]}',
+                        'stage_id': stage['id'],
+                        'assigned_to': auth_user['id']
+                    }),
+                    content_type='application/json'
+                )
+            boards.append(board)
+
+        response = auth_client.post(f'/api/v1/projects/{project_id}/lists',
+            data=json.dumps({'title': 'Checklist'}),
+            content_type='application/json'
+        )
+        list_id = json.loads(response.data)['data']['id']
+        response = auth_client.post(f'/api/v1/projects/{project_id}/lists/{list_id}/items',
+            data=json.dumps({'content': 'Done already', 'assigned_to': auth_user['id']}),
+            content_type='application/json'
+        )
+        item_id = json.loads(response.data)['data']['id']
+        auth_client.put(f'/api/v1/projects/{project_id}/lists/{list_id}/items/{item_id}/toggle')
+
+        return {'project_id': project_id, 'boards': boards, 'list_id': list_id}
+
+    def _tasks_by_stage(self, auth_client, project_id, board):
+        response = auth_client.get(f'/api/v1/projects/{project_id}/boards/{board["id"]}/tasks')
+        tasks = json.loads(response.data)['data']
+        stage_names = {s['id']: s['name'] for s in board['stages']}
+        return {t['title']: (stage_names.get(t['stage_id']), t['assigned_to']) for t in tasks}
+
+    def test_duplicate_board(self, auth_client, populated_project, auth_user):
+        """Should copy stages and tasks, pointing tasks at the copied stages"""
+        project_id = populated_project['project_id']
+        original = populated_project['boards'][0]
+
+        response = auth_client.post(f'/api/v1/projects/{project_id}/boards/{original["id"]}/duplicate')
+        assert response.status_code == 201
+        copy = json.loads(response.data)['data']
+        assert copy['id'] != original['id']
+        assert copy['title'] == 'Alpha (copy)'
+        assert [s['name'] for s in copy['stages']] == [s['name'] for s in original['stages']]
+        assert not {s['id'] for s in copy['stages']} & {s['id'] for s in original['stages']}
+
+        assert self._tasks_by_stage(auth_client, project_id, copy) == \
+            self._tasks_by_stage(auth_client, project_id, original)
+
+    def test_duplicate_board_without_assignees(self, auth_client, populated_project):
+        """Should clear assignees when keep_assignees is false"""
+        project_id = populated_project['project_id']
+        original = populated_project['boards'][1]
+
+        response = auth_client.post(f'/api/v1/projects/{project_id}/boards/{original["id"]}/duplicate',
+            data=json.dumps({'keep_assignees': False, 'title': 'Fresh'}),
+            content_type='application/json'
+        )
+        copy = json.loads(response.data)['data']
+        assert copy['title'] == 'Fresh'
+        tasks = self._tasks_by_stage(auth_client, project_id, copy)
+        assert len(tasks) == 3
+        assert all(assignee is None for _, assignee in tasks.values())
+
+    def test_duplicate_project(self, auth_client, populated_project):
+        """Should copy every board and list into a new project"""
+        project_id = populated_project['project_id']
+
+        response = auth_client.post(f'/api/v1/projects/{project_id}/duplicate',
+            data=json.dumps({'keep_checked': False}),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        copy = json.loads(response.data)['data']
+        assert copy['id'] != project_id
+        assert copy['name'].endswith(' (copy)')
+        assert [b['title'] for b in copy['boards']] == ['Alpha', 'Beta']
+
+        for original, board in zip(populated_project['boards'], copy['boards']):
+            response = auth_client.get(f'/api/v1/projects/{copy["id"]}/boards/{board["id"]}')
+            board = json.loads(response.data)['data']
+            assert self._tasks_by_stage(auth_client, copy['id'], board) == \
+                self._tasks_by_stage(auth_client, project_id, original)
+
+        list_id = copy['lists'][0]['id']
+        response = auth_client.get(f'/api/v1/projects/{copy["id"]}/lists/{list_id}/items')
+        items = json.loads(response.data)['data']
+        assert [(i['content'], i['is_checked']) for i in items] == [('Done already', False)]
+        assert items[0]['assigned_to'] is not None
+
+    def test_duplicate_project_through_id_map(self, app, monkeypatch, auth_client, populated_project):
+        """Should remap children through the id map when new ids do not follow the select order"""
+        from app import db
+        from app.services import duplicate
+
+        # Stand-ins for the PostgreSQL sequence functions, handing out ids in reverse
+        sequences = {}
+
+        def register(dbapi_connection, connection_record):
+            dbapi_connection.create_function('pg_get_serial_sequence', 2, lambda table, column: table)
+            dbapi_connection.create_function('nextval', 1, lambda name: next(sequences.setdefault(name, count(100000, -1))))
+
+        db.engine.dispose()
+        event.listen(db.engine, 'connect', register)
+        monkeypatch.setattr(duplicate, '_inserts_follow_select_order', lambda: False)
+
+        project_id = populated_project['project_id']
+        response = auth_client.post(f'/api/v1/projects/{project_id}/duplicate')
+        assert response.status_code == 201
+        copy = json.loads(response.data)['data']
+        assert set(sequences) == {'boards', 'stages', 'lists'}
+
+        boards = {b['title']: b for b in copy['boards']}
+        for original in populated_project['boards']:
+            response = auth_client.get(f'/api/v1/projects/{copy["id"]}/boards/{boards[original["title"]]["id"]}')
+            board = json.loads(response.data)['data']
+            assert self._tasks_by_stage(auth_client, copy['id'], board) == \
+                self._tasks_by_stage(auth_client, project_id, original)
+        response = auth_client.get(f'/api/v1/projects/{copy["id"]}/lists/{copy["lists"][0]["id"]}/items')
+        assert [i['content'] for i in json.loads(response.data)['data']] == ['Done already']
+
+    def test_duplicate_project_not_found(self, auth_client):
+        """Should return 404 for a project the user cannot see"""
+        response = auth_client.post('/api/v1/projects/99999/duplicate')
+        assert response.status_code == 404
@@ -0,0 +1,88 @@
+"""Tests for the streaming NDJSON project export"""
+import io
+import json
+from datetime import date
+from app import db
+from app.models import Board, Stage, Task, List, ListItem
+from app.services.export import export_ndjson
+
+
+def _fill(project_id, user_id, tasks=3, items=4):
+    board = Board(project_id=project_id, title='Launch', color_theme='green')
+    db.session.add(board)
+    db.session.flush()
+    todo = Stage(board_id=board.id, name='To Do', position=0)
+    done = Stage(board_id=board.id, name='Done', position=1, color='#10B981')
+    db.session.add_all([todo, done])
+    db.session.flush()
+    for i in range(tasks):
+        db.session.add(Task(board_id=board.id, stage_id=done.id if i % 2 else todo.id, title=f'Task {i}',
+                            position=i, custom_fields={'points': i}, due_date=date(2026, 12, 1 + i % 28),
+                            assigned_to=user_id if i == 0 else None))
+    packing = List(project_id=project_id, title='Packing')
+    db.session.add(packing)
+    db.session.flush()
+    for i in range(items):
+        db.session.add(ListItem(list_id=packing.id, content=f'Item {i}', position=i, is_checked=i % 2 == 0))
+    db.session.commit()
+
+
+def _records(body):
+    return [json.loads(line) for line in body.splitlines()]
+
+
+class TestExport:
+    """Test the export stream and its round trip through an import"""
+
+    def test_export_round_trip(self, auth_client, auth_user, test_project):
+        """Should stream parents before children and import back into an identical project"""
+        _fill(test_project['id'], auth_user['id'])
+        response = auth_client.get(f'/api/v1/projects/{test_project["id"]}/export')
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'application/x-ndjson'
+        assert 'attachment' in response.headers['Content-Disposition']
+
+        body = response.get_data(as_text=True)
+        records = _records(body)
+        assert [r['type'] for r in records] == ['board'] + ['stage'] * 2 + ['task'] * 3 + ['list'] + ['list_item'] * 4
+        assert records[3]['assignee'] == 'test@example.com'
+        assert records[3]['due_date'] == '2026-12-01'
+
+        response = auth_client.post('/api/v1/projects', data=json.dumps({'name': 'Copy'}),
+                                    content_type='application/json')
+        copy_id = json.loads(response.data)['data']['id']
+        response = auth_client.post(f'/api/v1/projects/{copy_id}/import',
+            data={'file': (io.BytesIO(body.encode()), 'export.ndjson')},
+            content_type='multipart/form-data'
+        )
+        assert response.status_code == 201
+        result = json.loads(response.data)['data']
+        assert (result['boards'], result['stages'], result['tasks'], result['lists'], result['list_items']) == (1, 2, 3, 1, 4)
+
+        def strip_ids(record):
+            return {k: v for k, v in record.items() if k not in ('id', 'board_id', 'stage_id', 'list_id')}
+
+        reexported = _records(auth_client.get(f'/api/v1/projects/{copy_id}/export').get_data(as_text=True))
+        assert [strip_ids(r) for r in reexported] == [strip_ids(r) for r in records]
+
+    def test_export_chunks(self, app, auth_user, test_project):
+        """Should yield the stream in chunks instead of one document"""
+        _fill(test_project['id'], auth_user['id'], tasks=50, items=50)
+        chunks = list(export_ndjson(test_project['id'], chunk_size=1024))
+        assert len(chunks) > 3
+        assert all(chunk.endswith('\n') for chunk in chunks)
+        assert len(_records(''.join(chunks))) == 1 + 2 + 50 + 1 + 50
+
+    def test_export_cli(self, app, runner, auth_user, test_project, tmp_path):
+        """Should write the export to a file that `flask import` reads back"""
+        _fill(test_project['id'], auth_user['id'])
+        path = tmp_path / 'project.ndjson'
+        result = runner.invoke(args=['export', str(test_project['id']), '--output', str(path)])
+        assert result.exit_code == 0, result.output
+        assert len(path.read_text().splitlines()) == 11
+
+        result = runner.invoke(args=['import', str(path), '--project-id', str(test_project['id'])])
+        assert result.exit_code == 0, result.output
+        assert Task.query.count() == 6
+        assert runner.invoke(args=['export', '999999']).exit_code != 0
@@ -0,0 +1,118 @@
+"""Tests for group-commit write coalescing"""
+import pytest
+import json
+import threading
+
+
+class TestGroupCommit:
+    """Test batching of small writes into shared commits"""
+
+    @pytest.fixture
+    def committer(self, app):
+        app.config['GROUP_COMMIT'] = True
+        app.config['GROUP_COMMIT_WINDOW'] = 0.05
+        committer = app.extensions['group_commit']
+        committer.window = 0.05
+        return committer
+
+    @pytest.fixture
+    def items(self, auth_client, test_project):
+        project_id = test_project['id']
+        response = auth_client.post(f'/api/v1/projects/{project_id}/lists',
+            data=json.dumps({'title': 'Groceries'}),
+            content_type='application/json'
+        )
+        list_id = json.loads(response.data)['data']['id']
+        item_ids = []
+        for i in range(8):
+            response = auth_client.post(f'/api/v1/projects/{project_id}/lists/{list_id}/items',
+                data=json.dumps({'content': f'Item {i}'}),
+                content_type='application/json'
+            )
+            item_ids.append(json.loads(response.data)['data']['id'])
+        return {'base': f'/api/v1/projects/{project_id}/lists/{list_id}/items', 'ids': item_ids}
+
+    def _concurrently(self, calls):
+        results = [None] * len(calls)
+        errors = [None] * len(calls)
+
+        def run(i):
+            try:
+                results[i] = calls[i]()
+            except Exception as exc:
+                errors[i] = exc
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(calls))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results, errors
+
+    def test_concurrent_toggles_share_commits(self, app, committer, items, jwt_headers):
+        """Should batch concurrent toggles and return each request its own item"""
+        def toggle(item_id):
+            with app.test_client() as client:
+                response = client.put(f'{items["base"]}/{item_id}/toggle', headers=jwt_headers)
+                return response.status_code, json.loads(response.data)['data']
+
+        results, errors = self._concurrently([lambda i=i: toggle(i) for i in items['ids']])
+        assert errors == [None] * len(items['ids'])
+        assert [(status, data['id'], data['is_checked']) for status, data in results] == \
+            [(200, i, True) for i in items['ids']]
+        assert committer.stats['operations'] == len(items['ids'])
+        assert committer.stats['batches'] < len(items['ids'])
+
+    def test_failed_operation_isolated(self, app, committer, items):
+        """Should roll back only the failing operation in a batch"""
+        from app.models.list_item import ListItem
+
+        def rename(session, item_id, content):
+            session.get(ListItem, item_id).content = content
+            session.flush()
+            if content == 'boom':
+                raise ValueError('rejected')
+            return content
+
+        first, second = items['ids'][:2]
+        results, errors = self._concurrently([
+            lambda: committer.submit(rename, first, 'renamed'),
+            lambda: committer.submit(rename, second, 'boom')
+        ])
+        assert results[0] == 'renamed'
+        assert isinstance(errors[1], ValueError)
+
+        from app import db
+        db.session.expire_all()
+        assert db.session.get(ListItem, first).content == 'renamed'
+        assert db.session.get(ListItem, second).content == 'Item 1'
+
+    def test_move_task_through_committer(self, auth_client, committer, test_project):
+        """Should append a moved task after the last task in its new stage"""
+        project_id = test_project['id']
+        response = auth_client.post(f'/api/v1/projects/{project_id}/boards',
+            data=json.dumps({'title': 'Board'}),
+            content_type='application/json'
+        )
+        board = json.loads(response.data)['data']
+        todo, doing = board['stages'][0]['id'], board['stages'][1]['id']
+        base = f'/api/v1/projects/{project_id}/boards/{board["id"]}/tasks'
+
+        task_ids = []
+        for title in ['One', 'Two']:
+            response = auth_client.post(base,
+                data=json.dumps({'title': title, 'stage_id': todo}),
+                content_type='application/json'
+            )
+            task_ids.append(json.loads(response.data)['data']['id'])
+
+        positions = []
+        for task_id in task_ids:
+            response = auth_client.put(f'{base}/{task_id}/move',
+                data=json.dumps({'stage_id': doing}),
+                content_type='application/json'
+            )
+            data = json.loads(response.data)['data']
+            assert data['stage_id'] == doing
+            positions.append(data['position'])
+        assert positions == [0, 1]
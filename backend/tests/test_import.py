@@ -0,0 +1,162 @@
+"""Tests for streaming Trello, CSV and NDJSON imports"""
+import io
+import json
+import pytest
+from werkzeug.test import EnvironBuilder
+from app import db
+from app.models import Board, Task, List, ListItem, Stage, Job
+from app.services import importer
+from app.services.jobs import JobContext
+
+TRELLO = {
+    'name': 'Website relaunch',
+    'actions': [{'type': 'createCard'}] * 50,
+    'cards': [
+        {'id': 'c1', 'name': 'Write copy', 'desc': 'Home page', 'idList': 'l2', 'pos': 2048, 'closed': False,
+         'due': '2026-11-02T12:00:00.000Z', 'labels': [{'name': 'content', 'color': 'green'}]},
+        {'id': 'c2', 'name': 'Pick fonts', 'idList': 'l1', 'pos': 1024, 'closed': False, 'labels': []},
+        {'id': 'c3', 'name': 'Old idea', 'idList': 'l1', 'pos': 4096, 'closed': True},
+        {'id': 'c4', 'name': 'In archived list', 'idList': 'l3', 'pos': 1, 'closed': False}
+    ],
+    'lists': [
+        {'id': 'l2', 'name': 'Doing', 'pos': 32768, 'closed': False},
+        {'id': 'l1', 'name': 'Backlog', 'pos': 16384, 'closed': False},
+        {'id': 'l3', 'name': 'Archived', 'pos': 65536, 'closed': True}
+    ]
+}
+
+CSV = (
+    'Title,Status,Due,Assignee,Priority\n'
+    'Book venue,Planned,2026-12-01,test@example.com,high\n'
+    'Send invites,Planned,,stranger@example.com,\n'
+    'Order cake,Done,not a date,,low\n'
+)
+
+
+def _ndjson(items=5):
+    records = [
+        {'type': 'board', 'id': 10, 'title': 'Imported', 'color_theme': 'green'},
+        {'type': 'stage', 'id': 100, 'board_id': 10, 'name': 'Open', 'position': 0},
+        {'type': 'stage', 'id': 101, 'board_id': 10, 'name': 'Closed', 'position': 1},
+        {'type': 'task', 'board_id': 10, 'stage_id': 101, 'title': 'Done thing', 'custom_fields': {'points': 3}},
+        {'type': 'task', 'board_id': 10, 'stage_id': 999, 'title': 'Unknown stage lands in the first'},
+        {'type': 'list', 'id': 20, 'title': 'Packing'}
+    ] + [{'type': 'list_item', 'list_id': 20, 'content': f'Item {i}', 'position': i, 'is_checked': i % 2 == 0}
+         for i in range(items)]
+    return '\n'.join(json.dumps(r) for r in records) + '\n'
+
+
+def _upload(client, project_id, content, filename, query='', **form):
+    return client.post(f'/api/v1/projects/{project_id}/import{query}',
+        data={'file': (io.BytesIO(content.encode()), filename), **form},
+        content_type='multipart/form-data'
+    )
+
+
+class TestImport:
+    """Test mapping of each format and the batched, resumable writer"""
+
+    def test_csv_upload(self, auth_client, auth_user, test_project):
+        """Should create a stage per status and map assignees, dates and extra columns"""
+        response = _upload(auth_client, test_project['id'], CSV, 'party.csv', board_title='Party')
+        assert response.status_code == 201
+        result = json.loads(response.data)['data']
+        assert (result['boards'], result['stages'], result['tasks']) == (1, 2, 3)
+
+        board = db.session.get(Board, result['board_ids'][0])
+        assert board.title == 'Party'
+        assert [s.name for s in Stage.query.filter_by(board_id=board.id).order_by(Stage.position)] == ['Planned', 'Done']
+        tasks = {t.title: t for t in Task.query.filter_by(board_id=board.id)}
+        assert tasks['Book venue'].assigned_to == auth_user['id']
+        assert tasks['Book venue'].due_date.isoformat() == '2026-12-01'
+        assert tasks['Book venue'].custom_fields == {'Priority': 'high'}
+        assert tasks['Send invites'].assigned_to is None
+        assert tasks['Order cake'].due_date is None
+
+    def test_trello_job(self, auth_client, test_project):
+        """Should map open Trello lists to stages in order and open cards to tasks, as a job"""
+        response = _upload(auth_client, test_project['id'], json.dumps(TRELLO), 'board.json', query='?async=1')
+        assert response.status_code == 202
+        job = json.loads(auth_client.get(response.headers['Location']).data)['data']
+        assert job['status'] == 'succeeded'
+        assert job['result']['tasks'] == 2
+
+        board = db.session.get(Board, job['result']['board_ids'][0])
+        assert board.title == 'Website relaunch'
+        stages = Stage.query.filter_by(board_id=board.id).order_by(Stage.position).all()
+        assert [s.name for s in stages] == ['Backlog', 'Doing']
+        copy = Task.query.filter_by(board_id=board.id, title='Write copy').one()
+        assert copy.stage_id == stages[1].id
+        assert copy.custom_fields == {'labels': ['content']}
+        assert copy.due_date.isoformat() == '2026-11-02'
+
+    def test_ndjson_cli(self, app, runner, test_project, tmp_path):
+        """Should import boards, stages, tasks, lists and items from the export format"""
+        path = tmp_path / 'export.ndjson'
+        path.write_text(_ndjson())
+        result = runner.invoke(args=['import', str(path), '--project-id', str(test_project['id']),
+                                     '--batch-size', '2'])
+        assert result.exit_code == 0, result.output
+        counts = json.loads(result.output.strip().splitlines()[-1])
+        assert (counts['boards'], counts['stages'], counts['tasks'], counts['lists'], counts['list_items']) == (1, 2, 2, 1, 5)
+
+        board = Board.query.filter_by(project_id=test_project['id'], title='Imported').one()
+        first_stage = Stage.query.filter_by(board_id=board.id, name='Open').one()
+        assert Task.query.filter_by(title='Unknown stage lands in the first').one().stage_id == first_stage.id
+        packing = List.query.filter_by(project_id=test_project['id'], title='Packing').one()
+        assert ListItem.query.filter_by(list_id=packing.id, is_checked=True).count() == 3
+
+    def test_resume_after_interruption(self, app, auth_user, test_project, tmp_path, monkeypatch):
+        """Should continue after the last committed batch without duplicating rows"""
+        path = tmp_path / 'export.ndjson'
+        path.write_text(_ndjson(items=9))
+        job = Job(job_type='import', payload={}, owner_id=auth_user['id'], status='running', worker_id='test:1')
+        db.session.add(job)
+        db.session.commit()
+
+        read = importer.READERS['ndjson']
+
+        def interrupted(source, board_title=None):
+            for n, record in enumerate(read(source, board_title)):
+                if n == 11:
+                    raise RuntimeError('worker killed')
+                yield record
+
+        monkeypatch.setitem(importer.READERS, 'ndjson', interrupted)
+        with pytest.raises(RuntimeError):
+            importer.import_file(str(path), 'ndjson', test_project['id'], batch_size=3, ctx=JobContext(job))
+        db.session.rollback()
+        assert 0 < ListItem.query.count() < 9
+
+        monkeypatch.setitem(importer.READERS, 'ndjson', read)
+        db.session.refresh(job)
+        result = importer.import_file(str(path), 'ndjson', test_project['id'], batch_size=3, ctx=JobContext(job))
+        assert (result['boards'], result['tasks'], result['list_items']) == (1, 2, 9)
+        assert Board.query.filter_by(title='Imported').count() == 1
+        assert ListItem.query.count() == 9
+
+    def test_upload_limits(self, app, auth_client, test_project):
+        """Should run large uploads as jobs and enforce the size limit without a Content-Length"""
+        app.config['IMPORT_INLINE_MAX_BYTES'] = 100
+        response = _upload(auth_client, test_project['id'], _ndjson(), 'big.ndjson')
+        assert response.status_code == 202
+        assert json.loads(auth_client.get(response.headers['Location']).data)['data']['status'] == 'succeeded'
+
+        app.config['IMPORT_MAX_BYTES'] = 100
+        environ = EnvironBuilder(path=f'/api/v1/projects/{test_project["id"]}/import', method='POST',
+                                 data={'file': (io.BytesIO(_ndjson().encode()), 'chunked.ndjson')},
+                                 content_type='multipart/form-data').get_environ()
+        del environ['CONTENT_LENGTH']
+        environ['wsgi.input_terminated'] = True  # chunked transfer encoding
+        response = auth_client.open(environ)
+        assert response.status_code == 413
+        assert json.loads(response.data)['error']['code'] == 'PAYLOAD_TOO_LARGE'
+        assert Board.query.count() == 1
+
+    def test_invalid_file(self, auth_client, test_project):
+        """Should reject unknown formats and files that do not parse"""
+        response = _upload(auth_client, test_project['id'], 'x', 'notes.txt')
+        assert response.status_code == 400
+        response = _upload(auth_client, test_project['id'], 'Name;Other\n', 'tasks.csv', format='ndjson')
+        assert response.status_code == 400
+        assert 'not valid JSON' in json.loads(response.data)['error']['message']
@@ -0,0 +1,147 @@
+"""Tests for background jobs"""
+import pytest
+import json
+import time
+from datetime import datetime
+
+
+class TestJobs:
+    """Test /api/v1/jobs and asynchronous long-running endpoints"""
+
+    @pytest.fixture
+    def project_template(self, auth_client):
+        response = auth_client.get('/api/v1/templates/projects')
+        return json.loads(response.data)['data'][0]
+
+    def test_apply_template_async(self, auth_client, project_template):
+        """Should accept the request and report the new project on the job"""
+        response = auth_client.post(f'/api/v1/templates/projects/{project_template["id"]}/apply?async=1',
+            data=json.dumps({'name': 'Background Trip'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 202
+        job = json.loads(response.data)['data']
+        assert response.headers['Location'] == f'/api/v1/jobs/{job["id"]}'
+
+        response = auth_client.get(f'/api/v1/jobs/{job["id"]}')
+        assert response.status_code == 200
+        job = json.loads(response.data)['data']
+        assert job['status'] == 'succeeded'
+        assert job['progress']['percent'] == 100.0
+
+        response = auth_client.get(f'/api/v1/projects/{job["result"]["project_id"]}')
+        project = json.loads(response.data)['data']
+        assert project['name'] == 'Background Trip'
+        assert project['board_count'] == project_template['summary']['board_template_ids']
+
+    def test_delete_project_async(self, auth_client, test_project):
+        """Should delete a project and its contents through a job"""
+        project_id = test_project['id']
+        auth_client.post(f'/api/v1/projects/{project_id}/boards',
+            data=json.dumps({'title': 'Board'}),
+            content_type='application/json'
+        )
+
+        response = auth_client.delete(f'/api/v1/projects/{project_id}',
+            headers={'Prefer': 'respond-async'}
+        )
+        assert response.status_code == 202
+        job_id = json.loads(response.data)['data']['id']
+
+        response = auth_client.get(f'/api/v1/jobs/{job_id}')
+        assert json.loads(response.data)['data']['status'] == 'succeeded'
+        assert auth_client.get(f'/api/v1/projects/{project_id}').status_code == 404
+
+    def test_job_hidden_from_other_users(self, app, auth_client, project_template):
+        """Should return 404 for a job owned by another user"""
+        from app import db
+        from app.models.job import Job
+        from app.models.user import User
+
+        other = User(google_id='other-google-id', email='other@example.com', name='Other')
+        db.session.add(other)
+        db.session.commit()
+        job = Job(job_type='delete_project', owner_id=other.id, payload={'project_id': 0})
+        db.session.add(job)
+        db.session.commit()
+
+        response = auth_client.get(f'/api/v1/jobs/{job.id}')
+        assert response.status_code == 404
+
+    def test_interrupted_job_requeued(self, app, auth_user):
+        """Should requeue a job whose worker process is gone and fail it after max attempts"""
+        from app import db
+        from app.models.job import Job
+        from app.services.jobs import recover_interrupted_jobs, _worker_id
+
+        host = _worker_id().rpartition(':')[0]
+        retry = Job(job_type='delete_project', owner_id=auth_user['id'], status='running',
+                    worker_id=f'{host}:999999999', attempts=1)
+        exhausted = Job(job_type='delete_project', owner_id=auth_user['id'], status='running',
+                        worker_id=f'{host}:999999999', attempts=3)
+        mine = Job(job_type='delete_project', owner_id=auth_user['id'], status='running',
+                   worker_id=_worker_id(), attempts=1, heartbeat_at=datetime.utcnow())
+        db.session.add_all([retry, exhausted, mine])
+        db.session.commit()
+
+        assert recover_interrupted_jobs(stale_after=300, max_attempts=3, running={mine.id}) == 2
+        assert db.session.get(Job, retry.id).status == 'queued'
+        assert db.session.get(Job, exhausted.id).status == 'failed'
+        assert db.session.get(Job, mine.id).status == 'running'
+
+        # Claimed by this process but no longer executing: left over, requeue it
+        assert recover_interrupted_jobs(stale_after=300, max_attempts=3) == 1
+        assert db.session.get(Job, mine.id).status == 'queued'
+
+    def test_runner_executes_queued_job(self, app, auth_client, test_project):
+        """Should run queued jobs on the background worker pool"""
+        app.config.update({'JOBS_EAGER': False, 'JOBS_POLL_INTERVAL': 0.05})
+        runner = app.extensions['job_runner']
+        try:
+            response = auth_client.delete(f'/api/v1/projects/{test_project["id"]}?async=1')
+            assert response.status_code == 202
+            job_id = json.loads(response.data)['data']['id']
+
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                job = json.loads(auth_client.get(f'/api/v1/jobs/{job_id}').data)['data']
+                if job['status'] in ('succeeded', 'failed'):
+                    break
+                time.sleep(0.05)
+            assert job['status'] == 'succeeded'
+        finally:
+            runner.stop()
+
+    def test_heartbeat_and_ownership(self, app, auth_user, monkeypatch):
+        """Should refresh the heartbeat during a long step and not finish a job another worker took over"""
+        from app import db
+        from app.models.job import Job
+        from app.services import jobs
+
+        app.config['JOBS_STALE_AFTER'] = 0.15
+        seen = {}
+
+        def slow(ctx):
+            job = db.session.get(Job, ctx.job_id)
+            started = job.heartbeat_at
+            time.sleep(0.3)
+            db.session.commit()
+            seen['advanced'] = db.session.get(Job, ctx.job_id).heartbeat_at > started
+
+            # Requeued as stale and claimed elsewhere while this step ran
+            db.session.execute(db.update(Job).where(Job.id == ctx.job_id).values(worker_id='elsewhere:1'))
+            db.session.commit()
+            with pytest.raises(jobs.JobLost):
+                ctx.commit(done=1)
+            return {'ran': True}
+
+        monkeypatch.setitem(jobs._handlers, 'slow', slow)
+        job = Job(job_type='slow', owner_id=auth_user['id'])
+        db.session.add(job)
+        db.session.commit()
+
+        assert jobs.run_job(job.id)
+        assert seen['advanced']
+        db.session.expire_all()
+        job = db.session.get(Job, job.id)
+        assert (job.status, job.worker_id, job.result) == ('running', 'elsewhere:1', None)
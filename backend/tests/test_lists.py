@@ -179,3 +179,31 @@ class TestListItemsAPI:
         list_resp = auth_client.get(f'/api/v1/projects/{test_list["project_id"]}/lists/{test_list["id"]}')
         data = json.loads(list_resp.data)
         assert len(data['data']['items']) == 0
+    
+    def test_list_items_query_count(self, auth_client, test_list, query_counter):
+        """Should load a list's items in a constant number of queries"""
+        url = f'/api/v1/projects/{test_list["project_id"]}/lists/{test_list["id"]}/items'
+        
+        def add_items():
+            for i in range(5):
+                auth_client.post(url, data=json.dumps({'content': f'Item {i}'}), content_type='application/json')
+        
+        add_items()
+        query_counter.assert_constant(lambda: auth_client.get(url), grow=add_items)
+    
+    def test_get_list_normalized(self, auth_client, auth_user, test_list):
+        """Should side-load item assignees into a users map with ?normalize=1"""
+        url = f'/api/v1/projects/{test_list["project_id"]}/lists/{test_list["id"]}'
+        auth_client.post(f'{url}/items', data=json.dumps({'content': 'Milk', 'assigned_to': auth_user['id']}),
+                         content_type='application/json')
+        response = auth_client.post(f'{url}/items', data=json.dumps({'content': 'Eggs'}),
+                                    content_type='application/json')
+        item_id = json.loads(response.data)['data']['id']
+        
+        data = json.loads(auth_client.get(f'{url}?normalize=1').data)
+        assert [item.get('assignee', 'absent') for item in data['data']['items']] == ['absent', 'absent']
+        assert list(data['users']) == [str(auth_user['id'])]
+        
+        data = json.loads(auth_client.put(f'{url}/items/{item_id}/toggle?normalize=1').data)
+        assert data['data']['is_checked'] is True
+        assert data['users'] == {}
@@ -0,0 +1,75 @@
+"""Tests for request profiling, N+1 detection and the metrics endpoint"""
+import json
+import logging
+import pytest
+
+
+@pytest.fixture
+def projects(auth_client):
+    """Several projects, each with a couple of boards"""
+    for i in range(6):
+        response = auth_client.post('/api/v1/projects', data=json.dumps({'name': f'Project {i}'}),
+                                    content_type='application/json')
+        project_id = json.loads(response.data)['data']['id']
+        for j in range(2):
+            auth_client.post(f'/api/v1/projects/{project_id}/boards', data=json.dumps({'title': f'Board {j}'}),
+                             content_type='application/json')
+
+
+class TestProfiling:
+    """Test per-request SQL counting and the exported metrics"""
+
+    def test_query_count_header(self, app, auth_client, test_project):
+        """Should report the request's SQL statements and time when PROFILING_HEADERS is on"""
+        assert 'X-Query-Count' not in auth_client.get('/api/v1/projects').headers
+
+        app.config['PROFILING_HEADERS'] = True
+        response = auth_client.get(f'/api/v1/projects/{test_project["id"]}')
+        assert int(response.headers['X-Query-Count']) > 0
+        assert response.headers['X-Query-Time'].endswith('ms')
+
+    def test_n_plus_one_logged(self, auth_client, projects, caplog):
+        """Should warn when one statement repeats once per row"""
+        with caplog.at_level(logging.WARNING, logger='app.profiling'):
+            auth_client.get('/api/v1/projects')
+        warnings = [r.getMessage() for r in caplog.records if 'Probable N+1' in r.getMessage()]
+        assert len(warnings) == 1
+        assert 'projects.list_projects' in warnings[0]
+
+    def test_metrics(self, auth_client, test_project):
+        """Should export per-endpoint timings and statement counts in Prometheus format"""
+        auth_client.get(f'/api/v1/projects/{test_project["id"]}')
+        response = auth_client.get('/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        body = response.get_data(as_text=True)
+        for metric in ('taskboard_request_duration_seconds', 'taskboard_request_sql_statements',
+                       'taskboard_request_sql_seconds', 'taskboard_request_serialize_seconds'):
+            assert f'{metric}_count{{endpoint="projects.get_project",method="GET"}}' in body
+
+    def test_metrics_token(self, app, client):
+        """Should require the bearer token when METRICS_TOKEN is set"""
+        app.config['METRICS_TOKEN'] = 'scrape-secret'
+        assert client.get('/metrics').status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
+
+    def test_metrics_local_only_without_token(self, client):
+        """Should refuse remote and proxied scrapes when no METRICS_TOKEN is set"""
+        assert client.get('/metrics').status_code == 200
+        assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.7'}).status_code == 403
+        assert client.get('/metrics', headers={'X-Forwarded-For': '203.0.113.7'}).status_code == 403
+
+    def test_failed_statement_not_timed(self, app):
+        """Should not leave timer state on the connection when a statement raises"""
+        from app import db
+        from app.profiling import current_profile
+
+        with app.test_request_context():
+            app.preprocess_request()
+            connection = db.session.connection()
+            with pytest.raises(Exception):
+                db.session.execute(db.text('SELECT * FROM no_such_table'))
+            assert not connection.info.get('profile_started')
+            db.session.rollback()
+            db.session.execute(db.text('SELECT 1'))
+            assert current_profile().sql_count == 1
@@ -0,0 +1,74 @@
+"""Tests for per-user token-bucket rate limiting"""
+import json
+import multiprocessing
+import pytest
+from app.ratelimit import MemoryBuckets, SQLiteBuckets
+
+
+def _take_many(path, count, results):
+    buckets = SQLiteBuckets(path)
+    results.put(sum(buckets.take('write:1', 0.001, 50, 1000.0)[0] for _ in range(count)))
+
+
+@pytest.fixture
+def limited(app):
+    """Enable rate limiting with a tiny write budget"""
+    app.config.update({
+        'RATE_LIMIT_ENABLED': True,
+        'RATE_LIMIT_WRITE_RATE': 0.5,
+        'RATE_LIMIT_WRITE_BURST': 3
+    })
+    return app
+
+
+class TestRateLimit:
+    """Test admission control per user and request class"""
+
+    def test_write_budget_exhausted(self, auth_client, test_project, limited):
+        """Should answer 429 with Retry-After once the write bucket is empty"""
+        url = f'/api/v1/projects/{test_project["id"]}/lists'
+        statuses = [auth_client.post(url, data=json.dumps({'title': f'List {i}'}),
+                                     content_type='application/json').status_code for i in range(4)]
+        assert statuses == [201, 201, 201, 429]
+
+        response = auth_client.post(url, data=json.dumps({'title': 'Again'}), content_type='application/json')
+        assert response.status_code == 429
+        assert json.loads(response.data)['error']['code'] == 'RATE_LIMITED'
+        assert int(response.headers['Retry-After']) == 2
+
+    def test_reads_have_their_own_budget(self, auth_client, test_project, limited):
+        """Should keep serving reads after the write budget runs out"""
+        url = f'/api/v1/projects/{test_project["id"]}/lists'
+        for i in range(4):
+            auth_client.post(url, data=json.dumps({'title': f'List {i}'}), content_type='application/json')
+        assert auth_client.get(url).status_code == 200
+
+    def test_disabled(self, auth_client, test_project, app):
+        """Should not limit anything when RATE_LIMIT_ENABLED is off"""
+        app.config.update({'RATE_LIMIT_WRITE_RATE': 0.001, 'RATE_LIMIT_WRITE_BURST': 1})
+        url = f'/api/v1/projects/{test_project["id"]}/lists'
+        for i in range(3):
+            response = auth_client.post(url, data=json.dumps({'title': f'List {i}'}), content_type='application/json')
+            assert response.status_code == 201
+
+    @pytest.mark.parametrize('buckets', [MemoryBuckets, SQLiteBuckets])
+    def test_refill(self, buckets, tmp_path):
+        """Should refill at the configured rate up to the burst size"""
+        store = buckets() if buckets is MemoryBuckets else buckets(str(tmp_path / 'buckets.db'))
+        assert [store.take('read:1', 1, 2, 100.0)[0] for _ in range(3)] == [True, True, False]
+        assert store.take('read:2', 1, 2, 100.0)[0]
+        assert store.take('read:1', 1, 2, 101.0)[0]
+        assert not store.take('read:1', 1, 2, 101.0)[0]
+        assert store.take('read:1', 1, 2, 200.0) == (True, 1)
+
+    def test_shared_across_processes(self, tmp_path):
+        """Should share one bucket between processes using the same SQLite file"""
+        path = str(tmp_path / 'buckets.db')
+        SQLiteBuckets(path).take('warmup', 1, 1, 0.0)
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_take_many, args=(path, 40, results)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert sum(results.get() for _ in workers) == 50
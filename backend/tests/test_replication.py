@@ -0,0 +1,122 @@
+"""Tests for replicating the live SQLite database to durable storage"""
+import json
+import os
+import socket
+import sqlite3
+import time
+import pytest
+from app import create_app, db
+from app.models import User, Project
+from app.services.replication import LEASE_NAME, REPLICA_NAME, replicate, restore, replication_status
+
+
+def make_app(live_path, replica_dir):
+    return create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{live_path}',
+        'SQLITE_REPLICA_DIR': str(replica_dir),
+        'SECRET_KEY': 'test',
+        'JWT_SECRET_KEY': 'test',
+        'JOBS_EAGER': True,
+        'MAINTENANCE_ENABLED': False
+    })
+
+
+@pytest.mark.usefixtures('sqlite_only')
+class TestReplication:
+    """Test online backups, startup restore and /api/v1/admin/replication"""
+
+    def test_replicate_skips_unchanged(self, app, tmp_path):
+        """Should copy the database once and skip the copy until it changes"""
+        app.config['SQLITE_REPLICA_DIR'] = str(tmp_path)
+
+        assert replicate(app)['replicated'] is True
+        assert os.path.exists(tmp_path / REPLICA_NAME)
+        assert replicate(app) == {'replicated': False, 'reason': 'unchanged'}
+
+        conn = sqlite3.connect(tmp_path / REPLICA_NAME)
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+        assert conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+        conn.close()
+
+    def test_second_host_refused(self, app, tmp_path):
+        """Should refuse to overwrite a replica leased by another live host and take over once it expires"""
+        app.config['SQLITE_REPLICA_DIR'] = str(tmp_path)
+        lease_path = tmp_path / LEASE_NAME
+        lease_path.write_text(json.dumps({'host': 'other-instance', 'expires_at': time.time() + 60}))
+
+        assert replicate(app, force=True) == {'replicated': False, 'reason': 'leased', 'holder': 'other-instance'}
+        assert not os.path.exists(tmp_path / REPLICA_NAME)
+        assert replication_status(app)['lease_holder'] == 'other-instance'
+
+        lease_path.write_text(json.dumps({'host': 'other-instance', 'expires_at': time.time() - 1}))
+        assert replicate(app)['replicated'] is True
+        assert json.loads(lease_path.read_text())['host'] == socket.gethostname()
+
+    def test_unchanged_check_ignores_other_hosts(self, app, tmp_path):
+        """Should not trust a fingerprint recorded by another host"""
+        app.config['SQLITE_REPLICA_DIR'] = str(tmp_path)
+        replicate(app)
+        meta = json.loads((tmp_path / 'replica.json').read_text())
+        (tmp_path / 'replica.json').write_text(json.dumps(dict(meta, host='other-instance')))
+
+        assert replication_status(app)['pending_changes'] is True
+        assert replicate(app)['replicated'] is True
+
+    def test_status_reports_pending_changes(self, app, auth_user, tmp_path):
+        """Should report pending changes after a write and clear them after replicating"""
+        app.config['SQLITE_REPLICA_DIR'] = str(tmp_path)
+        replicate(app)
+        assert replication_status(app)['pending_changes'] is False
+        assert replication_status(app)['lag_seconds'] == 0.0
+
+        db.session.add(Project(owner_id=auth_user['id'], name='Pending'))
+        db.session.commit()
+        status = replication_status(app)
+        assert status['pending_changes'] is True
+        assert status['lag_seconds'] >= 0
+
+        replicate(app)
+        assert replication_status(app)['pending_changes'] is False
+
+    def test_restore_missing_live_database(self, tmp_path):
+        """Should restore a missing live database from the replica at startup"""
+        replica_dir = tmp_path / 'durable'
+        first = make_app(tmp_path / 'live1' / 'taskboard.db', replica_dir)
+        with first.app_context():
+            user = User(google_id='replica', email='replica@example.com', name='Replica')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Project(owner_id=user.id, name='Survivor'))
+            db.session.commit()
+            assert replicate(first)['replicated'] is True
+            db.engine.dispose()
+
+        second = make_app(tmp_path / 'live2' / 'taskboard.db', replica_dir)
+        with second.app_context():
+            assert Project.query.filter_by(name='Survivor').count() == 1
+            assert replication_status(second)['restored_at'] is not None
+            # An existing live database is never overwritten
+            assert restore(second) is False
+            db.engine.dispose()
+
+    def test_replication_disabled(self, app, auth_client):
+        """Should refuse a manual replication when no replica directory is configured"""
+        app.config['ADMIN_EMAILS'] = 'test@example.com'
+        assert auth_client.get('/api/v1/admin/replication').get_json()['data'] == {'enabled': False}
+        response = auth_client.post('/api/v1/admin/replication')
+        assert response.status_code == 400
+        assert response.get_json()['error']['code'] == 'REPLICATION_DISABLED'
+
+    def test_replication_endpoint(self, app, auth_client, tmp_path):
+        """Should replicate on demand and report the replica to admins"""
+        app.config['ADMIN_EMAILS'] = 'test@example.com'
+        app.config['SQLITE_REPLICA_DIR'] = str(tmp_path)
+
+        response = auth_client.post('/api/v1/admin/replication')
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert data['replicated'] is True
+        assert data['status']['replicated_at'] is not None
+
+        assert auth_client.get('/api/v1/admin/replication').status_code == 200
@@ -0,0 +1,91 @@
+"""Tests for read/write connection routing"""
+import pytest
+import json
+from sqlalchemy import event
+
+
+class TestReadWriteSplit:
+    """Test that GET requests read through the reader pool"""
+
+    @pytest.fixture
+    def executed(self, app):
+        """Record which engine ran each statement"""
+        from app import db
+        from app.routing import READER_BIND
+
+        calls = []
+        listeners = []
+        for name, engine in (('reader', db.engines[READER_BIND]), ('writer', db.engines[None])):
+            def record(conn, cursor, statement, params, context, executemany, name=name):
+                calls.append(name)
+            event.listen(engine, 'before_cursor_execute', record)
+            listeners.append((engine, record))
+        yield calls
+        for engine, record in listeners:
+            event.remove(engine, 'before_cursor_execute', record)
+
+    def _forget_writes(self, client):
+        with client.session_transaction() as sess:
+            sess.pop('db_wrote_at', None)
+
+    def test_get_uses_reader(self, auth_client, test_project, executed):
+        """Should serve GET requests from the reader pool"""
+        self._forget_writes(auth_client)
+        response = auth_client.get(f'/api/v1/projects/{test_project["id"]}')
+        assert response.status_code == 200
+        assert executed and set(executed) == {'reader'}
+
+    def test_write_uses_writer(self, auth_client, executed):
+        """Should run mutating requests on the writer"""
+        response = auth_client.post('/api/v1/projects',
+            data=json.dumps({'name': 'Written'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        assert set(executed) == {'writer'}
+
+    def test_read_after_own_write_uses_writer(self, auth_client, executed):
+        """Should route the caller's reads to the writer right after their write"""
+        response = auth_client.post('/api/v1/projects',
+            data=json.dumps({'name': 'Fresh'}),
+            content_type='application/json'
+        )
+        project_id = json.loads(response.data)['data']['id']
+        del executed[:]
+
+        response = auth_client.get(f'/api/v1/projects/{project_id}')
+        assert json.loads(response.data)['data']['name'] == 'Fresh'
+        assert set(executed) == {'writer'}
+
+    def test_read_after_group_commit_uses_writer(self, app, auth_client, test_project, executed):
+        """Should count writes committed by the group committer as the caller's own"""
+        base = f'/api/v1/projects/{test_project["id"]}/lists'
+        response = auth_client.post(base, data=json.dumps({'title': 'Chores'}), content_type='application/json')
+        base = f'{base}/{json.loads(response.data)["data"]["id"]}'
+        response = auth_client.post(f'{base}/items', data=json.dumps({'content': 'Dishes'}),
+                                    content_type='application/json')
+        item_id = json.loads(response.data)['data']['id']
+        self._forget_writes(auth_client)
+
+        app.config['GROUP_COMMIT'] = True
+        auth_client.put(f'{base}/items/{item_id}/toggle')
+        del executed[:]
+        response = auth_client.get(f'{base}/items')
+        assert json.loads(response.data)['data'][0]['is_checked'] is True
+        assert set(executed) == {'writer'}
+
+    def test_strong_consistency_header(self, auth_client, test_project, executed):
+        """Should route reads to the writer when the client asks for it"""
+        self._forget_writes(auth_client)
+        auth_client.get('/api/v1/projects', headers={'X-Consistency': 'strong'})
+        assert set(executed) == {'writer'}
+
+    def test_reader_is_read_only(self, app):
+        """Should refuse writes on reader connections"""
+        from sqlalchemy.exc import DBAPIError
+        from app import db
+        from app.routing import READER_BIND
+
+        with db.engines[READER_BIND].connect() as conn:
+            with pytest.raises(DBAPIError):
+                conn.exec_driver_sql("INSERT INTO users (google_id, email, name) VALUES ('x', 'x', 'x')")
@@ -62,6 +62,14 @@ class TestSharingAPI:
             content_type='application/json'
         )
         assert response.status_code == 404
+        
+        # The owner of the built-in templates is not a user anyone can share with
+        from app.services.default_templates import SYSTEM_USER_EMAIL
+        response = auth_client.post(f'/api/v1/projects/{project_id}/shares',
+            data=json.dumps({'email': SYSTEM_USER_EMAIL}),
+            content_type='application/json'
+        )
+        assert response.status_code == 404
     
     def test_share_board_no_email(self, auth_client, test_project):
         """Should reject share without email"""
@@ -114,3 +122,62 @@ class TestSharingAPI:
         list_resp = auth_client.get(f'/api/v1/projects/{project_id}/shares')
         data = json.loads(list_resp.data)
         assert len(data['data']) == 0
+    
+    def test_list_members(self, app, auth_client, auth_user, test_project, query_counter):
+        """Should list the owner then shared users from one query, refreshed when shares change"""
+        from app.models.user import User
+        from app import db
+        
+        project_id = test_project['id']
+        users = [User(google_id=f'member-{i}', email=f'member{i}@example.com', name=f'Member {i}') for i in range(4)]
+        db.session.add_all(users)
+        db.session.commit()
+        emails = [u.email for u in users]
+        
+        def share(email):
+            auth_client.post(f'/api/v1/projects/{project_id}/shares',
+                data=json.dumps({'email': email}),
+                content_type='application/json'
+            )
+        
+        def list_both():
+            auth_client.get(f'/api/v1/projects/{project_id}/members')
+            auth_client.get(f'/api/v1/projects/{project_id}/shares')
+        
+        share(emails[0])
+        app.config['RESPONSE_CACHE_ENABLED'] = False
+        query_counter.assert_constant(list_both, lambda: [share(email) for email in emails[1:]])
+        app.config['RESPONSE_CACHE_ENABLED'] = True
+        
+        response = auth_client.get(f'/api/v1/projects/{project_id}/members')
+        assert [m['email'] for m in json.loads(response.data)['data']] == [auth_user['email']] + emails
+        assert auth_client.get(f'/api/v1/projects/{project_id}/members').headers['X-Cache'] == 'HIT'
+        
+        auth_client.delete(f'/api/v1/projects/{project_id}/shares/{users[0].id}')
+        response = auth_client.get(f'/api/v1/projects/{project_id}/members')
+        assert response.headers['X-Cache'] == 'MISS'
+        assert len(json.loads(response.data)['data']) == 4
+        shares = json.loads(auth_client.get(f'/api/v1/projects/{project_id}/shares').data)['data']
+        assert [s['user']['email'] for s in shares] == emails[1:]
+    
+    def test_member_rows_use_indexes(self, app, sqlite_only, test_project):
+        """Should look members up through the project's shares instead of scanning users"""
+        from sqlalchemy import event
+        from app import db
+        from app.models.project import Project
+        
+        statements = []
+        
+        def record(conn, cursor, statement, params, context, executemany):
+            statements.append((statement, params))
+        
+        project = db.session.get(Project, test_project['id'])
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            project.member_rows()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        statement, params = statements[-1]
+        with db.engine.connect() as conn:
+            plan = [row[3] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', params)]
+        assert not any(step.startswith('SCAN users') for step in plan), plan
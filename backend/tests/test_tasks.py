@@ -199,3 +199,63 @@ class TestTasksAPI:
         data = json.loads(response.data)
         assert len(data['data']) == 1
         assert data['data'][0]['title'] == 'Todo Task'
+    
+    def test_list_tasks_query_count(self, auth_client, auth_user, board_with_stages, query_counter):
+        """Should load a board's tasks and their assignees in a constant number of queries"""
+        url = f'/api/v1/projects/{board_with_stages["project_id"]}/boards/{board_with_stages["board_id"]}/tasks'
+        
+        def add_tasks():
+            for i, stage_id in enumerate(board_with_stages['stages'].values()):
+                auth_client.post(url,
+                    data=json.dumps({
+                        'title': f'Task {i}',
+                        'stage_id': stage_id,
+                        'assigned_to': auth_user['id'],
+                        'custom_fields': {'priority': 'high'}
+                    }),
+                    content_type='application/json'
+                )
+        
+        add_tasks()
+        query_counter.assert_constant(lambda: auth_client.get(url), grow=add_tasks)
+    
+    def test_list_tasks_normalized(self, auth_client, auth_user, board_with_stages):
+        """Should return assignee ids in each task and each user once in a users map with ?normalize=1"""
+        url = f'/api/v1/projects/{board_with_stages["project_id"]}/boards/{board_with_stages["board_id"]}/tasks'
+        for i in range(3):
+            auth_client.post(url,
+                data=json.dumps({'title': f'Task {i}', 'assigned_to': auth_user['id'] if i else None}),
+                content_type='application/json'
+            )
+        
+        data = json.loads(auth_client.get(f'{url}?normalize=1').data)
+        assert all('assignee' not in task for task in data['data'])
+        assert [task['assigned_to'] for task in data['data']] == [None, auth_user['id'], auth_user['id']]
+        assert data['users'] == {str(auth_user['id']): json.loads(auth_client.get('/api/v1/auth/me').data)['data']}
+        
+        embedded = json.loads(auth_client.get(url).data)
+        assert 'users' not in embedded
+        assert embedded['data'][1]['assignee']['email'] == auth_user['email']
+    
+    def test_list_tasks_sparse_fields(self, auth_client, auth_user, board_with_stages, query_counter):
+        """Should return and select only the columns named in ?fields=, plus id"""
+        url = f'/api/v1/projects/{board_with_stages["project_id"]}/boards/{board_with_stages["board_id"]}/tasks'
+        auth_client.post(url,
+            data=json.dumps({'title': 'Sparse', 'description': 'Long text', 'assigned_to': auth_user['id']}),
+            content_type='application/json'
+        )
+        
+        _, profiles = query_counter.count(lambda: auth_client.get(f'{url}?fields=title,stage_id'))
+        data = json.loads(auth_client.get(f'{url}?fields=title,stage_id').data)['data']
+        assert data == [{'id': data[0]['id'], 'title': 'Sparse', 'stage_id': data[0]['stage_id']}]
+        assert data[0]['stage_id'] in board_with_stages['stages'].values()
+        task_sql = [s for p in profiles for s in p.statements if 'FROM tasks' in s]
+        assert task_sql and not any('description' in s or 'JOIN users' in s for s in task_sql)
+        
+        data = json.loads(auth_client.get(f'{url}?fields=assignee').data)['data']
+        assert set(data[0]) == {'id', 'assignee'}
+        assert data[0]['assignee']['email'] == auth_user['email']
+        
+        response = auth_client.get(f'{url}?fields=title,secret')
+        assert response.status_code == 400
+        assert json.loads(response.data)['error']['code'] == 'VALIDATION_ERROR'
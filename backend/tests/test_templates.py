@@ -0,0 +1,367 @@
+"""Tests for template API endpoints"""
+import pytest
+import json
+
+
+class TestTemplateCapture:
+    """Test /api/v1/templates/*/from-* endpoints"""
+
+    @pytest.fixture
+    def populated_project(self, auth_client, test_project):
+        """Create a project with a board holding tasks in several stages and a list"""
+        project_id = test_project['id']
+        board_resp = auth_client.post(f'/api/v1/projects/{project_id}/boards',
+            data=json.dumps({'title': 'Sprint', 'description': 'Sprint board'}),
+            content_type='application/json'
+        )
+        board = json.loads(board_resp.data)['data']
+        stages = {s['name']: s for s in board['stages']}
+
+        for title, stage_name in [('Plan', 'To Do'), ('Build', 'In Progress'), ('Ship', 'Done')]:
+            auth_client.post(f'/api/v1/projects/{project_id}/boards/{board["id"]}/tasks',
+                data=json.dumps({
+                    'title': title,
+                    'stage_id': stages[stage_name]['id'],
+                    'custom_fields': {'points': 3}
+                }),
+                content_type='application/json'
+            )
+
+        list_resp = auth_client.post(f'/api/v1/projects/{project_id}/lists',
+            data=json.dumps({'title': 'Checklist'}),
+            content_type='application/json'
+        )
+        list_id = json.loads(list_resp.data)['data']['id']
+        for content in ['First', 'Second']:
+            auth_client.post(f'/api/v1/projects/{project_id}/lists/{list_id}/items',
+                data=json.dumps({'content': content}),
+                content_type='application/json'
+            )
+
+        return {'project_id': project_id, 'board_id': board['id'], 'list_id': list_id}
+
+    def test_template_from_board(self, auth_client, populated_project):
+        """Should capture stages and map each task to its stage position"""
+        board_id = populated_project['board_id']
+        response = auth_client.post(f'/api/v1/templates/boards/from-board/{board_id}',
+            data=json.dumps({'name': 'Sprint Template'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        template_data = json.loads(response.data)['data']['template_data']
+        assert [s['name'] for s in template_data['stages']] == ['To Do', 'In Progress', 'Done']
+        positions = {t['title']: t['stage_position'] for t in template_data['tasks']}
+        assert positions == {'Plan': 0, 'Build': 1, 'Ship': 2}
+        assert template_data['tasks'][0]['custom_fields'] == {'points': 3}
+
+    def test_template_from_list(self, auth_client, populated_project):
+        """Should capture list items in position order"""
+        list_id = populated_project['list_id']
+        response = auth_client.post(f'/api/v1/templates/lists/from-list/{list_id}',
+            data=json.dumps({}),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        items = json.loads(response.data)['data']['template_data']['items']
+        assert [i['content'] for i in items] == ['First', 'Second']
+
+    def test_template_from_project(self, auth_client, populated_project):
+        """Should create nested board and list templates for the project"""
+        project_id = populated_project['project_id']
+        # A second, empty board should still be captured
+        auth_client.post(f'/api/v1/projects/{project_id}/boards',
+            data=json.dumps({'title': 'Backlog'}),
+            content_type='application/json'
+        )
+
+        response = auth_client.post(f'/api/v1/templates/projects/from-project/{project_id}',
+            data=json.dumps({'name': 'Project Template'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        template_data = json.loads(response.data)['data']['template_data']
+        assert len(template_data['board_template_ids']) == 2
+        assert len(template_data['list_template_ids']) == 1
+
+        first_board_id = template_data['board_template_ids'][0]
+        board_resp = auth_client.get(f'/api/v1/templates/boards/{first_board_id}')
+        board_template = json.loads(board_resp.data)['data']
+        assert board_template['name'] == 'Sprint'
+        assert len(board_template['template_data']['tasks']) == 3
+
+        second_board_id = template_data['board_template_ids'][1]
+        board_resp = auth_client.get(f'/api/v1/templates/boards/{second_board_id}')
+        assert json.loads(board_resp.data)['data']['template_data']['tasks'] == []
+
+    def test_templates_saved_in_batches(self, app, auth_user):
+        """Should flush captured templates once per batch rather than once per template"""
+        from sqlalchemy import event
+        from app import db
+        from app.api.templates import _save_templates
+        from app.models.template import BoardTemplate
+
+        def boards():
+            for i in range(5):
+                yield BoardTemplate(owner_id=auth_user['id'], name=f'Board {i}',
+                                    template_data={'stages': [], 'tasks': [{'title': 't'}] * 3})
+
+        flushes = []
+        listener = lambda session, context: flushes.append(1)
+        event.listen(db.session, 'after_flush', listener)
+        try:
+            ids = _save_templates(boards())
+            assert len(flushes) == 1
+            assert len(_save_templates(boards(), batch_rows=8)) == 5
+            assert len(flushes) == 1 + 3
+        finally:
+            event.remove(db.session, 'after_flush', listener)
+        assert [t.name for t in BoardTemplate.query.filter(BoardTemplate.id.in_(ids)).order_by(BoardTemplate.id)] == \
+            [f'Board {i}' for i in range(5)]
+
+    def test_apply_captured_project_template(self, auth_client, populated_project):
+        """Should round-trip a captured project through apply"""
+        project_id = populated_project['project_id']
+        create_resp = auth_client.post(f'/api/v1/templates/projects/from-project/{project_id}',
+            data=json.dumps({}),
+            content_type='application/json'
+        )
+        template_id = json.loads(create_resp.data)['data']['id']
+
+        response = auth_client.post(f'/api/v1/templates/projects/{template_id}/apply',
+            data=json.dumps({'name': 'Copy'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        project = json.loads(response.data)['data']
+        assert project['board_count'] == 1
+        assert project['list_count'] == 1
+
+        board_id = project['boards'][0]['id']
+        tasks_resp = auth_client.get(f'/api/v1/projects/{project["id"]}/boards/{board_id}/tasks')
+        titles = sorted(t['title'] for t in json.loads(tasks_resp.data)['data'])
+        assert titles == ['Build', 'Plan', 'Ship']
+
+
+class TestSystemTemplates:
+    """Test built-in templates shared by every user"""
+
+    def _system_board_template(self, auth_client):
+        response = auth_client.get('/api/v1/templates/boards')
+        templates = json.loads(response.data)['data']
+        template_id = next(t['id'] for t in templates if t['is_system'])
+        response = auth_client.get(f'/api/v1/templates/boards/{template_id}')
+        return json.loads(response.data)['data']
+
+    def test_system_templates_visible(self, auth_client):
+        """Should list built-in templates without seeding per-user copies"""
+        from app.models.template import ProjectTemplate
+        from app.services.default_templates import DEFAULT_TEMPLATES
+
+        response = auth_client.get('/api/v1/templates/projects')
+        assert response.status_code == 200
+        templates = json.loads(response.data)['data']
+        assert len(templates) == len(DEFAULT_TEMPLATES)
+        assert all(t['is_system'] for t in templates)
+        assert ProjectTemplate.query.filter_by(is_system=False).count() == 0
+
+    def test_apply_system_project_template(self, auth_client):
+        """Should create a project from a built-in template"""
+        response = auth_client.get('/api/v1/templates/projects')
+        template = json.loads(response.data)['data'][0]
+
+        response = auth_client.post(f'/api/v1/templates/projects/{template["id"]}/apply',
+            data=json.dumps({'name': 'My Trip'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 201
+        data = json.loads(response.data)['data']
+        assert data['name'] == 'My Trip'
+        assert data['board_count'] == template['summary']['board_template_ids']
+
+    def test_apply_system_project_template_uses_own_copies(self, auth_client):
+        """Should build boards and lists from the user's edited copies of the system templates"""
+        response = auth_client.get('/api/v1/templates/projects')
+        template_id = json.loads(response.data)['data'][0]['id']
+        template_data = json.loads(auth_client.get(f'/api/v1/templates/projects/{template_id}').data)['data']['template_data']
+        for kind, key in (('boards', 'board_template_ids'), ('lists', 'list_template_ids')):
+            auth_client.put(f'/api/v1/templates/{kind}/{template_data[key][0]}',
+                data=json.dumps({'name': f'My {kind}'}),
+                content_type='application/json'
+            )
+
+        response = auth_client.post(f'/api/v1/templates/projects/{template_id}/apply',
+            data=json.dumps({'name': 'My Trip'}),
+            content_type='application/json'
+        )
+        project = json.loads(auth_client.get(f'/api/v1/projects/{json.loads(response.data)["data"]["id"]}').data)['data']
+        assert project['boards'][0]['title'] == 'My boards'
+        assert project['lists'][0]['title'] == 'My lists'
+
+    def test_update_system_template_copies_on_write(self, auth_client):
+        """Should give the user a private copy instead of editing the shared row"""
+        system_template = self._system_board_template(auth_client)
+
+        response = auth_client.put(f'/api/v1/templates/boards/{system_template["id"]}',
+            data=json.dumps({'name': 'My Planning'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        copy = json.loads(response.data)['data']
+        assert copy['id'] != system_template['id']
+        assert copy['is_system'] is False
+        assert copy['source_template_id'] == system_template['id']
+        assert copy['name'] == 'My Planning'
+        assert copy['template_data'] == system_template['template_data']
+
+        # The copy replaces the system template in the user's listing
+        response = auth_client.get('/api/v1/templates/boards')
+        ids = [t['id'] for t in json.loads(response.data)['data']]
+        assert copy['id'] in ids
+        assert system_template['id'] not in ids
+
+        # Editing through the system id again reuses the same copy
+        response = auth_client.put(f'/api/v1/templates/boards/{system_template["id"]}',
+            data=json.dumps({'description': 'Edited twice'}),
+            content_type='application/json'
+        )
+        assert json.loads(response.data)['data']['id'] == copy['id']
+
+        # The shared row is untouched
+        response = auth_client.get(f'/api/v1/templates/boards/{system_template["id"]}')
+        assert json.loads(response.data)['data']['name'] == system_template['name']
+
+    def test_delete_system_template_forbidden(self, auth_client):
+        """Should not allow users to delete a built-in template"""
+        system_template = self._system_board_template(auth_client)
+        response = auth_client.delete(f'/api/v1/templates/boards/{system_template["id"]}')
+        assert response.status_code == 403
+
+    def _seed_legacy_copies(self, owner_id):
+        from app import db
+        from app.models.template import ProjectTemplate, BoardTemplate, ListTemplate
+        from app.services.default_templates import DEFAULT_TEMPLATES
+
+        for template_def in DEFAULT_TEMPLATES:
+            boards = [BoardTemplate(owner_id=owner_id, name=b['name'], description=b.get('description'),
+                                    color_theme=b.get('color_theme', 'blue'),
+                                    template_data={'stages': b.get('stages', []), 'tasks': b.get('tasks', [])})
+                      for b in template_def.get('boards', [])]
+            lists = [ListTemplate(owner_id=owner_id, name=l['name'], color_theme=l.get('color_theme', 'gray'),
+                                  template_data={'items': [{'content': item, 'position': idx}
+                                                           for idx, item in enumerate(l.get('items', []))]})
+                     for l in template_def.get('lists', [])]
+            db.session.add_all(boards + lists)
+            db.session.flush()
+            db.session.add(ProjectTemplate(
+                owner_id=owner_id, name=template_def['name'], description=template_def.get('description'),
+                color_theme=template_def.get('color_theme', 'blue'),
+                template_data={'board_template_ids': [b.id for b in boards], 'list_template_ids': [l.id for l in lists]}
+            ))
+        return boards
+
+    def test_legacy_per_user_copies_removed_once(self, app, auth_user):
+        """Should delete unedited legacy copies when the system templates are first seeded, and only then"""
+        from app import db
+        from app.models.user import SYSTEM_USER_GOOGLE_ID, User
+        from app.models.template import ProjectTemplate, BoardTemplate, ListTemplate
+        from app.services.default_templates import DEFAULT_TEMPLATES, seed_system_templates
+
+        # Roll back to a database that predates the shared system templates
+        for model in (ProjectTemplate, BoardTemplate, ListTemplate):
+            for template in model.query.filter_by(is_system=True):
+                db.session.delete(template)
+        db.session.delete(User.query.filter_by(google_id=SYSTEM_USER_GOOGLE_ID).one())
+        db.session.commit()
+
+        boards = self._seed_legacy_copies(auth_user['id'])
+        boards[0].name = 'My workouts'
+        db.session.commit()
+
+        seed_system_templates()
+        remaining = ProjectTemplate.query.filter_by(is_system=False).all()
+        assert [t.name for t in remaining] == [DEFAULT_TEMPLATES[-1]['name']]
+        assert BoardTemplate.query.filter_by(is_system=False).count() == len(DEFAULT_TEMPLATES[-1]['boards'])
+        assert ListTemplate.query.filter_by(is_system=False).count() == len(DEFAULT_TEMPLATES[-1]['lists'])
+
+        # Later startups skip the cleanup entirely
+        self._seed_legacy_copies(auth_user['id'])
+        db.session.commit()
+        seed_system_templates()
+        assert ProjectTemplate.query.filter_by(is_system=False).count() == len(DEFAULT_TEMPLATES) + 1
+
+
+class TestTemplateBlobs:
+    """Test content-addressed storage of template payloads"""
+
+    @pytest.fixture
+    def board_id(self, auth_client, test_project):
+        project_id = test_project['id']
+        response = auth_client.post(f'/api/v1/projects/{project_id}/boards',
+            data=json.dumps({'title': 'Blob Board'}),
+            content_type='application/json'
+        )
+        return json.loads(response.data)['data']['id']
+
+    def _save_board(self, auth_client, board_id, name):
+        response = auth_client.post(f'/api/v1/templates/boards/from-board/{board_id}',
+            data=json.dumps({'name': name}),
+            content_type='application/json'
+        )
+        return json.loads(response.data)['data']
+
+    def test_identical_payloads_share_blob(self, auth_client, board_id):
+        """Should store one payload for repeated saves of the same board"""
+        from app.models.template import BoardTemplate, TemplateBlob
+
+        first = self._save_board(auth_client, board_id, 'First')
+        second = self._save_board(auth_client, board_id, 'Second')
+        assert first['template_data'] == second['template_data']
+
+        blob_hash = BoardTemplate.query.get(first['id']).blob_hash
+        assert BoardTemplate.query.get(second['id']).blob_hash == blob_hash
+        assert TemplateBlob.query.get(blob_hash).ref_count == 2
+
+    def test_blob_released_on_update_and_delete(self, auth_client, board_id):
+        """Should drop references on update and delete, removing unused payloads"""
+        from app import db
+        from app.models.template import TemplateBlob
+
+        first = self._save_board(auth_client, board_id, 'First')
+        second = self._save_board(auth_client, board_id, 'Second')
+        shared_hash = TemplateBlob.digest(first['template_data'])
+
+        auth_client.put(f'/api/v1/templates/boards/{first["id"]}',
+            data=json.dumps({'template_data': {'stages': [], 'tasks': []}}),
+            content_type='application/json'
+        )
+        db.session.expire_all()
+        assert TemplateBlob.query.get(shared_hash).ref_count == 1
+
+        auth_client.delete(f'/api/v1/templates/boards/{second["id"]}')
+        db.session.expire_all()
+        assert TemplateBlob.query.get(shared_hash) is None
+
+    def test_listing_omits_payload(self, auth_client, board_id):
+        """Should list templates with a size summary instead of template_data"""
+        self._save_board(auth_client, board_id, 'Listed')
+        response = auth_client.get('/api/v1/templates/boards')
+        template = next(t for t in json.loads(response.data)['data'] if t['name'] == 'Listed')
+        assert 'template_data' not in template
+        assert template['summary'] == {'stages': 3, 'tasks': 0}
+
+    def test_legacy_inline_payload_migrated(self, app):
+        """Should move payloads stored inline on the template row into blobs"""
+        from app import db
+        from app.models.template import ListTemplate, migrate_legacy_template_data
+
+        system_user_id = ListTemplate.query.first().owner_id
+        db.session.execute(ListTemplate.__table__.insert().values(
+            owner_id=system_user_id, name='Legacy', template_data={'items': [{'content': 'a', 'position': 0}]}
+        ))
+        db.session.commit()
+
+        migrate_legacy_template_data()
+        template = ListTemplate.query.filter_by(name='Legacy').one()
+        assert template.blob_hash is not None
+        assert template.summary == {'items': 1}
+        assert template.template_data == {'items': [{'content': 'a', 'position': 0}]}
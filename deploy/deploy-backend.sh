@@ -19,10 +19,10 @@ cd "$PROJECT_ROOT/backend"
 echo "📦 Creating deployment package..."
 rm -f deploy.zip
 
-# Copy frontend files to static directory for serving
+# Build fingerprinted, precompressed frontend assets into the static directory
 echo "📁 Bundling frontend with backend..."
-mkdir -p static
-cp -r "$PROJECT_ROOT/frontend/"* static/
+DB_AUTO_SETUP=false MAINTENANCE_ENABLED=false JOBS_ENABLED=false \
+    flask --app app build-assets --source "$PROJECT_ROOT/frontend" --output static
 
 # Create zip excluding unnecessary files
 zip -r deploy.zip . \
@@ -27,5 +27,17 @@ export const api = {
     get: (endpoint) => request('GET', endpoint),
     post: (endpoint, data) => request('POST', endpoint, data),
     put: (endpoint, data) => request('PUT', endpoint, data),
-    delete: (endpoint) => request('DELETE', endpoint)
+    delete: (endpoint) => request('DELETE', endpoint),
+    
+    // Poll a background job until it finishes; resolves with the finished job
+    async waitForJob(job, interval = 1000) {
+        while (job.status === 'queued' || job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, interval));
+            job = (await request('GET', `/jobs/${job.id}`)).data;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Job failed');
+        }
+        return job;
+    }
 };
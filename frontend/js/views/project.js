@@ -306,7 +306,8 @@ function showEditProjectModal(project) {
     
     document.getElementById('delete-project-btn')?.addEventListener('click', async () => {
         if (confirm('Are you sure you want to delete this project? This will delete all boards, lists, and tasks.')) {
-            await api.delete(`/projects/${project.id}`);
+            const accepted = await api.delete(`/projects/${project.id}?async=1`);
+            await api.waitForJob(accepted.data);
             toast.success('Project deleted');
             hideModal();
             await loadSidebarData();
@@ -85,8 +85,8 @@ export async function renderTemplates(container) {
 }
 
 function renderProjectTemplateCard(template) {
-    const boardCount = template.template_data?.board_template_ids?.length || 0;
-    const listCount = template.template_data?.list_template_ids?.length || 0;
+    const boardCount = template.summary?.board_template_ids || 0;
+    const listCount = template.summary?.list_template_ids || 0;
     
     return `
         <div class="template-card" data-type="project" data-id="${template.id}">
@@ -122,7 +122,7 @@ function showProjectTemplateActions(template) {
                 
                 <div style="display: flex; gap: 0.75rem; margin-top: 1.5rem;">
                     <button id="apply-template-btn" class="btn btn-primary" style="flex: 1;">Create Project</button>
-                    <button id="delete-template-btn" class="btn btn-danger">Delete</button>
+                    ${template.is_system ? '' : '<button id="delete-template-btn" class="btn btn-danger">Delete</button>'}
                 </div>
             </div>
         `,
@@ -132,11 +132,13 @@ function showProjectTemplateActions(template) {
     document.getElementById('apply-template-btn')?.addEventListener('click', async () => {
         const name = document.querySelector('input[name="name"]').value;
         try {
-            const result = await api.post(`/templates/projects/${template.id}/apply`, { name });
+            const accepted = await api.post(`/templates/projects/${template.id}/apply?async=1`, { name });
+            toast.info('Creating project...');
+            const job = await api.waitForJob(accepted.data);
             toast.success('Project created from template');
             hideModal();
             await loadSidebarData();
-            window.location.hash = `#/projects/${result.data.id}`;
+            window.location.hash = `#/projects/${job.result.project_id}`;
         } catch (err) {
             toast.error('Failed to create project');
         }
@@ -153,8 +155,8 @@ function showProjectTemplateActions(template) {
 }
 
 function renderBoardTemplateCard(template) {
-    const stageCount = template.template_data?.stages?.length || 0;
-    const taskCount = template.template_data?.tasks?.length || 0;
+    const stageCount = template.summary?.stages || 0;
+    const taskCount = template.summary?.tasks || 0;
     
     return `
         <div class="template-card" data-type="board" data-id="${template.id}">
@@ -173,7 +175,7 @@ function renderBoardTemplateCard(template) {
 }
 
 function renderListTemplateCard(template) {
-    const itemCount = template.template_data?.items?.length || 0;
+    const itemCount = template.summary?.items || 0;
     
     return `
         <div class="template-card" data-type="list" data-id="${template.id}">
@@ -190,6 +192,11 @@ function renderListTemplateCard(template) {
 }
 
 async function showBoardTemplateActions(template) {
+    // Listings omit template_data, so fetch the full template for the preview
+    try {
+        template = (await api.get(`/templates/boards/${template.id}`)).data;
+    } catch (e) {}
+    
     // Fetch projects for selection
     let projects = [];
     try {
@@ -234,7 +241,7 @@ async function showBoardTemplateActions(template) {
                 
                 <div style="display: flex; gap: 0.75rem; margin-top: 1.5rem;">
                     <button id="apply-template-btn" class="btn btn-primary" style="flex: 1;">Create Board</button>
-                    <button id="delete-template-btn" class="btn btn-danger">Delete</button>
+                    ${template.is_system ? '' : '<button id="delete-template-btn" class="btn btn-danger">Delete</button>'}
                 </div>
             </div>
         `,
@@ -289,6 +296,11 @@ async function showBoardTemplateActions(template) {
 }
 
 async function showListTemplateActions(template) {
+    // Listings omit template_data, so fetch the full template for the preview
+    try {
+        template = (await api.get(`/templates/lists/${template.id}`)).data;
+    } catch (e) {}
+    
     // Fetch projects for selection
     let projects = [];
     try {
@@ -334,7 +346,7 @@ async function showListTemplateActions(template) {
                 
                 <div style="display: flex; gap: 0.75rem; margin-top: 1.5rem;">
                     <button id="apply-template-btn" class="btn btn-primary" style="flex: 1;">Create List</button>
-                    <button id="delete-template-btn" class="btn btn-danger">Delete</button>
+                    ${template.is_system ? '' : '<button id="delete-template-btn" class="btn btn-danger">Delete</button>'}
                 </div>
             </div>
         `,